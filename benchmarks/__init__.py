@@ -0,0 +1,6 @@
+"""
+Benchmark suite for skutil, run with `asv <https://asv.readthedocs.io>`_
+(see ``asv.conf.json`` at the root of the repository). The ``bench_*.py``
+scripts in this directory are standalone, ad-hoc comparisons, and are
+ignored by asv.
+"""
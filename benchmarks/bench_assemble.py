@@ -0,0 +1,77 @@
+"""
+Benchmark the assembly of a selective decomposer's output on 500-column
+frames: a block of 10 components (from 100 selected columns) followed by
+the 400 untouched, "passthrough" columns (a mix of float and int columns).
+The 100 selected columns are the first 100 columns of the frame.
+The previous approach built a frame from the components, copied the input
+(in ``validate_is_pd``), selected the passthrough columns (another copy)
+and concatenated the two along the columns (aligning on the index). The
+output is now assembled once, with each column copied into place directly
+from the input. Reports the time and the peak memory allocated (when
+``tracemalloc`` is available, i.e., on Python 3) for each.
+"""
+from __future__ import print_function, division
+import gc
+from time import time
+
+import numpy as np
+import pandas as pd
+
+from skutil.utils.util import _assemble_frame
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def concatenated(X, names, transform, other_nms):
+    """The previous approach"""
+    X = X.copy()
+    left = pd.DataFrame.from_records(data=transform, columns=names)
+    return pd.concat([left, X[other_nms]], axis=1)
+
+
+def assembled(X, names, transform, other_nms):
+    return _assemble_frame([(names, transform), (other_nms, X)], X.index)
+
+
+def make_frame(n_samples, random_state):
+    floats = pd.DataFrame.from_records(data=random_state.rand(n_samples, 300),
+                                       columns=['f%i' % i for i in range(300)])
+    ints = pd.DataFrame.from_records(data=random_state.randint(0, 100, (n_samples, 200)),
+                                     columns=['i%i' % i for i in range(200)])
+    return pd.concat([floats, ints], axis=1)
+
+
+def bench(fun, X, names, transform, other_nms):
+    gc.collect()
+    if tracemalloc is not None:
+        tracemalloc.start()
+
+    tstart = time()
+    out = fun(X, names, transform, other_nms)
+    elapsed = time() - tstart
+
+    peak = np.nan
+    if tracemalloc is not None:
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+
+    assert out.shape == (X.shape[0], 410)
+    return elapsed, peak
+
+
+if __name__ == '__main__':
+    random_state = np.random.RandomState(42)
+    print('%10s %14s %10s %12s' % ('n_samples', 'method', 'time', 'peak mem'))
+
+    for n_samples in (1000, 10000, 100000):
+        X = make_frame(n_samples, random_state)
+        other_nms = X.columns[100:].tolist()
+        names = ['PC%i' % (i + 1) for i in range(10)]
+        transform = random_state.rand(n_samples, 10)
+
+        for method, fun in (('concatenated', concatenated), ('assembled', assembled)):
+            elapsed, peak = bench(fun, X, names, transform, other_nms)
+            print('%10i %14s %9.3fs %10.1fMB' % (n_samples, method, elapsed, peak))
@@ -0,0 +1,60 @@
+"""
+Benchmark the per-row latency of scoring one row at a time through a
+fitted pipeline of skutil transformers against the same pipeline compiled
+into a NumPy-only scoring plan (``skutil.pipeline.compile_pipeline``).
+"""
+from __future__ import print_function, division
+import gc
+import warnings
+from time import time
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import RobustScaler
+
+from skutil.decomposition import SelectivePCA
+from skutil.pipeline import compile_pipeline
+from skutil.preprocessing import (BoxCoxTransformer, InteractionTermTransformer,
+                                  SelectiveImputer, SelectiveScaler)
+from skutil.utils import load_iris_df
+
+
+def bench(fun, rows):
+    gc.collect()
+    tstart = time()
+    for row in rows:
+        fun(row)
+    return (time() - tstart) / len(rows) * 1e6
+
+
+if __name__ == '__main__':
+    X = load_iris_df(include_tgt=True)
+    y = X.pop('Species')
+    X.iloc[::7, 1] = np.nan
+    cols = X.columns.tolist()
+
+    pipe = Pipeline([
+        ('imputer',      SelectiveImputer(fill='median')),
+        ('scaler',       SelectiveScaler(cols=cols[:2], scaler=RobustScaler())),
+        ('boxcox',       BoxCoxTransformer(cols=cols[2:])),
+        ('interactions', InteractionTermTransformer(cols=cols[:3])),
+        ('pca',          SelectivePCA(n_components=3)),
+        ('model',        LogisticRegression())
+    ]).fit(X, y)
+    plan = compile_pipeline(pipe, cols)
+    transformers = Pipeline(pipe.steps[:-1])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        # one-row frames (as a service would score them) and 1d ndarray rows
+        frame_rows = [X.iloc[i:i + 1] for i in range(X.shape[0])]
+        array_rows = X.values[:, np.newaxis]
+
+        print('%22s %14s' % ('', 'us per row'))
+        print('%22s %13.1f' % ('pipeline transform', bench(transformers.transform, frame_rows[:20])))
+        print('%22s %13.1f' % ('compiled (frame)', bench(plan.transform, frame_rows)))
+        print('%22s %13.1f' % ('compiled (ndarray)', bench(plan.transform, array_rows)))
+        print('%22s %13.1f' % ('pipeline predict', bench(pipe.predict, frame_rows[:20])))
+        print('%22s %13.1f' % ('compiled (frame)', bench(plan.predict, frame_rows)))
+        print('%22s %13.1f' % ('compiled (ndarray)', bench(plan.predict, array_rows)))
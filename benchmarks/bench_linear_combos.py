@@ -0,0 +1,78 @@
+"""
+Benchmark the LinearCombinationFilterer on increasingly wide design
+matrices against the previous approach, which refactored the matrix
+(one LINPACK QR plus an SVD for the rank) after each batch of drops.
+
+Each matrix has ``n_samples`` rows and ``n_features`` columns, of which
+10% are linear combinations of a handful of the others, interleaved
+throughout the matrix so that the refactoring approach needs several
+rounds to resolve them.
+"""
+from __future__ import print_function, division
+import gc
+import sys
+from time import time
+
+import numpy as np
+import pandas as pd
+
+from skutil.feature_selection import LinearCombinationFilterer
+from skutil.feature_selection.combos import _enum_lc
+from skutil.odr import QRDecomposition
+
+
+def refactoring_drops(x):
+    """The previous approach: refactor until there are no more combos"""
+    cols, drops = np.arange(x.shape[1]), []
+    lc_list = _enum_lc(QRDecomposition(x))
+    while lc_list is not None:
+        bad = np.array(list(set([v[0] for v in lc_list.values()])))
+        drops.extend(cols[bad])
+        x = np.delete(x, bad, axis=1)
+        cols = np.delete(cols, bad)
+        lc_list = _enum_lc(QRDecomposition(x))
+    return drops
+
+
+def make_design(n_samples, n_features, random_state):
+    n_combos = n_features // 10
+    x = random_state.rand(n_samples, n_features)
+
+    # overwrite some columns with combinations of (up to) 5 columns to their left
+    dependent = np.sort(random_state.choice(np.arange(10, n_features), n_combos, replace=False))
+    for j in dependent:
+        x[:, j] = x[:, random_state.choice(j, 5, replace=False)].dot(random_state.rand(5))
+
+    return pd.DataFrame.from_records(data=x), dependent
+
+
+def bench(n_samples, n_features, refactor, random_state):
+    X, dependent = make_design(n_samples, n_features, random_state)
+
+    gc.collect()
+    tstart = time()
+    drops = LinearCombinationFilterer().fit(X).drop_
+    single_pass = time() - tstart
+    if n_samples > n_features:  # otherwise, everything past the rank is dependent too
+        assert drops == dependent.tolist()
+
+    refactored = np.nan
+    if refactor:
+        gc.collect()
+        tstart = time()
+        refactoring_drops(X.values)
+        refactored = time() - tstart
+
+    return single_pass, refactored
+
+
+if __name__ == '__main__':
+    n_samples = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    random_state = np.random.RandomState(42)
+
+    print('n_samples=%i' % n_samples)
+    print('%12s %14s %14s' % ('n_features', 'single pass', 'refactoring'))
+    for n_features in (100, 250, 500, 1000, 2000):
+        single_pass, refactored = bench(n_samples, n_features, n_features <= 500, random_state)
+        print('%12i %13.3fs %14s' % (n_features, single_pass,
+                                     '-' if np.isnan(refactored) else '%.3fs' % refactored))
@@ -0,0 +1,69 @@
+"""
+Benchmark the ``SelectivePCA`` solvers on a wide frame (2,000 selected
+columns, 50 components): the full (LAPACK) SVD against the randomized SVD,
+in both float64 and float32. Reports the fit time and the peak memory
+allocated during the fit (when ``tracemalloc`` is available, i.e., on
+Python 3), as well as the fraction of the variance explained by the
+components of each solver relative to that of the full solver.
+"""
+from __future__ import print_function, division
+import gc
+import sys
+from time import time
+
+import numpy as np
+import pandas as pd
+
+from skutil.decomposition import SelectivePCA
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def make_frame(n_samples, n_features, n_passthrough, random_state):
+    # a low-rank signal plus noise, so the leading components are meaningful
+    signal = random_state.randn(n_samples, 100).dot(random_state.randn(100, n_features))
+    x = signal + random_state.randn(n_samples, n_features)
+
+    X = pd.DataFrame.from_records(data=x, columns=['x%i' % i for i in range(n_features)])
+    for i in range(n_passthrough):
+        X['other%i' % i] = random_state.randint(0, 10, n_samples)
+    return X, X.columns[:n_features].tolist()
+
+
+def bench(X, cols, n_components, svd_solver, dtype):
+    pca = SelectivePCA(cols=cols, n_components=n_components, svd_solver=svd_solver,
+                       random_state=42, dtype=dtype)
+
+    gc.collect()
+    if tracemalloc is not None:
+        tracemalloc.start()
+
+    tstart = time()
+    pca.fit(X)
+    elapsed = time() - tstart
+
+    peak = np.nan
+    if tracemalloc is not None:
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+
+    return elapsed, peak, pca.pca_.explained_variance_ratio_.sum()
+
+
+if __name__ == '__main__':
+    n_samples = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    n_features, n_components = 2000, 50
+    random_state = np.random.RandomState(42)
+    X, cols = make_frame(n_samples, n_features, 10, random_state)
+
+    print('n_samples=%i, n_features=%i, n_components=%i' % (n_samples, n_features, n_components))
+    print('%12s %8s %10s %12s %10s' % ('svd_solver', 'dtype', 'fit', 'peak mem', 'variance'))
+
+    full_var = None
+    for svd_solver, dtype in (('full', np.float64), ('randomized', np.float64), ('randomized', np.float32)):
+        elapsed, peak, var = bench(X, cols, n_components, svd_solver, dtype)
+        full_var = var if full_var is None else full_var
+        print('%12s %8s %9.3fs %10.1fMB %10.4f' % (svd_solver, np.dtype(dtype).name, elapsed, peak, var / full_var))
@@ -0,0 +1,44 @@
+"""
+Benchmark the two ``QRDecomposition`` engines: the unblocked LINPACK
+``dqrdc`` (plus the SVD used to compute its rank) against the blocked
+LAPACK ``dgeqp3`` (with the rank taken from the diagonal of R), both for
+the decomposition itself and for ``get_coef`` on a block of right-hand sides.
+"""
+from __future__ import print_function, division
+import gc
+import sys
+from time import time
+
+import numpy as np
+
+from skutil.odr import QRDecomposition
+
+
+def bench(X, Y, engine):
+    gc.collect()
+    tstart = time()
+    q = QRDecomposition(X, engine=engine)
+    decompose = time() - tstart
+
+    tstart = time()
+    q.get_coef(Y)
+    coef = time() - tstart
+
+    return decompose, coef, q.get_rank()
+
+
+if __name__ == '__main__':
+    n_samples = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    n_targets = 50
+    random_state = np.random.RandomState(42)
+
+    print('n_samples=%i, n_targets=%i' % (n_samples, n_targets))
+    print('%12s %8s %12s %12s %6s' % ('n_features', 'engine', 'decompose', 'get_coef', 'rank'))
+    for n_features in (50, 100, 250, 500, 1000):
+        X = random_state.rand(n_samples, n_features)
+        X[:, -1] = X[:, 0] - X[:, 1]  # rank deficient
+        Y = random_state.rand(n_samples, n_targets)
+
+        for engine in ('linpack', 'lapack'):
+            decompose, coef, rank = bench(X, Y, engine)
+            print('%12i %8s %11.3fs %11.3fs %6i' % (n_features, engine, decompose, coef, rank))
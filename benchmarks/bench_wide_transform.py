@@ -0,0 +1,44 @@
+"""
+Benchmark the latency of ``transform`` for the selective transformers on
+increasingly wide frames with few rows (as when scoring), where the cost
+is dominated by resolving the selected and passthrough columns rather
+than by the transformation itself. Half of the columns are selected.
+"""
+from __future__ import print_function, division
+import gc
+import sys
+from time import time
+
+import numpy as np
+import pandas as pd
+
+from skutil.decomposition import SelectivePCA
+from skutil.preprocessing import SelectiveScaler, SpatialSignTransformer
+
+
+def bench(transformer, X, n_iter=5):
+    transformer.fit(X)
+    gc.collect()
+
+    tstart = time()
+    for _ in range(n_iter):
+        transformer.transform(X)
+    return (time() - tstart) / n_iter
+
+
+if __name__ == '__main__':
+    n_samples = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    random_state = np.random.RandomState(42)
+
+    print('n_samples=%i' % n_samples)
+    print('%12s %12s %12s %12s' % ('n_features', 'pca', 'scaler', 'spatial'))
+    for n_features in (1000, 5000, 20000):
+        X = pd.DataFrame(random_state.rand(n_samples, n_features),
+                         columns=['x%i' % i for i in range(n_features)])
+        cols = X.columns[::2].tolist()
+
+        times = [bench(transformer, X) for transformer in (
+            SelectivePCA(cols=cols, n_components=min(n_samples, 5)),
+            SelectiveScaler(cols=cols),
+            SpatialSignTransformer(cols=cols))]
+        print('%12i %11.4fs %11.4fs %11.4fs' % tuple([n_features] + times))
@@ -0,0 +1,102 @@
+"""
+Synthetic data and the shared base class for the asv benchmark suites.
+"""
+from __future__ import division
+import numpy as np
+import pandas as pd
+
+__all__ = [
+    'make_frame',
+    'make_target'
+]
+
+# the default grid: (n_rows, n_cols, dtype)
+_ROWS = [1000, 10000]
+_COLS = [10, 50]
+_DTYPES = ['float64', 'float32']
+
+
+def make_frame(n_rows, n_cols, dtype='float64', random_state=42, positive=False,
+               missing=None, collinear=False):
+    """Generate a synthetic frame of random normal data.
+
+    Parameters
+    ----------
+
+    n_rows : int
+        The number of rows.
+
+    n_cols : int
+        The number of columns, named x0, x1, ...
+
+    dtype : str, optional (default='float64')
+        The dtype of the columns.
+
+    random_state : int, optional (default=42)
+        The seed.
+
+    positive : bool, optional (default=False)
+        Whether to shift the data to be strictly positive (i.e., for
+        the Box-Cox transformation).
+
+    missing : float, optional (default=None)
+        The fraction of values to set to NaN, if any.
+
+    collinear : bool, optional (default=False)
+        Whether every fifth column should be a noisy linear function
+        of its neighbour, and the last column an exact linear combination
+        of the first two (for the feature selectors).
+    """
+    rs = np.random.RandomState(random_state)
+    X = rs.randn(n_rows, n_cols)
+
+    if collinear:
+        for j in range(1, n_cols, 5):
+            X[:, j] = 2 * X[:, j - 1] + 0.01 * rs.randn(n_rows)
+        X[:, -1] = X[:, 0] - X[:, 2]
+    if positive:
+        X = np.abs(X) + 1e-3
+    if missing:
+        X[rs.rand(n_rows, n_cols) < missing] = np.nan
+
+    return pd.DataFrame.from_records(data=X.astype(dtype),
+                                     columns=['x%i' % i for i in range(n_cols)])
+
+
+def make_target(n_rows, minority=0.1, random_state=42):
+    """Generate an imbalanced binary target"""
+    rs = np.random.RandomState(random_state)
+    return (rs.rand(n_rows) < minority).astype(np.int64)
+
+
+class _TransformerSuite(object):
+    """Times ``fit`` and ``transform`` (and measures their peak memory)
+    for the transformer returned by ``make_transformer``, over a grid of
+    rows, columns and dtypes. Subclasses define ``make_transformer`` and,
+    optionally, ``make_data``.
+    """
+    params = [_ROWS, _COLS, _DTYPES]
+    param_names = ['n_rows', 'n_cols', 'dtype']
+    timeout = 300
+
+    def make_transformer(self):
+        raise NotImplementedError('this must be implemented by a subclass')
+
+    def make_data(self, n_rows, n_cols, dtype):
+        return make_frame(n_rows, n_cols, dtype)
+
+    def setup(self, *params):
+        self.X = self.make_data(*params)
+        self.fitted = self.make_transformer().fit(self.X)
+
+    def time_fit(self, *params):
+        self.make_transformer().fit(self.X)
+
+    def time_transform(self, *params):
+        self.fitted.transform(self.X)
+
+    def peakmem_fit(self, *params):
+        self.make_transformer().fit(self.X)
+
+    def peakmem_transform(self, *params):
+        self.fitted.transform(self.X)
@@ -0,0 +1,15 @@
+"""
+Benchmarks for the selective decomposers in ``skutil.decomposition``.
+"""
+from skutil.decomposition import SelectivePCA, SelectiveTruncatedSVD
+from .common import _TransformerSuite
+
+
+class SelectivePCASuite(_TransformerSuite):
+    def make_transformer(self):
+        return SelectivePCA(n_components=5)
+
+
+class SelectiveTruncatedSVDSuite(_TransformerSuite):
+    def make_transformer(self):
+        return SelectiveTruncatedSVD(n_components=5)
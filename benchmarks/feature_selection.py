@@ -0,0 +1,52 @@
+"""
+Benchmarks for the feature selectors in ``skutil.feature_selection``.
+The data have groups of highly correlated columns and an exact linear
+combination, so the selectors have something to drop.
+"""
+from skutil.feature_selection import (FeatureDropper, FeatureRetainer, FeatureScreener,
+                                      LinearCombinationFilterer, MulticollinearityFilterer,
+                                      NearZeroVarianceFilterer, SparseFeatureDropper)
+from .common import _TransformerSuite, make_frame
+
+
+class _SelectorSuite(_TransformerSuite):
+    def make_data(self, n_rows, n_cols, dtype):
+        return make_frame(n_rows, n_cols, dtype, collinear=True)
+
+
+class FeatureDropperSuite(_SelectorSuite):
+    def make_transformer(self):
+        return FeatureDropper(cols=['x0', 'x1', 'x2'])
+
+
+class FeatureRetainerSuite(_SelectorSuite):
+    def make_transformer(self):
+        return FeatureRetainer(cols=['x0', 'x1', 'x2'])
+
+
+class MulticollinearityFiltererSuite(_SelectorSuite):
+    def make_transformer(self):
+        return MulticollinearityFilterer(threshold=0.85)
+
+
+class NearZeroVarianceFiltererSuite(_SelectorSuite):
+    def make_transformer(self):
+        return NearZeroVarianceFilterer()
+
+
+class SparseFeatureDropperSuite(_SelectorSuite):
+    def make_transformer(self):
+        return SparseFeatureDropper(threshold=0.5)
+
+    def make_data(self, n_rows, n_cols, dtype):
+        return make_frame(n_rows, n_cols, dtype, missing=0.1)
+
+
+class LinearCombinationFiltererSuite(_SelectorSuite):
+    def make_transformer(self):
+        return LinearCombinationFilterer()
+
+
+class FeatureScreenerSuite(_SelectorSuite):
+    def make_transformer(self):
+        return FeatureScreener()
@@ -0,0 +1,22 @@
+"""
+Benchmarks for the kernels in ``skutil.metrics``. Each kernel
+computes the (n_rows, n_rows) Gram matrix of the data.
+"""
+from skutil.metrics import kernel
+from .common import _DTYPES, make_frame
+
+
+class KernelSuite(object):
+    params = [kernel.__all__, [250, 1000], [10, 50], _DTYPES]
+    param_names = ['kernel', 'n_rows', 'n_cols', 'dtype']
+    timeout = 300
+
+    def setup(self, name, n_rows, n_cols, dtype):
+        self.kernel = getattr(kernel, name)
+        self.X = make_frame(n_rows, n_cols, dtype).values
+
+    def time_kernel(self, *params):
+        self.kernel(self.X)
+
+    def peakmem_kernel(self, *params):
+        self.kernel(self.X)
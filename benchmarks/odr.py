@@ -0,0 +1,46 @@
+"""
+Benchmarks for the QR decompositions in ``skutil.odr``, both for the
+decomposition itself and for ``get_coef`` on a single right-hand side.
+"""
+import numpy as np
+
+from skutil.odr import QRDecomposition, TSQRDecomposition
+from .common import _DTYPES, make_frame
+
+
+class QRDecompositionSuite(object):
+    params = [['linpack', 'lapack'], [1000, 10000], [10, 50, 250], _DTYPES]
+    param_names = ['engine', 'n_rows', 'n_cols', 'dtype']
+    timeout = 300
+
+    def setup(self, engine, n_rows, n_cols, dtype):
+        self.X = make_frame(n_rows, n_cols, dtype, collinear=True).values
+        self.y = np.random.RandomState(42).randn(n_rows)
+        self.qr = QRDecomposition(self.X, engine=engine)
+
+    def time_decompose(self, engine, *params):
+        QRDecomposition(self.X, engine=engine)
+
+    def peakmem_decompose(self, engine, *params):
+        QRDecomposition(self.X, engine=engine)
+
+    def time_get_coef(self, *params):
+        self.qr.get_coef(self.y)
+
+
+class TSQRDecompositionSuite(object):
+    """The matrix (with a trailing right-hand side) is
+    streamed in chunks of 1000 rows."""
+    params = [[1000, 10000], [10, 50, 250]]
+    param_names = ['n_rows', 'n_cols']
+    timeout = 300
+
+    def setup(self, n_rows, n_cols):
+        X = make_frame(n_rows, n_cols + 1, collinear=True).values
+        self.chunks = [X[i:i + 1000] for i in range(0, n_rows, 1000)]
+
+    def time_decompose(self, *params):
+        TSQRDecomposition(self.chunks, n_targets=1).get_coef()
+
+    def peakmem_decompose(self, *params):
+        TSQRDecomposition(self.chunks, n_targets=1).get_coef()
@@ -0,0 +1,111 @@
+"""
+Benchmarks for the transformers, imputers, encoder
+and class balancers in ``skutil.preprocessing``.
+"""
+from __future__ import division
+import numpy as np
+import pandas as pd
+
+from skutil.preprocessing import (BaggedImputer, BoxCoxTransformer, FunctionMapper,
+                                  InteractionTermTransformer, OneHotCategoricalEncoder,
+                                  OversamplingClassBalancer, SelectiveImputer,
+                                  SelectiveScaler, SMOTEClassBalancer, SpatialSignTransformer,
+                                  UndersamplingClassBalancer, YeoJohnsonTransformer)
+from .common import _TransformerSuite, _ROWS, _COLS, _DTYPES, make_frame, make_target
+
+
+class BoxCoxSuite(_TransformerSuite):
+    def make_transformer(self):
+        return BoxCoxTransformer()
+
+    def make_data(self, n_rows, n_cols, dtype):
+        return make_frame(n_rows, n_cols, dtype, positive=True)
+
+
+class YeoJohnsonSuite(_TransformerSuite):
+    # the lambda search is much more expensive than Box-Cox's
+    params = [[1000, 5000], _COLS, _DTYPES]
+
+    def make_transformer(self):
+        return YeoJohnsonTransformer()
+
+
+class ScalerSuite(_TransformerSuite):
+    def make_transformer(self):
+        return SelectiveScaler()
+
+
+class SpatialSignSuite(_TransformerSuite):
+    def make_transformer(self):
+        return SpatialSignTransformer()
+
+
+class FunctionMapperSuite(_TransformerSuite):
+    def make_transformer(self):
+        return FunctionMapper(fun=np.log1p)
+
+    def make_data(self, n_rows, n_cols, dtype):
+        return make_frame(n_rows, n_cols, dtype, positive=True)
+
+
+class InteractionTermSuite(_TransformerSuite):
+    def make_transformer(self):
+        return InteractionTermTransformer()
+
+
+class SelectiveImputerSuite(_TransformerSuite):
+    def make_transformer(self):
+        return SelectiveImputer()
+
+    def make_data(self, n_rows, n_cols, dtype):
+        return make_frame(n_rows, n_cols, dtype, missing=0.05)
+
+
+class BaggedImputerSuite(_TransformerSuite):
+    # fits a bagged ensemble per column with missing values
+    params = [[1000, 5000], [10, 25], _DTYPES]
+
+    def make_transformer(self):
+        return BaggedImputer(n_estimators=5, random_state=42)
+
+    def make_data(self, n_rows, n_cols, dtype):
+        return make_frame(n_rows, n_cols, dtype, missing=0.05)
+
+
+class OneHotCategoricalEncoderSuite(_TransformerSuite):
+    params = [_ROWS, _COLS, [5, 50]]
+    param_names = ['n_rows', 'n_cols', 'n_levels']
+
+    def make_transformer(self):
+        return OneHotCategoricalEncoder()
+
+    def make_data(self, n_rows, n_cols, n_levels):
+        rs = np.random.RandomState(42)
+        levels = np.array(['level%i' % i for i in range(n_levels)], dtype=object)
+        X = levels[rs.randint(0, n_levels, (n_rows, n_cols))]
+        X[rs.rand(n_rows, n_cols) < 0.01] = None
+        return pd.DataFrame.from_records(data=X, columns=['x%i' % i for i in range(n_cols)])
+
+
+class BalancerSuite(object):
+    """Times ``balance`` (which has no separate fit)
+    for each of the class balancers."""
+    params = [['oversample', 'undersample', 'smote'], _ROWS, _COLS, _DTYPES]
+    param_names = ['balancer', 'n_rows', 'n_cols', 'dtype']
+    timeout = 300
+
+    def setup(self, balancer, n_rows, n_cols, dtype):
+        X = make_frame(n_rows, n_cols, dtype)
+        X['y'] = make_target(n_rows)
+        self.X = X
+        self.balancer = {
+            'oversample': OversamplingClassBalancer(y='y'),
+            'undersample': UndersamplingClassBalancer(y='y'),
+            'smote': SMOTEClassBalancer(y='y')
+        }[balancer]
+
+    def time_balance(self, *params):
+        self.balancer.balance(self.X)
+
+    def peakmem_balance(self, *params):
+        self.balancer.balance(self.X)
@@ -27,6 +27,7 @@ else:
         'metrics',
         'model_selection',
         'odr',
+        'pipeline',
         'preprocessing',
         'testing',
         'utils'
@@ -4,14 +4,20 @@ from __future__ import print_function, division, absolute_import
 from abc import ABCMeta, abstractmethod
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 from sklearn.base import BaseEstimator, TransformerMixin
-from sklearn.decomposition import PCA, TruncatedSVD
+from sklearn.decomposition import PCA, IncrementalPCA, TruncatedSVD
 from sklearn.utils.validation import check_is_fitted
 from sklearn.externals import six
 from skutil.base import *
 from skutil.base import overrides
 from ..utils import *
-from ..utils.fixes import _cols_if_none, _as_numpy
+from ..utils.fixes import (_as_numpy, _is_sparse_column,
+                           _sparse_columns_to_csr, _csr_to_sparse_frame, SK18)
+from ..utils.util import (_assemble_frame, _def_headers, _val_cols, _ColumnIndexer,
+                          _column_indexer, _take_columns)
+from ..utils._stream import _chunk_source
+from ..utils.profiling import profiled
 
 __all__ = [
     'SelectivePCA',
@@ -19,6 +25,50 @@ __all__ = [
 ]
 
 
+def _selected_matrix(X, positions, dtype):
+    """Extract the columns of a frame at the selected positions into
+    a single matrix of the given dtype. Unlike ``X[cols].as_matrix()``, this
+    does not first build the (possibly float64 or object) common-type
+    block of the selected columns; each column is cast directly into
+    a preallocated (Fortran-ordered) matrix."""
+    out = np.empty((X.shape[0], len(positions)), dtype=dtype, order='F')
+    for j, col in enumerate(_take_columns(X, positions)):
+        out[:, j] = col
+    return out
+
+
+def _selected_csr_or_matrix(X, positions):
+    """Extract the columns of a frame at the selected positions as
+    a CSR matrix if any of them are sparse, else as a dense matrix."""
+    X = X.take(positions, axis=1)
+    if any(_is_sparse_column(X.iloc[:, j]) for j in range(X.shape[1])):
+        return _sparse_columns_to_csr(X, X.columns.tolist())
+    return X.as_matrix()
+
+
+def _split_sparse_matrix(X, cols):
+    """Split a ``scipy.sparse`` matrix into the (CSR) matrix of the
+    selected columns and the (CSC) matrix of the others, along with
+    the names of the others. As with ``validate_is_pd``, the columns
+    of the matrix take the default names ('V1', 'V2', ...)."""
+    if cols is None:
+        return X.tocsr(), None, []
+
+    names = _def_headers(X)
+    positions = dict((nm, i) for i, nm in enumerate(names))
+    missing = [c for c in cols if c not in positions]
+    if missing:
+        raise ValueError('%s not in the column names of the sparse matrix (V1, ..., V%i)'
+                         % (str(missing), len(names)))
+
+    selected = [positions[c] for c in cols]
+    selected_set = set(selected)
+    others = [i for i in range(len(names)) if i not in selected_set]
+
+    X = X.tocsc()
+    return X[:, selected].tocsr(), X[:, others], [names[i] for i in others]
+
+
 class _BaseSelectiveDecomposer(six.with_metaclass(ABCMeta, BaseSkutil, TransformerMixin)):
     """Base class for selective decompositional transformers.
     Each of these transformers should adhere to the :class:`skutil.base.SelectiveMixin`
@@ -112,6 +162,10 @@ class SelectivePCA(_BaseSelectiveDecomposer):
 
         * ``n_components`` cannot be equal to ``n_features`` for ``svd_solver`` == 'arpack'.
 
+        When fitting incrementally (``partial_fit`` or ``fit_chunks``), only
+        None or an int are supported, and each chunk must contain at
+        least ``n_components`` rows.
+
     as_df : bool, optional (default=True)
         Whether to return a Pandas ``DataFrame`` in the ``transform``
         method. If False, will return a Numpy ``ndarray`` instead. 
@@ -136,6 +190,34 @@ class SelectivePCA(_BaseSelectiveDecomposer):
         (so as not to down sample or upsample everything), then multiply the weights across the
         transformed features.
 
+    svd_solver : string {'auto', 'full', 'arpack', 'randomized'}, optional (default='auto')
+        The solver used by ``sklearn.decomposition.PCA``. For a large number of
+        selected columns and comparatively few components, 'randomized' (the
+        randomized SVD of Halko et al. [1]) is much faster than 'full'. Requires
+        sklearn >= 0.18 (as do non-default values of ``n_iter`` and ``random_state``);
+        with older versions, these raise a ``ValueError``.
+
+    n_iter : int or 'auto', optional (default='auto')
+        The number of power iterations for the 'randomized' solver
+        (``iterated_power`` in ``sklearn.decomposition.PCA``).
+
+    n_oversamples : int, optional (default=10)
+        The number of additional random vectors sampled by the 'randomized'
+        solver, beyond ``n_components``. Values other than the default
+        require a version of scikit-learn whose ``PCA`` accepts ``n_oversamples``.
+
+    random_state : int, RandomState instance or None, optional (default=None)
+        The seed of the pseudo random number generator used by the
+        'arpack' and 'randomized' solvers.
+
+    dtype : numpy dtype, optional (default=np.float64)
+        The dtype of the matrix of selected columns that is decomposed and
+        transformed. Each selected column is cast directly into this dtype
+        (so mixed frames are not upcast to a common type first). Note that
+        ``sklearn.decomposition.PCA`` in sklearn 0.17 and 0.18 casts its input
+        to float64 regardless, so ``np.float32`` does not reduce the memory
+        footprint of the decomposition with those versions.
+
     
     Examples
     --------
@@ -151,14 +233,33 @@ class SelectivePCA(_BaseSelectiveDecomposer):
     Attributes
     ----------
 
-    pca_ : the PCA object
+    pca_ : the PCA object (an ``sklearn.decomposition.IncrementalPCA``
+        if fit via ``partial_fit`` or ``fit_chunks``, in which case the
+        ``svd_solver``, ``n_iter``, ``n_oversamples`` and ``random_state``
+        parameters are not used)
+
+
+    References
+    ----------
+
+    .. [1] Halko, N., Martinsson, P. G. & Tropp, J. A. "Finding structure with
+           randomness: Probabilistic algorithms for constructing approximate
+           matrix decompositions" (2011). SIAM Review, 53(2), 217-288.
     """
 
-    def __init__(self, cols=None, n_components=None, whiten=False, weight=False, as_df=True):
+    def __init__(self, cols=None, n_components=None, whiten=False, weight=False, as_df=True,
+                 svd_solver='auto', n_iter='auto', n_oversamples=10, random_state=None,
+                 dtype=np.float64):
         super(SelectivePCA, self).__init__(cols=cols, n_components=n_components, as_df=as_df)
         self.whiten = whiten
         self.weight = weight
+        self.svd_solver = svd_solver
+        self.n_iter = n_iter
+        self.n_oversamples = n_oversamples
+        self.random_state = random_state
+        self.dtype = dtype
 
+    @profiled
     def fit(self, X, y=None):
         """Fit the transformer.
 
@@ -181,16 +282,117 @@ class SelectivePCA(_BaseSelectiveDecomposer):
         self
         """
         # check on state of X and cols
-        X, self.cols = validate_is_pd(X, self.cols)
-        cols = _cols_if_none(X, self.cols)
+        X, self.cols = validate_is_pd(X, self.cols, copy=False)
+        self._col_indexer = _ColumnIndexer(X.columns, self.cols)
+
+        # the solver parameters are only PCA parameters as of sklearn 0.18,
+        # so they're only passed when they differ from their defaults
+        kwargs = {}
+        for param, value, default in (('svd_solver', self.svd_solver, 'auto'),
+                                      ('iterated_power', self.n_iter, 'auto'),
+                                      ('random_state', self.random_state, None)):
+            if value == default:
+                continue
+            if not SK18:
+                raise ValueError('%s=%r requires sklearn >= 0.18' % (param, value))
+            kwargs[param] = value
+
+        # n_oversamples is only a PCA parameter in newer versions of sklearn
+        if self.n_oversamples != 10:
+            if 'n_oversamples' not in PCA().get_params():
+                raise ValueError('this version of sklearn does not support n_oversamples')
+            kwargs['n_oversamples'] = self.n_oversamples
 
         # fails thru if names don't exist:
         self.pca_ = PCA(
             n_components=self.n_components,
-            whiten=self.whiten).fit(X[cols].as_matrix())
+            whiten=self.whiten,
+            **kwargs).fit(_selected_matrix(X, self._col_indexer.positions, self.dtype))
+
+        return self
+
+    @profiled
+    def partial_fit(self, X, y=None):
+        """Incrementally fit the transformer on a batch of rows, using
+        an incremental SVD (``sklearn.decomposition.IncrementalPCA``) so
+        that only the batch (and not all of the data) must be held in
+        memory. Successive calls update the fit components; a call to
+        ``fit`` will discard them.
+
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+            A batch of rows of the Pandas frame to fit. The batch will
+            only be fit on the prescribed ``cols`` (see ``__init__``) or
+            all of them if ``cols`` is None, and must contain at least
+            ``n_components`` rows. ``X`` will not be altered in the
+            process of the fit.
+
+        y : None
+            Passthrough for ``sklearn.pipeline.Pipeline``. Even
+            if explicitly set, will not change behavior of ``partial_fit``.
+
+        Returns
+        -------
+
+        self
+        """
+        # no need to copy X, since only the selected columns are read
+        X, self.cols = validate_is_pd(X, self.cols, copy=False)
+        self._col_indexer = _column_indexer(getattr(self, '_col_indexer', None), X, self.cols)
 
+        if not isinstance(self.get_decomposition(), IncrementalPCA):
+            n_components = self.n_components
+            if n_components is not None and not isinstance(n_components, (int, np.integer)):
+                raise ValueError('incremental fits require n_components to be None '
+                                 'or an int, but got %r' % n_components)
+
+            self.pca_ = IncrementalPCA(
+                n_components=n_components,
+                whiten=self.whiten)
+
+        # fails thru if names don't exist:
+        self.pca_.partial_fit(_selected_matrix(X, self._col_indexer.positions, self.dtype))
         return self
 
+    @profiled
+    def fit_chunks(self, chunks, y=None):
+        """Fit the transformer on data too large to hold in memory, by
+        calling ``partial_fit`` on each of an iterable of row-chunks of the
+        frame in turn. Any previously fit components are discarded.
+
+        Parameters
+        ----------
+
+        chunks : iterable or callable
+            An iterable of row-chunks of the frame (each a Pandas ``DataFrame``
+            with the same columns, shape=(n_chunk_samples, n_features)), such
+            as the ``TextFileReader`` returned by ``pd.read_csv(path, chunksize=n)``,
+            or a callable that returns a new such iterator when called. Chunks
+            with no rows are skipped.
+
+        y : None
+            Passthrough for ``sklearn.pipeline.Pipeline``. Even
+            if explicitly set, will not change behavior of ``fit_chunks``.
+
+        Returns
+        -------
+
+        self
+        """
+        if hasattr(self, 'pca_'):
+            del self.pca_
+
+        for chunk in _chunk_source(chunks)():
+            if chunk.shape[0]:
+                self.partial_fit(chunk)
+
+        if not hasattr(self, 'pca_'):
+            raise ValueError('no rows in the data')
+        return self
+
+    @profiled
     def transform(self, X):
         """Transform a test matrix given the already-fit transformer.
 
@@ -211,47 +413,48 @@ class SelectivePCA(_BaseSelectiveDecomposer):
             and the result set is returned.
         """
         check_is_fitted(self, 'pca_')
-        # check on state of X and cols
-        X, _ = validate_is_pd(X, self.cols)
-        cols = _cols_if_none(X, self.cols)
-
-        other_nms = [nm for nm in X.columns if nm not in cols]
-        transform = self.pca_.transform(X[cols].as_matrix())
+        # check on state of X and cols (X is only read, so needn't be copied)
+        X, _ = validate_is_pd(X, self.cols, copy=False)
+        # the positions of the columns, as cached at fit if X has the same schema
+        indexer = _column_indexer(getattr(self, '_col_indexer', None), X, self.cols)
+        transform = self.pca_.transform(_selected_matrix(X, indexer.positions, self.dtype))
 
         # do weighting if necessary
         if self.weight:
-            # get the weight vals
-            weights = self.pca_.explained_variance_ratio_
+            # get the weight vals (copied, so as not to alter the fit PCA)
+            weights = self.pca_.explained_variance_ratio_.copy()
             weights -= np.median(weights)
             weights += 1
 
             # now add to the transformed features
             transform *= weights
 
-        left = pd.DataFrame.from_records(data=transform,
-                                         columns=[('PC%i' % (i + 1)) for i in range(transform.shape[1])])
-
-        # concat if needed
-        x = pd.concat([left, X[other_nms]], axis=1) if other_nms else left
-        return x if self.as_df else x.as_matrix()
+        # place the components, then the untouched columns
+        names = [('PC%i' % (i + 1)) for i in range(transform.shape[1])]
+        return _assemble_frame([(names, transform),
+                                (indexer.other_names, _take_columns(X, indexer.others))],
+                               X.index, self.as_df)
 
     @overrides(_BaseSelectiveDecomposer)
     def get_decomposition(self):
         """Overridden from the :class:``skutil.decomposition.decompose._BaseSelectiveDecomposer`` class,
         this method returns the internal decomposition class: 
-        ``sklearn.decomposition.PCA``
+        ``sklearn.decomposition.PCA`` (or ``sklearn.decomposition.IncrementalPCA``
+        if fit via ``partial_fit`` or ``fit_chunks``)
 
         Returns
         -------
-        self.pca_ : ``sklearn.decomposition.PCA``
+        self.pca_ : ``sklearn.decomposition.PCA`` or ``sklearn.decomposition.IncrementalPCA``
             The fit internal decomposition class
         """
         return self.pca_ if hasattr(self, 'pca_') else None
 
+    @profiled
     def score(self, X, y=None):
         """Return the average log-likelihood of all samples.
         This calls sklearn.decomposition.PCA's score method
-        on the specified columns [1].
+        on the specified columns [1]. Only available if the
+        transformer was fit via ``fit`` (rather than incrementally).
 
         Parameters
         ----------
@@ -278,10 +481,10 @@ class SelectivePCA(_BaseSelectiveDecomposer):
                12.2.1 p. 574 http://www.miketipping.com/papers/met-mppca.pdf
         """
         check_is_fitted(self, 'pca_')
-        X, _ = validate_is_pd(X, self.cols)
-        cols = X.columns if not self.cols else self.cols
+        X, _ = validate_is_pd(X, self.cols, copy=False)
+        indexer = _column_indexer(getattr(self, '_col_indexer', None), X, self.cols)
 
-        ll = self.pca_.score(X[cols].as_matrix(), _as_numpy(y))
+        ll = self.pca_.score(_selected_matrix(X, indexer.positions, self.dtype), _as_numpy(y))
         return ll
 
 
@@ -292,6 +495,12 @@ class SelectiveTruncatedSVD(_BaseSelectiveDecomposer):
     decomposed. TruncatedSVD is the equivalent of Latent Semantic Analysis,
     and returns the "concept space" of the decomposed features.
 
+    If any of the selected columns are sparse (i.e., ``SparseSeries`` or
+    ``SparseDtype`` columns), or if ``X`` is a ``scipy.sparse`` matrix (whose
+    columns take the default names: 'V1', 'V2', ...), the selected columns
+    are decomposed as a ``scipy.sparse`` CSR matrix rather than being densified,
+    and the other columns are passed through without being densified either.
+
     Parameters
     ----------
 
@@ -320,9 +529,11 @@ class SelectiveTruncatedSVD(_BaseSelectiveDecomposer):
 
     as_df : bool, optional (default=True)
         Whether to return a Pandas ``DataFrame`` in the ``transform``
-        method. If False, will return a Numpy ``ndarray`` instead. 
-        Since most skutil transformers depend on explicitly-named
-        ``DataFrame`` features, the ``as_df`` parameter is True by default.
+        method. If False, will return a Numpy ``ndarray`` instead
+        (or, if the selected columns are sparse and there are other
+        columns, a ``scipy.sparse`` CSR matrix). Since most skutil
+        transformers depend on explicitly-named ``DataFrame`` features,
+        the ``as_df`` parameter is True by default.
 
 
     Examples
@@ -348,13 +559,14 @@ class SelectiveTruncatedSVD(_BaseSelectiveDecomposer):
         self.algorithm = algorithm
         self.n_iter = n_iter
 
+    @profiled
     def fit(self, X, y=None):
         """Fit the transformer.
 
         Parameters
         ----------
 
-        X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+        X : Pandas ``DataFrame`` or ``scipy.sparse`` matrix, shape=(n_samples, n_features)
             The Pandas frame to fit. The frame will only
             be fit on the prescribed ``cols`` (see ``__init__``) or
             all of them if ``cols`` is None. Furthermore, ``X`` will
@@ -369,25 +581,31 @@ class SelectiveTruncatedSVD(_BaseSelectiveDecomposer):
 
         self
         """
-        # check on state of X and cols
-        X, self.cols = validate_is_pd(X, self.cols)
-        cols = _cols_if_none(X, self.cols)
+        # check on state of X and cols (no need to copy X, since it's only read)
+        if sp.issparse(X):
+            self.cols = _val_cols(self.cols)
+            selected, _, _ = _split_sparse_matrix(X, self.cols)
+        else:
+            X, self.cols = validate_is_pd(X, self.cols, copy=False)
+            self._col_indexer = _ColumnIndexer(X.columns, self.cols)
+            selected = _selected_csr_or_matrix(X, self._col_indexer.positions)
 
         # fails thru if names don't exist:
         self.svd_ = TruncatedSVD(
             n_components=self.n_components,
             algorithm=self.algorithm,
-            n_iter=self.n_iter).fit(X[cols].as_matrix())
+            n_iter=self.n_iter).fit(selected)
 
         return self
 
+    @profiled
     def transform(self, X):
         """Transform a test matrix given the already-fit transformer.
 
         Parameters
         ----------
 
-        X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+        X : Pandas ``DataFrame`` or ``scipy.sparse`` matrix, shape=(n_samples, n_features)
             The Pandas frame to transform. The operation will
             be applied to a copy of the input data, and the result
             will be returned.
@@ -402,21 +620,30 @@ class SelectiveTruncatedSVD(_BaseSelectiveDecomposer):
         """
         check_is_fitted(self, 'svd_')
         # check on state of X and cols
-        X, _ = validate_is_pd(X, self.cols)
-        cols = _cols_if_none(X, self.cols)
-
-        other_nms = [nm for nm in X.columns if nm not in cols]
-        transform = self.svd_.transform(X[cols].as_matrix())
-        left = pd.DataFrame.from_records(data=transform,
-                                         columns=[
-                                            ('Concept%i' % (i + 1)) 
-                                            for i in range(transform.shape[1])
-                                         ])
-
-        # concat if needed
-        x = pd.concat([left, X[other_nms]], axis=1) if other_nms else left
-
-        return x if self.as_df else x.as_matrix()
+        if sp.issparse(X):
+            selected, others, other_nms = _split_sparse_matrix(X, self.cols)
+            index = pd.RangeIndex(X.shape[0])
+        else:
+            X, _ = validate_is_pd(X, self.cols, copy=False)
+            indexer = _column_indexer(getattr(self, '_col_indexer', None), X, self.cols)
+
+            other_nms, index = indexer.other_names, X.index
+            selected = _selected_csr_or_matrix(X, indexer.positions)
+            others = X if sp.issparse(selected) and not self.as_df else _take_columns(X, indexer.others)
+
+        transform = self.svd_.transform(selected)
+
+        # if the input is sparse, don't densify the other columns
+        if sp.issparse(selected) and other_nms and not self.as_df:
+            if not sp.issparse(others):
+                others = _sparse_columns_to_csr(others, other_nms)
+            return sp.hstack([sp.csr_matrix(transform), others], format='csr')
+        if sp.issparse(others):
+            others = _csr_to_sparse_frame(others, other_nms)
+
+        # place the concepts, then the untouched columns
+        names = [('Concept%i' % (i + 1)) for i in range(transform.shape[1])]
+        return _assemble_frame([(names, transform), (other_nms, others)], index, self.as_df)
 
     @overrides(_BaseSelectiveDecomposer)
     def get_decomposition(self):
@@ -1,10 +1,13 @@
 import numpy as np
+import pandas as pd
+import scipy.sparse as sp
 from numpy.testing import (assert_array_equal, assert_array_almost_equal)
-from sklearn.decomposition import PCA, TruncatedSVD
+from sklearn.decomposition import PCA, IncrementalPCA, TruncatedSVD
 from sklearn.datasets import load_iris
 from skutil.decomposition import *
 from skutil.testing import assert_fails
 from skutil.utils import load_iris_df
+from skutil.utils.fixes import SK18, _csr_to_sparse_frame
 from skutil.decomposition.decompose import _BaseSelectiveDecomposer
 
 # Def data for testing
@@ -40,6 +43,12 @@ def test_selective_pca():
     pca_arr = SelectivePCA(weight=False, n_components=0.99, as_df=False).fit_transform(iris.data)
     assert_fails(assert_array_equal, AssertionError, pca_df, pca_arr)
 
+    # integer cols select the columns of an ndarray by position
+    transformed = SelectivePCA(cols=[0, 2]).fit_transform(iris.data)
+    assert transformed.columns.tolist() == ['PC1', 'PC2', 'V2', 'V4']
+    assert_array_almost_equal(np.abs(transformed[['PC1', 'PC2']].values),
+                              np.abs(PCA().fit_transform(iris.data[:, [0, 2]])))
+
 
 def test_selective_tsvd():
     original = X
@@ -61,6 +70,73 @@ def test_selective_tsvd():
     assert isinstance(transformer.cols, list)
 
 
+def test_selective_tsvd_sparse():
+    rs = np.random.RandomState(42)
+    dense = sp.random(100, 30, density=0.1, format='csr', random_state=rs)
+    names = ['V%i' % (i + 1) for i in range(30)]
+    cols = names[:25]
+
+    # a frame with sparse term columns, and some dense passthrough columns
+    X_dense = pd.DataFrame(dense.toarray(), columns=names)
+    X_sparse = _csr_to_sparse_frame(dense[:, :25], cols)
+    for nm in names[25:]:
+        X_sparse[nm] = X_dense[nm].values
+
+    expected = SelectiveTruncatedSVD(cols=cols, n_components=3, algorithm='arpack').fit_transform(X_dense)
+    for X_in in (X_sparse, dense):
+        transformer = SelectiveTruncatedSVD(cols=cols, n_components=3, algorithm='arpack')
+        transformed = transformer.fit_transform(X_in)
+        assert transformed.columns.tolist() == expected.columns.tolist()
+        assert_array_almost_equal(np.abs(transformed[['Concept1', 'Concept2', 'Concept3']].values),
+                                  np.abs(expected[['Concept1', 'Concept2', 'Concept3']].values))
+        assert_array_almost_equal(np.asarray(transformed[names[25:]].values, dtype=float), X_dense[names[25:]].values)
+
+        # the other columns are not densified
+        arr = transformer.set_params(as_df=False).transform(X_in)
+        assert sp.issparse(arr)
+        assert arr.shape == (100, 8)
+        assert_array_almost_equal(arr.toarray()[:, 3:], X_dense[names[25:]].values)
+
+    # fails with bad names
+    assert_fails(SelectiveTruncatedSVD(cols=['a', 'b']).fit, ValueError, dense)
+
+
+def test_decomposers_preserve_index():
+    # a shuffled, non-default index used to misalign the passthrough columns
+    original = X.copy()
+    original.index = np.random.RandomState(42).permutation(original.shape[0]) + 1000
+    cols = ['sepal length (cm)', 'sepal width (cm)']
+
+    for transformer in (SelectivePCA(cols=cols, n_components=2),
+                        SelectiveTruncatedSVD(cols=cols, n_components=1)):
+        expected = transformer.fit_transform(X)
+        transformed = transformer.fit_transform(original)
+        assert transformed.index.tolist() == original.index.tolist()
+        assert transformed.shape == expected.shape
+        assert not transformed.isnull().any().any()
+        assert_array_almost_equal(transformed.values, expected.values)
+
+
+def test_decomposers_reordered_columns():
+    # columns are selected by the positions cached at fit, unless the schema changes
+    cols = ['petal width (cm)', 'sepal length (cm)']
+    reordered = X[X.columns[::-1]]
+
+    for transformer in (SelectivePCA(cols=cols, n_components=2),
+                        SelectiveTruncatedSVD(cols=cols, n_components=1)):
+        transformer.fit(X)
+        expected = transformer.transform(X)
+        transformed = transformer.transform(reordered)
+
+        assert transformed.columns.tolist()[-2:] == ['petal length (cm)', 'sepal width (cm)']
+        assert_array_almost_equal(transformed.values[:, :-2], expected.values[:, :-2])
+        assert_array_almost_equal(transformed[['sepal width (cm)', 'petal length (cm)']].values,
+                                  expected[['sepal width (cm)', 'petal length (cm)']].values)
+
+        # a missing selected column still fails
+        assert_fails(transformer.transform, KeyError, X.drop(cols[0], axis=1))
+
+
 def test_not_implemented_failure():
     # define anon decomposer
     class AnonDecomposer(_BaseSelectiveDecomposer):
@@ -71,3 +147,61 @@ def test_not_implemented_failure():
             return super(AnonDecomposer, self).get_decomposition()
 
     assert_fails(AnonDecomposer().get_decomposition, NotImplementedError)
+
+
+def test_selective_pca_incremental():
+    original = X
+    cols = ['sepal length (cm)', 'sepal width (cm)', 'petal length (cm)']
+    chunks = [original.iloc[i:i + 50] for i in range(0, 150, 50)]
+
+    # keeping all components, the incremental fit is exact (up to sign)
+    full = SelectivePCA(cols=cols, n_components=3).fit(original)
+    incr = SelectivePCA(cols=cols, n_components=3).fit_chunks(chunks)
+    assert isinstance(incr.get_decomposition(), IncrementalPCA)
+    assert_array_almost_equal(np.abs(full.pca_.components_), np.abs(incr.pca_.components_))
+    assert_array_almost_equal(full.pca_.explained_variance_ratio_, incr.pca_.explained_variance_ratio_)
+
+    # partial_fit is the same as fit_chunks, and transform semantics are unchanged
+    part = SelectivePCA(cols=cols, n_components=3, weight=True)
+    for chunk in chunks:
+        part.partial_fit(chunk)
+    assert_array_almost_equal(part.pca_.components_, incr.pca_.components_)
+
+    ratios = part.pca_.explained_variance_ratio_.copy()
+    transformed = part.transform(original)
+    assert transformed.columns.tolist() == ['PC1', 'PC2', 'PC3', 'petal width (cm)']
+    assert_array_equal(ratios, part.pca_.explained_variance_ratio_)  # weighting doesn't alter the pca
+    assert_fails(assert_array_almost_equal, AssertionError, transformed.values,
+                 SelectivePCA(cols=cols, n_components=3).fit_chunks(chunks).transform(original).values)
+
+    # fit_chunks discards previous fits, and accepts a callable
+    assert_array_almost_equal(part.fit_chunks(lambda: iter(chunks)).pca_.components_, incr.pca_.components_)
+    assert part.pca_.n_samples_seen_ == 150
+
+    # fails for float n_components and no data
+    assert_fails(SelectivePCA(n_components=0.85).partial_fit, ValueError, original)
+    assert_fails(SelectivePCA(n_components=2).fit_chunks, ValueError, [])
+
+
+def test_selective_pca_randomized():
+    original = X
+    cols = ['sepal length (cm)', 'sepal width (cm)', 'petal length (cm)']
+    full = SelectivePCA(cols=cols, n_components=2).fit(original)
+
+    # the solver parameters require sklearn >= 0.18
+    if not SK18:
+        assert_fails(SelectivePCA(cols=cols, svd_solver='randomized').fit, ValueError, original)
+        return
+
+    # seeded randomized solver is reproducible, and close to the full solver on well-separated spectra
+    rand = SelectivePCA(cols=cols, n_components=2, svd_solver='randomized', random_state=42)
+    t1 = rand.fit_transform(original)
+    t2 = SelectivePCA(cols=cols, n_components=2, svd_solver='randomized', random_state=42).fit_transform(original)
+    assert_array_equal(t1.values, t2.values)
+    assert_array_almost_equal(full.pca_.explained_variance_ratio_, rand.pca_.explained_variance_ratio_)
+
+    # float32 path
+    f32 = SelectivePCA(cols=cols, n_components=2, svd_solver='randomized', random_state=42, dtype=np.float32)
+    t32 = f32.fit_transform(original)
+    assert_array_almost_equal(np.abs(t32[['PC1', 'PC2']].values), np.abs(t1[['PC1', 'PC2']].values), decimal=4)
+    assert_array_equal(t32['petal width (cm)'].values, original['petal width (cm)'].values)
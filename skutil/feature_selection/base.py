@@ -7,6 +7,7 @@ from sklearn.externals import six
 from sklearn.base import TransformerMixin
 from skutil.base import BaseSkutil
 from ..utils import validate_is_pd
+from ..utils.profiling import profiled
 import warnings
 
 __all__ = [
@@ -57,6 +58,7 @@ class _BaseFeatureSelector(six.with_metaclass(ABCMeta, BaseSkutil, TransformerMi
     def __init__(self, cols=None, as_df=True):
         super(_BaseFeatureSelector, self).__init__(cols=cols, as_df=as_df)
 
+    @profiled
     def transform(self, X):
         """Transform a test matrix given the already-fit transformer.
 
@@ -1,11 +1,11 @@
 from __future__ import division, print_function
 import numpy as np
-from sklearn.externals import six
-from skutil.odr import QRDecomposition
 from .base import _BaseFeatureSelector
 from .select import _validate_cols
-from ..utils import flatten_all, validate_is_pd
+from ..utils import validate_is_pd
 from ..utils.fixes import _cols_if_none
+from ..utils._stream import _blocked_crossprod, _chunk_source
+from ..utils.profiling import profiled
 
 
 __all__ = [
@@ -19,6 +19,18 @@ class LinearCombinationFilterer(_BaseFeatureSelector):
     identify the sets of columns that are involved in the dependencies. This class is adapted 
     from the implementation in the R package, caret.
 
+    Rather than repeatedly factoring the matrix until it is full rank, the columns are
+    factored left-to-right in a single pass of a rank-revealing QR decomposition with
+    limited pivoting (as in R's ``qr``): any column whose component orthogonal to the
+    columns before it (the corresponding diagonal element of R) is negligible is a linear
+    combination of those columns, and is pivoted out of the factorization and dropped.
+    Thus, of the columns involved in each dependency, it is the right-most that is dropped.
+
+    For data too tall to hold in memory (or to copy for the decomposition), ``fit_chunks``
+    accumulates the cross-product matrix, X'X, over row-chunks and resolves the same
+    dependencies from its Cholesky decomposition, using memory independent of the number
+    of rows.
+
     Parameters
     ----------
 
@@ -38,6 +50,11 @@ class LinearCombinationFilterer(_BaseFeatureSelector):
         Since most skutil transformers depend on explicitly-named
         ``DataFrame`` features, the ``as_df`` parameter is True by default.
 
+    tol : float, optional (default=1e-7)
+        The tolerance for detecting linear dependencies. A column is deemed
+        a linear combination of the columns before it if the norm of its
+        component orthogonal to them is no more than ``tol`` times its own norm.
+
 
     Examples
     --------
@@ -59,9 +76,11 @@ class LinearCombinationFilterer(_BaseFeatureSelector):
         method.
     """
 
-    def __init__(self, cols=None, as_df=True):
+    def __init__(self, cols=None, as_df=True, tol=1e-7):
         super(LinearCombinationFilterer, self).__init__(cols=cols, as_df=as_df)
+        self.tol = tol
 
+    @profiled
     def fit(self, X, y=None):
         """Fit the transformer.
 
@@ -86,6 +105,7 @@ class LinearCombinationFilterer(_BaseFeatureSelector):
         self.fit_transform(X, y)
         return self
 
+    @profiled
     def fit_transform(self, X, y=None):
         """Fit the transformer and return the transformed
         training array.
@@ -110,85 +130,205 @@ class LinearCombinationFilterer(_BaseFeatureSelector):
         """
 
         # check on state of X and cols
-        X, self.cols = validate_is_pd(X, self.cols, assert_all_finite=True)  # must all be finite for fortran
+        X, self.cols = validate_is_pd(X, self.cols, assert_all_finite=True)
         _validate_cols(self.cols)
 
-        # init drops list
-        drops = []
-
-        # Generate sub matrix for qr decomposition
-        cols = _cols_if_none(X, self.cols)  # get a copy of the cols
+        # Generate sub matrix for the decomposition
+        cols = np.array(_cols_if_none(X, self.cols))  # so we can index by position
         x = X[cols].as_matrix()
-        cols = np.array(cols)  # so we can do boolean indexing
 
-        # do subroutines
-        lc_list = _enum_lc(QRDecomposition(x))
+        # a single rank-revealing pass resolves all of the dependencies
+        self.drop_ = cols[_dependent_columns(x, self.tol)].tolist()
+        dropped = X.drop(self.drop_, axis=1)
 
-        if lc_list is not None:
-            while lc_list is not None:
-                # we want the first index in each of the keys in the dict
-                bad = np.array([p for p in set([v[0] for _, v in six.iteritems(lc_list)])])
+        return dropped if self.as_df else dropped.as_matrix()
 
-                # get the corresponding bad names
-                bad_nms = cols[bad]
-                drops.extend(bad_nms)
+    @profiled
+    def fit_chunks(self, chunks, y=None):
+        """Fit the transformer over row-chunks of a dataset that may be
+        too large to fit in memory. Rather than decomposing the matrix itself,
+        the cross-product matrix, X'X, is accumulated over the chunks, and the
+        linear dependencies are identified from its Cholesky decomposition with
+        the same limited pivoting as ``fit``. Memory is O(n_features^2), regardless
+        of the number of rows.
 
-                # update our X, and then our cols
-                x = np.delete(x, bad, axis=1)
-                cols = np.delete(cols, bad)
+        Since forming X'X squares the condition number of the matrix, dependencies
+        can only be resolved to a relative tolerance of about ``sqrt(n_features * eps)``,
+        which is used in place of ``tol`` if it is larger. On well-conditioned data,
+        the resulting ``drop_`` is the same as that of ``fit``.
 
-                # keep removing linear dependencies until it resolves
-                lc_list = _enum_lc(QRDecomposition(x))
+        Parameters
+        ----------
 
-                # will break when lc_list returns None
+        chunks : iterable or callable
+            An iterable of Pandas ``DataFrame`` chunks, each with the same
+            columns, or a callable that returns a new such iterator each time
+            it is called (i.e., ``lambda: pd.read_csv(path, chunksize=100000)``).
 
-        # Assign attributes, return
-        self.drop_ = [p for p in set(drops)]  # a list from the a set of the drops
-        dropped = X.drop(self.drop_, axis=1)
+        y : None
+            Passthrough for ``sklearn.pipeline.Pipeline``. Even
+            if explicitly set, will not change behavior of ``fit``.
 
-        return dropped if self.as_df else dropped.as_matrix()
-        
+        Returns
+        -------
+
+        self
+        """
+        names = []  # the validated cols, assigned from the first chunk
+        xtx = None
+
+        for chunk in _chunk_source(chunks)():
+            # no copy -- the selected block is extracted below
+            chunk, self.cols = validate_is_pd(chunk, self.cols, assert_all_finite=True, copy=False)
+            if not names:
+                names.extend(_cols_if_none(chunk, self.cols))
+                _validate_cols(names)
 
-def _enum_lc(decomp):
-    """Perform a single iteration of linear combo scoping.
+            chunk_xtx = _blocked_crossprod(np.asarray(chunk[names].as_matrix(), dtype=np.float64))
+            xtx = chunk_xtx if xtx is None else xtx + chunk_xtx
+
+        if xtx is None:
+            raise ValueError('no rows in the data')
+
+        self.drop_ = np.asarray(names)[_dependent_columns_gram(xtx, self.tol)].tolist()
+        return self
+
+
+def _dependent_columns_gram(xtx, tol=1e-7, block_size=64):
+    """Identify the columns of a matrix that are linear combinations
+    of the columns before them from its cross-product matrix, X'X, via
+    a Cholesky decomposition with the same limited pivoting as
+    ``_dependent_columns``. X'X is first scaled to have a unit diagonal,
+    after which the j-th pivot of the Cholesky decomposition is the squared
+    norm of the j-th column's component orthogonal to the (independent)
+    columns before it, relative to its own squared norm. A column whose
+    pivot is negligible is skipped, so the Schur complement is only ever
+    updated by the independent columns.
+
+    The decomposition is right-looking and blocked: the columns of each block
+    are factored one at a time, updating only the rest of the block, and then
+    the trailing submatrix is updated by the whole block at once with a single
+    matrix-matrix product.
 
     Parameters
     ----------
 
-    decomp : a ``QRDecomposition`` object
-        The QR decomposition of the matrix
+    xtx : np.ndarray, shape=(n_features, n_features)
+        The cross-product matrix.
+
+    tol : float, optional (default=1e-7)
+        A column is dependent if the norm of its residual is no more
+        than ``tol`` times its original norm. Since X'X squares the condition
+        number of X, ``sqrt(n_features * eps)`` is used instead if it is larger.
+
+    block_size : int, optional (default=64)
+        The number of columns per block.
+
+    Returns
+    -------
+
+    dependent : np.ndarray, shape=(n_dependent,)
+        The indices of the dependent columns, in ascending order.
+    """
+    p = xtx.shape[0]
+    diag = np.diag(xtx)
+    with np.errstate(divide='ignore'):
+        scale = np.where(diag > 0, 1. / np.sqrt(diag), 0.)
+
+    # all-zero columns have a zero pivot, and are always dependent
+    S = xtx * np.outer(scale, scale)
+    thresh = max(tol ** 2, p * np.finfo(np.float64).eps)
+    dependent = []
+
+    for start in range(0, p, block_size):
+        stop = min(start + block_size, p)
+        panel = []  # the columns of L (rows start:) for the independent columns in this block
+
+        for j in range(start, stop):
+            pivot = S[j, j]
+            if pivot <= thresh:
+                dependent.append(j)
+                continue
+
+            l_j = S[start:, j] / np.sqrt(pivot)
+            l_j[:j - start] = 0.
+            S[j:, j + 1:stop] -= np.outer(l_j[j - start:], l_j[j + 1 - start:stop - start])
+            panel.append(l_j)
+
+        if panel and stop < p:
+            L = np.array(panel)[:, stop - start:]
+            S[stop:, stop:] -= L.T.dot(L)
+
+    return np.asarray(dependent, dtype=np.intp)
+
+
+def _dependent_columns(x, tol=1e-7, block_size=64):
+    """Identify the columns of a matrix that are linear combinations
+    of the columns before them, in a single left-to-right pass of a
+    rank-revealing QR decomposition with limited pivoting (as in LINPACK's
+    ``dqrdc2``, which backs R's ``qr``). The orthonormal basis, Q, of the
+    independent columns is built by Gram-Schmidt with reorthogonalization,
+    and the norm of each column's residual is the magnitude of the diagonal
+    element of R that it would contribute. A column whose residual is
+    negligible is pivoted out rather than added to Q, so the factorization
+    is never refactored (or downdated) when a column is dropped. The rank
+    is the number of columns in Q.
+
+    Rather than projecting one column at a time, the columns are processed
+    in blocks of ``block_size``: each block is projected against the existing
+    basis with two matrix-matrix products, and only the (small) within-block
+    orthogonalization is done column-by-column.
+
+    Parameters
+    ----------
+
+    x : np.ndarray, shape=(n_samples, n_features)
+        The matrix.
+
+    tol : float, optional (default=1e-7)
+        A column is dependent if the norm of its residual is no
+        more than ``tol`` times its original norm.
+
+    block_size : int, optional (default=64)
+        The number of columns per block. Larger blocks push more of the
+        work into the matrix-matrix products, but more of it into the
+        column-by-column orthogonalization as well.
+
+    Returns
+    -------
+
+    dependent : np.ndarray, shape=(n_dependent,)
+        The indices of the dependent columns, in ascending order.
     """
-    # qr = decomp.qr  # the decomposition matrix
-
-    # extract the R matrix
-    R = decomp.get_R()         # the R matrix
-    n_features = R.shape[1]    # number of columns in R
-    # is_zero = n_features == 0  # whether there are no features
-    rank = decomp.get_rank()   # the rank of the original matrix, or num of independent cols
-
-    if not (rank == n_features):
-        pivot = decomp.pivot         # the pivot vector
-        X = R[:rank, :rank]          # extract the independent cols
-        Y = R[:rank, rank:]  # +1?   # extract the dependent columns
-
-        new_qr = QRDecomposition(X)  # factor the independent columns
-        b = new_qr.get_coef(Y)       # get regression coefficients of dependent cols
-
-        # if b is None, then there were no dependent columns
-        if b is not None:
-            b[np.abs(b) < 1e-6] = 0  # zap small values
-            
-            # will return a dict of {dim : list of bad idcs}
-            d = {}
-            row_idcs = np.arange(b.shape[0])
-            for i in range(Y.shape[1]):  # should only ever be 1, right?
-                nested = [ 
-                            pivot[rank+i],
-                            pivot[row_idcs[b[:, i] != 0]]
-                         ]
-                d[i] = flatten_all(nested)
-
-            return d
-
-    # if we get here, there are no linear combos to discover
-    return None
+    x = np.asarray(x, dtype=np.float64)
+    n, p = x.shape
+    norms = np.sqrt((x ** 2).sum(axis=0))
+
+    Q = np.empty((n, min(n, p)), dtype=np.float64, order='F')
+    rank, dependent = 0, []
+
+    for start in range(0, p, block_size):
+        block = x[:, start:start + block_size].copy()
+
+        # project out the basis of the previous blocks (twice is enough, per Kahan)
+        for _ in range(2):
+            if rank:
+                block -= Q[:, :rank].dot(Q[:, :rank].T.dot(block))
+
+        block_rank = rank
+        for j in range(block.shape[1]):
+            v = block[:, j]
+            for _ in range(2):
+                if rank > block_rank:
+                    basis = Q[:, block_rank:rank]
+                    v -= basis.dot(basis.T.dot(v))
+
+            # the magnitude of R's diagonal element for this column
+            r_jj = np.sqrt(v.dot(v))
+            if rank == Q.shape[1] or r_jj <= tol * norms[start + j]:
+                dependent.append(start + j)
+            else:
+                Q[:, rank] = v / r_jj
+                rank += 1
+
+    return np.asarray(dependent, dtype=np.intp)
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, division, absolute_import
+import numpy as np
+import pandas as pd
+from .base import _BaseFeatureSelector
+from .select import filter_collinearity
+from ..utils import validate_is_pd, is_numeric
+from ..utils.fixes import _cols_if_none
+from ..utils._stream import _AverageRanker, _CorrelationAccumulator, _chunk_source
+from ..utils.profiling import profiled
+
+__all__ = [
+    'FeatureScreener'
+]
+
+
+def _count_ratios(counts):
+    """Compute the ratio of the most prevalent value to the
+    second-most prevalent value from a column's value counts,
+    as in ``_near_zero_variance_ratio``.
+
+    Parameters
+    ----------
+
+    counts : np.ndarray, shape=(n_unique,)
+        The count of each distinct value in the column.
+
+    Returns
+    -------
+
+    ratio_ : float
+        The ratio, or NaN if there is only one distinct value.
+    """
+    if counts.shape[0] < 2:
+        return np.nan
+
+    top_two = np.partition(counts, counts.shape[0] - 2)[-2:]
+    return top_two[1] / top_two[0]
+
+
+class FeatureScreener(_BaseFeatureSelector):
+    """Screen features by sparsity, near-zero variance and multicollinearity
+    in a single pass over the data. The drop rules are those of the
+    ``SparseFeatureDropper``, ``NearZeroVarianceFilterer`` and
+    ``MulticollinearityFilterer``, applied in that order (each to the features
+    that survived the previous), and the resulting ``drop_`` is the same as
+    running the three back to back. However, rather than each one copying
+    and scanning the data, the NaN counts, value counts (for ``strategy='ratio'``)
+    and correlation sufficient statistics are all gathered at once, and the
+    data may be provided in row-chunks via ``fit_chunks``.
+
+    Note that, as with the ``NearZeroVarianceFilterer`` and ``MulticollinearityFilterer``,
+    any non-finite values remaining in features that are not dropped for sparsity
+    will raise a ``ValueError``.
+
+    Parameters
+    ----------
+
+    cols : array_like, shape=(n_features,), optional (default=None)
+        The names of the columns on which to apply the transformation.
+        If no column names are provided, the transformer will be ``fit``
+        on the entire frame. Note that the transformation will also only
+        apply to the specified columns, and any other non-specified
+        columns will still be present after transformation. Note that
+        since this transformer can only operate on numeric columns, not
+        explicitly setting the ``cols`` parameter may result in errors
+        for categorical data.
+
+    sparsity_threshold : float, optional (default=0.5)
+        The threshold of sparsity (proportion of NaN) above which
+        features will be deemed "too sparse" and will be dropped.
+
+    variance_threshold : float, optional (default=1e-6)
+        The near-zero variance threshold. See ``strategy``.
+
+    strategy : str, optional (default='variance')
+        The near-zero variance strategy, one of ('variance', 'ratio').
+        If 'variance', features with a variance below ``variance_threshold``
+        are dropped. If 'ratio', features are dropped if the most prevalent
+        value is represented at a ratio greater than or equal to
+        ``variance_threshold`` to the second-most frequent value (in which
+        case, ``variance_threshold`` must be greater than 1).
+
+    collinearity_threshold : float, optional (default=0.85)
+        The threshold above which to filter correlated features
+
+    method : str, optional (default='pearson')
+        The method used to compute the correlation, one of ('pearson',
+        'spearman'). Note that 'spearman' requires a second pass over the
+        data to compute the correlation of the ranks.
+
+    as_df : bool, optional (default=True)
+        Whether to return a Pandas ``DataFrame`` in the ``transform``
+        method. If False, will return a Numpy ``ndarray`` instead.
+        Since most skutil transformers depend on explicitly-named
+        ``DataFrame`` features, the ``as_df`` parameter is True by default.
+
+    n_jobs : int, optional (default=1)
+        The number of threads to use for computing the blocks of the
+        cross-product matrix. If -1, all CPUs are used.
+
+
+    Examples
+    --------
+
+        >>> import numpy as np
+        >>> import pandas as pd
+        >>> from skutil.utils import load_iris_df
+        >>>
+        >>> X = load_iris_df(include_tgt=False)
+        >>> X['zeros'] = np.zeros(X.shape[0])
+        >>> X['sparse'] = np.nan
+        >>> screener = FeatureScreener().fit(X)
+        >>> screener.drop_
+        ['sparse', 'zeros', 'petal length (cm)']
+
+
+    Attributes
+    ----------
+
+    drop_ : array_like, shape=(n_features,)
+        Assigned after calling ``fit``. These are the features that
+        are designated as "bad" and will be dropped in the ``transform``
+        method.
+
+    sparse_drop_ : list
+        The features dropped for sparsity
+
+    nzv_drop_ : list
+        The features dropped for near-zero variance
+
+    collinear_drop_ : list
+        The features dropped for multicollinearity
+
+    sparsity_ : array_like, shape=(n_features,)
+        The array of sparsity values
+
+    var_ : dict
+        The near-zero variance dropped columns mapped to their
+        corresponding variances or ratios, depending on the ``strategy``
+
+    mean_abs_correlations_ : list, float
+        The corresponding mean absolute correlations of each ``collinear_drop_`` name
+
+    correlations_ : list of ``_MCFTuple`` instances
+        Contains detailed info on multicollinear columns
+    """
+
+    def __init__(self, cols=None, sparsity_threshold=0.5, variance_threshold=1e-6,
+                 strategy='variance', collinearity_threshold=0.85, method='pearson',
+                 as_df=True, n_jobs=1):
+        super(FeatureScreener, self).__init__(cols=cols, as_df=as_df)
+        self.sparsity_threshold = sparsity_threshold
+        self.variance_threshold = variance_threshold
+        self.strategy = strategy
+        self.collinearity_threshold = collinearity_threshold
+        self.method = method
+        self.n_jobs = n_jobs
+
+    @profiled
+    def fit(self, X, y=None):
+        """Fit the transformer.
+
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+            The Pandas frame to fit. The frame will only
+            be fit on the prescribed ``cols`` (see ``__init__``) or
+            all of them if ``cols`` is None. Furthermore, ``X`` will
+            not be altered in the process of the fit.
+
+        y : None
+            Passthrough for ``sklearn.pipeline.Pipeline``. Even
+            if explicitly set, will not change behavior of ``fit``.
+
+        Returns
+        -------
+
+        self
+        """
+        return self.fit_chunks([X])
+
+    @profiled
+    def fit_chunks(self, chunks, y=None):
+        """Fit the transformer over row-chunks of a dataset that may
+        be too large to fit in memory.
+
+        Parameters
+        ----------
+
+        chunks : iterable or callable
+            An iterable of Pandas ``DataFrame`` chunks, each with the same
+            columns, or a callable that returns a new such iterator each time
+            it is called (i.e., ``lambda: pd.read_csv(path, chunksize=100000)``).
+            If ``method`` is 'spearman', the chunks are traversed twice, and a
+            one-shot iterator (like a generator) will raise a ``ValueError``.
+
+        y : None
+            Passthrough for ``sklearn.pipeline.Pipeline``. Even
+            if explicitly set, will not change behavior of ``fit``.
+
+        Returns
+        -------
+
+        self
+        """
+        self._validate_params()
+        spearman = self.method == 'spearman'
+        ratio = self.strategy == 'ratio'
+
+        source = _chunk_source(chunks, n_passes=2 if spearman else 1)
+        names = []  # the validated cols, assigned from the first chunk
+
+        def matrices():
+            for chunk in source():
+                # no copy -- the selected block is extracted below
+                chunk, self.cols = validate_is_pd(chunk, self.cols, copy=False)
+                if not names:
+                    names.extend(_cols_if_none(chunk, self.cols))
+                yield np.asarray(chunk[names].as_matrix(), dtype=np.float64)
+
+        # the single pass over the data
+        acc = _CorrelationAccumulator(n_jobs=self.n_jobs)
+        counter = _AverageRanker() if (ratio or spearman) else None
+        nan_ct = non_finite_ct = 0
+
+        for x in matrices():
+            finite = np.isfinite(x)
+            nan_ct = nan_ct + np.isnan(x).sum(axis=0)
+            non_finite_ct = non_finite_ct + (~finite).sum(axis=0)
+
+            # the non-finite values only matter in features that will be
+            # dropped for sparsity (or will raise), so zero them out
+            if not finite.all():
+                x = np.where(finite, x, 0.)
+
+            acc.update(x)
+            if counter is not None:
+                counter.update(x)
+
+        if not acc.n_samples_:
+            raise ValueError('no rows in the data')
+
+        features = np.asarray(names)
+
+        # 1. sparsity
+        self.sparsity_ = nan_ct / acc.n_samples_
+        live = ~(self.sparsity_ > self.sparsity_threshold)
+        self.sparse_drop_ = features[~live].tolist()
+
+        # the rest require finite values
+        if (non_finite_ct[live] > 0).any():
+            raise ValueError('Expected all entries to be finite')
+
+        # 2. near-zero variance
+        if not ratio:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                stat = acc.variance(ddof=1)
+                nzv = live & (stat < self.variance_threshold)
+        else:
+            stat = np.array([_count_ratios(c) for c in counter.counts_])
+            with np.errstate(invalid='ignore'):
+                nzv = live & (np.isnan(stat) | (stat >= self.variance_threshold))
+
+        self.nzv_drop_ = features[nzv].tolist()
+        self.var_ = dict(zip(self.nzv_drop_, stat[nzv].tolist()))
+        live &= ~nzv
+
+        # 3. multicollinearity, if there are at least two features left
+        self.collinear_drop_, self.mean_abs_correlations_, self.correlations_ = [], [], []
+        idcs = np.flatnonzero(live)
+        if idcs.shape[0] > 1:
+            if spearman:
+                acc = _CorrelationAccumulator(n_jobs=self.n_jobs)
+                for x in matrices():
+                    acc.update(counter.transform(np.where(np.isfinite(x), x, 0.)))
+
+            c = np.abs(acc.correlation()[np.ix_(idcs, idcs)])
+            c = pd.DataFrame(c, index=features[idcs], columns=features[idcs])
+            self.collinear_drop_, self.mean_abs_correlations_, self.correlations_ = \
+                filter_collinearity(c, self.collinearity_threshold)
+
+        self.drop_ = self.sparse_drop_ + self.nzv_drop_ + self.collinear_drop_
+        return self
+
+    def _validate_params(self):
+        thresh = self.sparsity_threshold
+        if not (is_numeric(thresh) and (0.0 <= thresh < 1.0)):
+            raise ValueError('sparsity_threshold must be a float between '
+                             '0 (inclusive) and 1. Got %s' % str(thresh))
+
+        valid_strategies = ('variance', 'ratio')
+        if self.strategy not in valid_strategies:
+            raise ValueError('strategy must be one of {0}, but got {1}'.format(
+                str(valid_strategies), self.strategy))
+
+        if self.strategy == 'ratio' and not self.variance_threshold > 1.0:
+            raise ValueError('when strategy=="ratio", variance_threshold must be greater than 1.0')
+
+        valid_methods = ('pearson', 'spearman')
+        if self.method not in valid_methods:
+            raise ValueError('method must be one of {0}, but got {1}'.format(
+                str(valid_methods), self.method))
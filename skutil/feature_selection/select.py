@@ -2,12 +2,16 @@
 
 from __future__ import print_function, division, absolute_import
 from collections import namedtuple
+import warnings
 import numpy as np
 import pandas as pd
 from sklearn.utils.validation import check_is_fitted
+from sklearn.externals.joblib import Parallel, delayed, cpu_count
 from .base import _BaseFeatureSelector
 from ..utils import validate_is_pd, is_numeric
 from ..utils.fixes import _cols_if_none
+from ..utils._stream import _chunk_source, _chunked_correlation
+from ..utils.profiling import profiled
 
 __all__ = [
     'FeatureDropper',
@@ -99,6 +103,7 @@ class SparseFeatureDropper(_BaseFeatureSelector):
         super(SparseFeatureDropper, self).__init__(cols=cols, as_df=as_df)
         self.threshold = threshold
 
+    @profiled
     def fit(self, X, y=None):
         """Fit the transformer.
 
@@ -184,6 +189,7 @@ class FeatureDropper(_BaseFeatureSelector):
     def __init__(self, cols=None, as_df=True):
         super(FeatureDropper, self).__init__(cols=cols, as_df=as_df)
 
+    @profiled
     def fit(self, X, y=None):
         # check on state of X and cols
         _, self.cols = validate_is_pd(X, self.cols)
@@ -236,6 +242,7 @@ class FeatureRetainer(_BaseFeatureSelector):
     def __init__(self, cols=None, as_df=True):
         super(FeatureRetainer, self).__init__(cols=cols, as_df=as_df)
 
+    @profiled
     def fit(self, X, y=None):
         """Fit the transformer.
 
@@ -266,6 +273,7 @@ class FeatureRetainer(_BaseFeatureSelector):
 
         return self
 
+    @profiled
     def transform(self, X):
         """Transform a test matrix given the already-fit transformer.
 
@@ -316,10 +324,53 @@ class _MCFTuple(namedtuple('_MCFTuple', ('feature_x',
             self.mac)
 
 
+def _col_max(a):
+    """Compute the max of each column in ``a``, ignoring NaNs.
+    Unlike ``np.nanmax``, an all-NaN column will quietly
+    produce NaN rather than raising a ``RuntimeWarning``.
+
+    Parameters
+    ----------
+
+    a : np.ndarray, shape=(n_samples, n_features)
+        The matrix (or single column) to reduce.
+    """
+    return np.fmax.reduce(a, axis=0)
+
+
+def _most_correlated(col, max_cor):
+    """Get the position of the feature with the max correlation in
+    a column (whose dropped features, and itself, are NaN). Ties are broken
+    as in the original implementation, which took the last of the column's
+    non-NaN values once sorted (with ``sort_values``, an unstable quicksort).
+
+    Parameters
+    ----------
+
+    col : np.ndarray, shape=(n_features,)
+        The (masked) column of the absolute correlation matrix.
+
+    max_cor : float
+        The max of ``col``.
+    """
+    live = np.flatnonzero(~np.isnan(col))
+    ties = live[col[live] == max_cor]
+    if ties.shape[0] == 1:
+        return ties[0]
+    return live[np.argsort(col[live], kind='quicksort')[-1]]
+
+
 def filter_collinearity(c, threshold):
     """Performs the collinearity filtration for both the
     ``MulticollinearityFilterer`` as well as the ``H2OMulticollinearityFilterer``
 
+    The absolute correlation matrix is held as a NumPy array along with
+    the per-column max absolute correlation among the live features. After
+    each drop, the dropped row/column is masked out and only the column
+    maxes that depended on it are recomputed, so each elimination step
+    costs O(n_features) rather than a full rescan of the frame. The input
+    frame, ``c``, is not altered.
+
     Parameters
     ----------
 
@@ -351,70 +402,70 @@ def filter_collinearity(c, threshold):
     if c.shape[0] != c.shape[1]:
         raise ValueError('input dataframe should be symmetrical in dimensions')
 
+    names = c.columns.tolist()
+    n_features = len(names)
+
+    # mask the diagonal so a feature is never compared with itself. Dropped
+    # features will be masked the same way, so NaN means "not live" as well as
+    # "undefined correlation" (which was ignored anyhow)
+    a = np.array(c, dtype=np.float64)  # copy
+    np.fill_diagonal(a, np.nan)
+    col_max = _col_max(a)
+    n_live = n_features
+
     # init drops list
     drops = []
     macor = []  # mean abs corrs
     corrz = []  # the correlations
 
-    # Iterate over each feature
-    finished = False
-    while not finished:
+    # once only two features remain, neither is dropped
+    while n_live > 2:
+        with np.errstate(invalid='ignore'):
+            over = np.flatnonzero(col_max >= threshold)  # NaN compares False
 
-        # Whenever there's a break, this loop will start over
-        for i, nm in enumerate(c.columns):
-            this_col = c[nm].drop(nm).sort_values(
-                na_position='first')  # gets the column, drops the index of itself, and sorts
-            this_col_nms = this_col.index.tolist()
-            this_col = np.array(this_col)
-
-            # check if last value is over thresh
-            max_cor = this_col[-1]
-            if pd.isnull(max_cor) or max_cor < threshold or this_col.shape[0] == 1:
-                if i == c.columns.shape[0] - 1:
-                    finished = True
-
-                # control passes to next column name or end if finished
-                continue
-
-            # otherwise, we know the corr is over the threshold
-            # gets the current col, and drops the same row, sorts asc and gets other col
-            other_col_nm = this_col_nms[-1]
-            that_col = c[other_col_nm].drop(other_col_nm)
+        if not over.shape[0]:
+            break
 
-            # get the mean absolute correlations of each
+        # the first (in column order) feature with a corr over the threshold,
+        # and the feature with which it's most correlated
+        i = over[0]
+        this_col = a[:, i]
+        max_cor = col_max[i]
+        j = _most_correlated(this_col, max_cor)
+        that_col = a[:, j]
+
+        # get the mean absolute correlations of each
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
             mn_1, mn_2 = np.nanmean(this_col), np.nanmean(that_col)
 
-            # we might get nans?
-            # if pd.isnull(mn_1) and pd.isnull(mn_2):
-            # this condition is literally impossible, as it would
-            # require every corr to be NaN, and it wouldn't have
-            # even gotten here without hitting the continue block.
-            if pd.isnull(mn_1):
-                drop_nm = other_col_nm
-            elif pd.isnull(mn_2):
-                drop_nm = nm
-            else:
-                drop_nm = nm if mn_1 > mn_2 else other_col_nm
-
-            # drop the bad col, row
-            c.drop(drop_nm, axis=1, inplace=True)
-            c.drop(drop_nm, axis=0, inplace=True)
-
-            # add the bad col to drops
-            drops.append(drop_nm)
-            macor.append(np.maximum(mn_1, mn_2))
-            corrz.append(_MCFTuple(
-                feature_x=drop_nm,
-                feature_y=nm if not nm == drop_nm else other_col_nm,
-                abs_corr=max_cor,
-                mac=macor[-1]
-            ))
-
-            # if we get here, we have to break so the loop will 
-            # start over from the first (non-popped) column
-            break
-
-            # if not finished, restarts loop, otherwise will exit loop
+        if pd.isnull(mn_1):
+            drop_idx = j
+        elif pd.isnull(mn_2):
+            drop_idx = i
+        else:
+            drop_idx = i if mn_1 > mn_2 else j
+
+        # mask the bad col, row, and find which column maxes it was backing
+        stale = a[drop_idx, :] == col_max
+        a[drop_idx, :] = np.nan
+        a[:, drop_idx] = np.nan
+        stale[drop_idx] = False
+        col_max[drop_idx] = np.nan
+        if stale.any():
+            col_max[stale] = _col_max(a[:, stale])
+        n_live -= 1
+
+        # add the bad col to drops
+        drop_nm = names[drop_idx]
+        drops.append(drop_nm)
+        macor.append(np.maximum(mn_1, mn_2))
+        corrz.append(_MCFTuple(
+            feature_x=drop_nm,
+            feature_y=names[j] if drop_idx == i else names[i],
+            abs_corr=max_cor,
+            mac=macor[-1]
+        ))
 
     # return
     out_tup = (drops, macor, corrz)
@@ -449,6 +500,11 @@ class MulticollinearityFilterer(_BaseFeatureSelector):
         Since most skutil transformers depend on explicitly-named
         ``DataFrame`` features, the ``as_df`` parameter is True by default.
 
+    n_jobs : int, optional (default=1)
+        The number of threads to use for computing the blocks of the
+        cross-product matrix when ``method`` is 'pearson' or 'spearman'.
+        If -1, all CPUs are used.
+
 
     Examples
     --------
@@ -485,11 +541,13 @@ class MulticollinearityFilterer(_BaseFeatureSelector):
         Contains detailed info on multicollinear columns
     """
 
-    def __init__(self, cols=None, threshold=0.85, method='pearson', as_df=True):
+    def __init__(self, cols=None, threshold=0.85, method='pearson', as_df=True, n_jobs=1):
         super(MulticollinearityFilterer, self).__init__(cols=cols, as_df=as_df)
         self.threshold = threshold
         self.method = method
+        self.n_jobs = n_jobs
 
+    @profiled
     def fit(self, X, y=None):
         """Fit the multicollinearity filterer.
 
@@ -515,15 +573,186 @@ class MulticollinearityFilterer(_BaseFeatureSelector):
         X, self.cols = validate_is_pd(X, self.cols, assert_all_finite=True)
         cols = _cols_if_none(X, self.cols)
         _validate_cols(cols)
+        method = self._validate_method()
 
         # Generate correlation matrix
-        c = X[cols].corr(method=self.method).apply(lambda x: np.abs(x))
+        if method == 'kendall':
+            c = X[cols].corr(method=method)
+        else:
+            c = _chunked_correlation(lambda: iter([X[cols].as_matrix()]), method=method, n_jobs=self.n_jobs)
+            c = pd.DataFrame(c, index=cols, columns=cols)
 
         # get drops list
-        self.drop_, self.mean_abs_correlations_, self.correlations_ = filter_collinearity(c, self.threshold)
+        self.drop_, self.mean_abs_correlations_, self.correlations_ = filter_collinearity(c.abs(), self.threshold)
 
         return self
 
+    @profiled
+    def fit_chunks(self, chunks, y=None):
+        """Fit the multicollinearity filterer over row-chunks of a
+        dataset that may be too large to fit in memory. Only the
+        sufficient statistics of the correlation matrix are accumulated
+        across chunks, so memory is bounded by the chunk size and
+        O(n_features^2). The resulting ``drop_`` is the same as that of
+        ``fit`` on the concatenated chunks.
+
+        Parameters
+        ----------
+
+        chunks : iterable or callable
+            An iterable of Pandas ``DataFrame`` chunks, each with the same
+            columns, or a callable that returns a new such iterator each time
+            it is called (i.e., ``lambda: pd.read_csv(path, chunksize=100000)``).
+            Since the ranks must be computed over the entire dataset before the
+            correlations, the chunks are traversed twice when ``method`` is
+            'spearman', and a one-shot iterator (like a generator) will raise a
+            ``ValueError``. The 'kendall' method cannot be fit in chunks.
+
+        y : None
+            Passthrough for ``sklearn.pipeline.Pipeline``. Even
+            if explicitly set, will not change behavior of ``fit``.
+
+        Returns
+        -------
+
+        self
+        """
+        method = self._validate_method()
+        if method == 'kendall':
+            raise ValueError('method="kendall" cannot be computed in chunks')
+
+        source = _chunk_source(chunks, n_passes=2 if method == 'spearman' else 1)
+        names = []  # the validated cols, assigned from the first chunk
+
+        def matrices():
+            for chunk in source():
+                chunk, self.cols = validate_is_pd(chunk, self.cols, assert_all_finite=True)
+                if not names:
+                    names.extend(_cols_if_none(chunk, self.cols))
+                    _validate_cols(names)
+                yield chunk[names].as_matrix()
+
+        c = _chunked_correlation(matrices, method=method, n_jobs=self.n_jobs)
+        c = pd.DataFrame(c, index=names, columns=names)
+
+        # get drops list
+        self.drop_, self.mean_abs_correlations_, self.correlations_ = filter_collinearity(c.abs(), self.threshold)
+
+        return self
+
+    def _validate_method(self):
+        valid_methods = ('pearson', 'kendall', 'spearman')
+        if self.method not in valid_methods:
+            raise ValueError('method must be one of {0}, but got {1}'.format(
+                str(valid_methods), self.method))
+        return self.method
+
+
+def _integer_codes(x):
+    """Check whether a column's values are integers (including
+    integral floats or booleans) spanning a range not much larger
+    than the number of rows, so that they can be counted with
+    ``np.bincount`` rather than a hash table.
+
+    Parameters
+    ----------
+
+    x : np.ndarray, shape=(n_samples,)
+        The column to encode.
+
+    Returns
+    -------
+
+    ints : np.ndarray or None, shape=(n_samples,)
+        The column (viewed as integers if boolean), or None
+        if the column cannot be integer-coded.
+
+    lo : int
+        The minimum value, which is subtracted from each value to get its code.
+
+    n_codes : int
+        The upper bound (exclusive) of the codes.
+    """
+    n = x.shape[0]
+    if x.dtype.kind == 'b':
+        x = x.view(np.uint8)
+    elif x.dtype.kind == 'f':
+        # check the head before paying for a pass over the whole column
+        integral = lambda v: np.isfinite(v).all() and (v == np.floor(v)).all()
+        if not (n and integral(x[:1024]) and integral(x)):
+            return None, 0, 0
+    elif not (x.dtype.kind in 'iu' and np.can_cast(x.dtype, np.int64) and n):
+        return None, 0, 0
+
+    lo, hi = int(x.min()), int(x.max())
+    n_codes = hi - lo + 1
+    if n_codes > 2 * n:
+        return None, 0, 0
+
+    return x, lo, n_codes
+
+
+def _top_two_counts(x, ratio=None, block_size=65536):
+    """Count the occurrences of the two most prevalent values
+    in a column. Integer-coded columns (see ``_integer_codes``) are
+    counted with ``np.bincount``; if ``ratio`` is provided, their rows
+    are counted in blocks of ``block_size``, and counting stops as soon
+    as the column is provably not near-zero variance: since counts can
+    only grow, the final second-most prevalent count is at least the
+    current one, and the final most-prevalent count is at most the current
+    one plus the number of rows not yet counted. If that ratio is already
+    below ``ratio``, the rest of the column cannot change the outcome. Any
+    other column is counted in a single hash-table pass.
+
+    Parameters
+    ----------
+
+    x : array_like, shape=(n_samples,)
+        The column. NaNs are not counted.
+
+    ratio : float, optional (default=None)
+        The near-zero variance ratio. If None, the whole column is counted.
+
+    block_size : int, optional (default=65536)
+        The number of rows counted between checks of the stopping rule.
+
+    Returns
+    -------
+
+    top : int
+        The count of the most prevalent value.
+
+    second : int
+        The count of the second-most prevalent value, or 0
+        if there is only one distinct value. If counting stopped
+        early, both counts are those of the rows counted so far.
+    """
+    x = np.asarray(x)
+    ints, lo, n_codes = _integer_codes(x)
+
+    if ints is None:
+        counts = pd.Series(x).value_counts(sort=False).values
+        n_codes = counts.shape[0]
+    else:
+        n = ints.shape[0]
+        counts = np.zeros(n_codes, dtype=np.int64)
+
+        # only check the bound if partitioning the counts is cheap relative to counting a block
+        step = block_size if (ratio is not None and n_codes <= block_size) else n
+        for start in range(0, n, step):
+            stop = start + step
+            counts += np.bincount(ints[start:stop].astype(np.int64) - lo, minlength=n_codes)
+            if stop < n and n_codes > 1:
+                second, top = np.partition(counts, n_codes - 2)[-2:]
+                if top + (n - stop) < ratio * second:
+                    break
+
+    if n_codes < 2:
+        return (counts[0] if n_codes else 0), 0
+
+    second, top = np.partition(counts, n_codes - 2)[-2:]
+    return top, second
+
 
 def _near_zero_variance_ratio(series, ratio):
     """Perform NZV filtering based on a ratio of the
@@ -531,33 +760,43 @@ def _near_zero_variance_ratio(series, ratio):
 
     Parameters
     ----------
-    
-    series : pandas ``Series``, shape=(n_samples,)
-        The series on which to compute ``value_counts``.
+
+    series : pandas ``Series`` or np.ndarray, shape=(n_samples,)
+        The series on which to compute the value counts.
+
+    ratio : float
+        The ratio at or above which the feature will be dropped.
 
     Returns
     -------
 
     ratio_ : float
         The ratio of the most-prevalent value
-        to the second-most-prevalent value.
+        to the second-most-prevalent value. If the feature
+        is kept, this may have been computed from the first
+        rows only (see ``_top_two_counts``).
 
     drop_ : int
         Whether to keep the feature or drop it.
         1 if drop, 0 if keep.
     """
-    counts = series.value_counts().sort_values(ascending=False)
+    top, second = _top_two_counts(series, ratio)
 
     # if there's only one value...
-    if counts.shape[0] < 2:
+    if not second:
         return np.nan, 1
 
-    ratio_ = counts.iloc[0] / counts.iloc[1]
+    ratio_ = top / second
     drop_ = int(ratio_ >= ratio)
 
     return ratio_, drop_
 
 
+def _near_zero_variance_ratios(columns, ratio):
+    """Compute ``_near_zero_variance_ratio`` for each of a batch of columns."""
+    return [_near_zero_variance_ratio(col, ratio) for col in columns]
+
+
 class NearZeroVarianceFilterer(_BaseFeatureSelector):
     """Identify and remove any features that have a variance below
     a certain threshold. There are two possible strategies for near-zero
@@ -600,6 +839,16 @@ class NearZeroVarianceFilterer(_BaseFeatureSelector):
         ``threshold`` to the second-most frequent value. **Note** that if 
         ``strategy`` is 'ratio', ``threshold`` must be greater than 1.
 
+    n_jobs : int, 1 by default
+       The number of jobs to use for the computation when ``strategy``
+       is 'ratio'. This works by splitting the features into one batch
+       per job and counting each batch's values in parallel.
+
+       If -1 all CPUs are used. If 1 is given, no parallel computing code
+       is used at all, which is useful for debugging. For n_jobs below -1,
+       (n_cpus + 1 + n_jobs) are used. Thus for n_jobs = -2, all CPUs but
+       one are used.
+
 
     Examples
     --------
@@ -643,11 +892,13 @@ class NearZeroVarianceFilterer(_BaseFeatureSelector):
            Modeling" (2013). New York, NY: Springer.
     """
 
-    def __init__(self, cols=None, threshold=1e-6, as_df=True, strategy='variance'):
+    def __init__(self, cols=None, threshold=1e-6, as_df=True, strategy='variance', n_jobs=1):
         super(NearZeroVarianceFilterer, self).__init__(cols=cols, as_df=as_df)
         self.threshold = threshold
         self.strategy = strategy
+        self.n_jobs = n_jobs
 
+    @profiled
     def fit(self, X, y=None):
         """Fit the transformer.
 
@@ -691,8 +942,18 @@ class NearZeroVarianceFilterer(_BaseFeatureSelector):
             if not ratio > 1.0:
                 raise ValueError('when strategy=="ratio", threshold must be greater than 1.0')
 
-            # get a np.array mask
-            matrix = np.array([_near_zero_variance_ratio(X[col], ratio) for col in cols])
+            # count the values of one batch of columns per job, rather
+            # than dispatching each (typically cheap) column on its own
+            if self.n_jobs == 1:
+                matrix = np.array(_near_zero_variance_ratios((X[col].values for col in cols), ratio))
+            else:
+                n_batches = min(len(cols), self.n_jobs if self.n_jobs > 0 else cpu_count() + 1 + self.n_jobs)
+                batches = np.array_split(np.asarray(cols), max(n_batches, 1))
+                results = Parallel(n_jobs=self.n_jobs)(
+                    delayed(_near_zero_variance_ratios)([X[col].values for col in batch], ratio)
+                    for batch in batches)
+                matrix = np.array([r for batch in results for r in batch])
+
             drop_mask = matrix[:, 1].astype(np.bool)
             self.drop_ = np.asarray(cols)[drop_mask].tolist()
             self.var_ = dict(zip(self.drop_, matrix[drop_mask, 0].tolist()))  # just retain the variances
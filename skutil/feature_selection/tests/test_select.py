@@ -2,8 +2,8 @@ from __future__ import print_function
 import numpy as np
 import pandas as pd
 import warnings
-from skutil.odr import QRDecomposition
 from skutil.feature_selection import combos
+from skutil.feature_selection.select import _near_zero_variance_ratio, _top_two_counts
 from numpy.testing import (assert_array_equal, assert_almost_equal, assert_array_almost_equal)
 from sklearn.datasets import load_iris
 from skutil.feature_selection import *
@@ -229,6 +229,126 @@ def test_multi_collinearity():
     # make sure non-square will fail
     assert_fails(filter_collinearity, ValueError, pd.DataFrame.from_records(np.ones((3, 2))), 0.6)
 
+    # the correlation matrix passed in should not be altered
+    c = X.corr().abs()
+    c_copy = c.copy()
+    drops, macor, corrz = filter_collinearity(c, 0.85)
+    assert c.equals(c_copy)
+    assert drops == ['petal length (cm)']
+    assert corrz[0].feature_x == 'petal length (cm)'
+    assert_almost_equal(corrz[0].mac, macor[0])
+
+
+def test_filter_collinearity_wide():
+    # build a wide frame with lots of correlated features
+    rs = np.random.RandomState(42)
+    n_features = 60
+    latent = rs.rand(250, 6)
+    wide = pd.DataFrame.from_records(
+        data=latent.dot(rs.rand(6, n_features)) + rs.rand(250, n_features) * 0.1,
+        columns=['f%i' % i for i in range(n_features)])
+
+    c = wide.corr().abs()
+    drops, macor, corrz = filter_collinearity(c, 0.9)
+    assert len(drops) == len(set(drops)) == len(macor) == len(corrz)
+
+    # none of the remaining features should be over the threshold
+    kept = [nm for nm in wide.columns if nm not in drops]
+    remaining = c.loc[kept, kept].values.copy()
+    np.fill_diagonal(remaining, 0.)
+    assert len(kept) <= 2 or remaining.max() < 0.9
+
+
+def _old_filter_collinearity(c, threshold):
+    # the original (pandas) greedy elimination, which restarts the scan
+    # over the remaining columns from the first after each drop
+    c = c.copy()
+    drops, macor, partners = [], [], []
+    finished = False
+    while not finished:
+        for i, nm in enumerate(c.columns):
+            this_col = c[nm].drop(nm).sort_values(na_position='first')
+            this_col_nms = this_col.index.tolist()
+            this_col = np.array(this_col)
+
+            max_cor = this_col[-1]
+            if pd.isnull(max_cor) or max_cor < threshold or this_col.shape[0] == 1:
+                if i == c.columns.shape[0] - 1:
+                    finished = True
+                continue
+
+            other_col_nm = this_col_nms[-1]
+            that_col = c[other_col_nm].drop(other_col_nm)
+            mn_1, mn_2 = np.nanmean(this_col), np.nanmean(that_col)
+            if pd.isnull(mn_1):
+                drop_nm = other_col_nm
+            elif pd.isnull(mn_2):
+                drop_nm = nm
+            else:
+                drop_nm = nm if mn_1 > mn_2 else other_col_nm
+
+            c.drop(drop_nm, axis=1, inplace=True)
+            c.drop(drop_nm, axis=0, inplace=True)
+            drops.append(drop_nm)
+            macor.append(np.maximum(mn_1, mn_2))
+            partners.append(nm if not nm == drop_nm else other_col_nm)
+            break
+
+    return drops, macor, partners
+
+
+def test_filter_collinearity_parity():
+    # the vectorized elimination drops the same columns, in the same order, as the original
+    rs = np.random.RandomState(7)
+    n_features = 80
+    latent = rs.rand(300, 8)
+    wide = pd.DataFrame.from_records(
+        data=latent.dot(rs.rand(8, n_features)) + rs.rand(300, n_features) * 0.2,
+        columns=['f%i' % i for i in range(n_features)])
+
+    # rounding makes for many tied correlations, and NaNs for undefined ones
+    c = wide.corr().abs().round(2)
+    c.iloc[3, 5] = c.iloc[5, 3] = np.nan
+    for threshold in (0.8, 0.9, 0.95):
+        drops, macor, corrz = filter_collinearity(c, threshold)
+        old_drops, old_macor, old_partners = _old_filter_collinearity(c, threshold)
+        assert drops, threshold
+        assert drops == old_drops
+        assert [t.feature_y for t in corrz] == old_partners
+        assert_array_almost_equal(macor, old_macor)
+
+
+def test_multi_collinearity_chunks():
+    chunks = [X.iloc[i:i + 40] for i in range(0, X.shape[0], 40)]
+
+    for method in ('pearson', 'spearman'):
+        full = MulticollinearityFilterer(method=method).fit(X)
+        chunked = MulticollinearityFilterer(method=method, n_jobs=2).fit_chunks(chunks)
+        assert full.drop_ == chunked.drop_
+        assert_array_almost_equal(full.mean_abs_correlations_, chunked.mean_abs_correlations_)
+
+        # the chunked fit should transform just the same
+        assert chunked.transform(X).shape[1] == 3
+        assert chunked.cols is None
+
+    # accumulated correlations should match pandas'
+    cols = X.columns.tolist()
+    chunked = MulticollinearityFilterer(cols=cols[:3], method='spearman', threshold=0.1).fit_chunks(lambda: iter(chunks))
+    expected = filter_collinearity(X[cols[:3]].corr(method='spearman').abs(), 0.1)
+    assert chunked.drop_ == expected[0]
+    assert_array_almost_equal(chunked.mean_abs_correlations_, expected[1])
+
+    # spearman needs two passes, so a generator will not work
+    assert_fails(MulticollinearityFilterer(method='spearman').fit_chunks, ValueError, (c for c in chunks))
+
+    # but a one-shot iterator works for pearson
+    assert MulticollinearityFilterer().fit_chunks(c for c in chunks).drop_ == ['petal length (cm)']
+
+    # kendall can't be chunked, and bad methods fail
+    assert_fails(MulticollinearityFilterer(method='kendall').fit_chunks, ValueError, chunks)
+    assert_fails(MulticollinearityFilterer(method='bad').fit, ValueError, X)
+    assert not MulticollinearityFilterer(method='kendall').fit(X).drop_
+
 
 def test_nzv_filterer():
     transformer = NearZeroVarianceFilterer().fit(X)
@@ -271,6 +391,51 @@ def test_nzv_filterer():
     assert len(transformer.var_) == 1
     assert transformer.var_['a'] == 3.0
 
+    # the batched parallel fit should match the serial one
+    transformer = NearZeroVarianceFilterer(strategy='ratio', threshold=3.0, n_jobs=2).fit(df)
+    assert transformer.drop_ == ['a']
+    assert transformer.var_ == {'a': 3.0}
+
+
+def test_nzv_ratio_kernel():
+    rs = np.random.RandomState(42)
+
+    def legacy(s):
+        counts = s.value_counts().sort_values(ascending=False)
+        return np.nan if counts.shape[0] < 2 else counts.iloc[0] / counts.iloc[1]
+
+    columns = [
+        rs.randint(0, 3, 500),  # offset integer codes
+        rs.randint(-5, 5, 500).astype(np.int8),  # would overflow if offset in int8
+        np.array([10 ** 9, -10 ** 9] * 5),  # too wide for bincount, hashed
+        rs.rand(500).round(1),  # floats, hashed
+        np.array([1.0, np.nan, 1.0, 2.0, np.nan]),  # NaNs are not counted
+        rs.rand(10) > 0.5,
+        np.array(['a', 'b', 'a', 'c', 'a'], dtype=object),
+        np.ones(20)
+    ]
+
+    for col in columns:
+        expected = legacy(pd.Series(col))
+        ratio_, drop_ = _near_zero_variance_ratio(pd.Series(col), 2.0)
+
+        if np.isnan(expected):
+            assert np.isnan(ratio_) and drop_ == 1
+        else:
+            assert_almost_equal(ratio_, expected)
+            assert drop_ == int(expected >= 2.0)
+
+    # stop early once the column cannot reach the ratio: after s rows,
+    # the best case for the top value is s / 2 + (200000 - s) < 2 * s / 2
+    col = np.tile([0, 1], 100000)
+    top, second = _top_two_counts(col, ratio=2.0, block_size=1000)
+    assert (top, second) == (67000, 67000)
+    assert _top_two_counts(col) == (100000, 100000)
+
+    # but not if it might
+    col = np.concatenate([np.tile([0, 1], 500), np.zeros(100000, dtype=np.int64)])
+    assert _top_two_counts(col, ratio=2.0, block_size=1000) == (100500, 500)
+
 
 def test_feature_dropper_warning():
     x = np.array([
@@ -304,6 +469,48 @@ def test_linear_combos():
     # test too few features
     assert_fails(LinearCombinationFilterer(cols=['A']).fit, ValueError, Z)
 
+    # only the right-most column in each dependency is dropped, in one pass
+    rs = np.random.RandomState(42)
+    a, b, c = rs.rand(3, 50)
+    df = pd.DataFrame.from_records(data=np.array([np.zeros(50), a, 2 * a, b, a + b, c]).T,
+                                   columns=['zero', 'a', 'a2', 'b', 'ab', 'c'])
+    assert LinearCombinationFilterer().fit(df).drop_ == ['zero', 'a2', 'ab']
+
+    # more features than rows
+    wide = pd.DataFrame.from_records(data=rs.rand(20, 30))
+    assert LinearCombinationFilterer().fit(wide).drop_ == list(range(20, 30))
+
+    # dependencies that span blocks
+    x = rs.rand(100, 60)
+    x = np.hstack([x, x[:, :5].dot(rs.rand(5, 3)), x[:, 40:].dot(rs.rand(20, 2))])
+    assert_array_equal(combos._dependent_columns(x, block_size=16), np.arange(60, 65))
+
+
+def test_linear_combos_chunks():
+    rs = np.random.RandomState(42)
+    x = rs.rand(1000, 40)
+    x[:, 10] = x[:, :3].dot([1., -2., 0.5])
+    x[:, 25] = 0.
+    x[:, 31] = x[:, 12] + x[:, 30]
+    df = pd.DataFrame.from_records(data=x, columns=['f%i' % i for i in range(40)])
+
+    # the cross-product path should resolve the same dependencies as the QR path
+    lcf = LinearCombinationFilterer().fit(df)
+    assert lcf.drop_ == ['f10', 'f25', 'f31']
+
+    chunks = [df.iloc[i:i + 150] for i in range(0, 1000, 150)]
+    assert LinearCombinationFilterer().fit_chunks(chunks).drop_ == lcf.drop_
+    assert_array_equal(combos._dependent_columns_gram(x.T.dot(x)), [10, 25, 31])
+
+    # only the selected cols
+    lcf = LinearCombinationFilterer(cols=['f0', 'f1', 'f2', 'f10', 'f11']).fit_chunks(chunks)
+    assert lcf.drop_ == ['f10']
+    assert lcf.transform(df).shape[1] == 39
+
+    # no rows, too few features
+    assert_fails(LinearCombinationFilterer().fit_chunks, ValueError, [])
+    assert_fails(LinearCombinationFilterer(cols=['f0']).fit_chunks, ValueError, chunks)
+
 
 def test_sparsity():
     x = np.array([
@@ -335,16 +542,57 @@ def test_sparsity():
     assert not filt.drop_
 
 
-def test_enum_lc():
-    z = np.array([
-        [1, 2, 3],
-        [4, 5, 6],
-        [7, 8, 9],
-        [10, 11, 12]
-    ])
-
-    a, b = combos._enum_lc(QRDecomposition(z))[0], np.array([2, 0, 1])
-    assert (a == b).all(), 'should be [2,0,1] but got %s' % a
-    assert not combos._enum_lc(QRDecomposition(iris.data))
-
-    assert_array_equal(combos._enum_lc(QRDecomposition(y))[0], np.array([2, 1]))
+def test_feature_screener():
+    rs = np.random.RandomState(42)
+    x = X.copy()
+    x['zeros'] = np.zeros(x.shape[0])
+    x['sparse'] = np.nan
+    x['half'] = rs.rand(x.shape[0])
+    x.loc[x.index[:100], 'half'] = np.nan
+    x['noise'] = rs.rand(x.shape[0])
+
+    # running the three back to back...
+    sparse = SparseFeatureDropper().fit(x)
+    x_sparse = sparse.transform(x)
+    nzv = NearZeroVarianceFilterer().fit(x_sparse)
+    mcf = MulticollinearityFilterer().fit(nzv.transform(x_sparse))
+
+    # ...should yield the same drops as the screener
+    screener = FeatureScreener().fit(x)
+    assert screener.sparse_drop_ == sparse.drop_ == ['sparse', 'half']
+    assert screener.nzv_drop_ == nzv.drop_ == ['zeros']
+    assert screener.collinear_drop_ == mcf.drop_ == ['petal length (cm)']
+    assert screener.drop_ == sparse.drop_ + nzv.drop_ + mcf.drop_
+    assert_array_almost_equal(screener.sparsity_, sparse.sparsity_)
+    assert_array_almost_equal(screener.mean_abs_correlations_, mcf.mean_abs_correlations_)
+    assert screener.transform(x).columns.tolist() == mcf.transform(nzv.transform(x_sparse)).columns.tolist()
+
+    # fitting in chunks should produce the same thing
+    chunks = [x.iloc[i:i + 35] for i in range(0, x.shape[0], 35)]
+    chunked = FeatureScreener(n_jobs=2).fit_chunks(chunks)
+    assert chunked.drop_ == screener.drop_
+    assert_array_almost_equal(chunked.sparsity_, screener.sparsity_)
+
+    # the ratio strategy and spearman
+    df = pd.DataFrame.from_records(data=np.array([
+        [1, 2, 3, 1],
+        [1, 5, 3, 2],
+        [1, 2, 4, 3],
+        [2, 5, 4, 4]
+    ]), columns=['a', 'b', 'c', 'd'])
+    nzv = NearZeroVarianceFilterer(strategy='ratio', threshold=3.0).fit(df)
+    screener = FeatureScreener(strategy='ratio', variance_threshold=3.0, method='spearman').fit(df)
+    assert screener.nzv_drop_ == nzv.drop_ == ['a']
+    assert screener.var_ == nzv.var_
+    mcf = MulticollinearityFilterer(method='spearman').fit(nzv.transform(df))
+    assert screener.collinear_drop_ == mcf.drop_
+
+    # non-finite values in a feature that isn't sparse enough to drop
+    x.loc[x.index[0], 'noise'] = np.inf
+    assert_fails(FeatureScreener().fit, ValueError, x)
+
+    # bad params
+    assert_fails(FeatureScreener(sparsity_threshold=1.0).fit, ValueError, X)
+    assert_fails(FeatureScreener(strategy='bad').fit, ValueError, X)
+    assert_fails(FeatureScreener(strategy='ratio', variance_threshold=0.5).fit, ValueError, X)
+    assert_fails(FeatureScreener(method='kendall').fit, ValueError, X)
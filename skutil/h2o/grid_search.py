@@ -3,7 +3,9 @@
 # License: BSD
 
 from __future__ import division, print_function, absolute_import
+import threading
 import time
+import uuid
 from abc import abstractmethod
 import h2o
 import numpy as np
@@ -14,7 +16,7 @@ try:
 except ImportError:
     from h2o.estimators.estimator_base import H2OEstimator
 
-from .pipeline import H2OPipeline
+from .pipeline import H2OPipeline, _PreTransformCache
 from .frame import _check_is_1d_frame
 from .base import check_frame, BaseH2OFunctionWrapper, validate_x_y, VizMixin
 from ..base import overrides, since
@@ -26,7 +28,7 @@ from ..metrics import GainsStatisticalReport
 from .split import *
 from . import metrics
 
-from sklearn.externals.joblib import logger
+from sklearn.externals.joblib import Parallel, delayed, cpu_count, logger
 from sklearn.base import clone
 from sklearn.utils.validation import check_is_fitted
 from sklearn.externals import six
@@ -107,10 +109,14 @@ def _kv_str(k, v):
     return k, v
 
 
-def _clone_h2o_obj(estimator, ignore=False, **kwargs):
+def _clone_h2o_obj(estimator, ignore=False, cache=None, **kwargs):
     # do initial clone
     est = clone(estimator)
 
+    # share the grid search's cache of fitted pre-processing steps
+    if cache is not None:
+        est._pre_transform_cache = cache
+
     # set kwargs:
     if kwargs:
         for k, v in six.iteritems(kwargs):
@@ -212,9 +218,9 @@ def _score(estimator, frame, target_feature, scorer, is_regression, **kwargs):
     return scorer.score(y_truth, pred, **kwargs)
 
 
-def _fit_and_score(estimator, frame, feature_names, target_feature,
+def _fit_and_score(estimator, train_frame, test_frame, feature_names, target_feature,
                    scorer, parameters, verbose, scoring_params,
-                   train, test, is_regression, act_args,
+                   test, is_regression, act_args,
                    cv_fold, iteration):
     """Fits the current fold on the current parameters.
 
@@ -224,8 +230,11 @@ def _fit_and_score(estimator, frame, feature_names, target_feature,
         estimator : H2OPipeline or H2OEstimator
             The estimator to fit
 
-        frame : H2OFrame, shape=(n_samples, n_features)
-            The training frame
+        train_frame : H2OFrame, shape=(n_train_samples, n_features)
+            The train fold of the training frame
+
+        test_frame : H2OFrame, shape=(n_test_samples, n_features)
+            The test fold of the training frame
 
         feature_names : iterable (str)
             The feature names on which to train
@@ -245,11 +254,8 @@ def _fit_and_score(estimator, frame, feature_names, target_feature,
         scoring_params : dict
             The parameters to pass as kwargs to the scoring function
 
-        train : iterable, shape=(n_train_samples,)
-            The train fold indices
-
         test : iterable, shape=(n_test_samples,)
-            The test fold indices
+            The (sorted) test fold indices
 
         is_regression : bool
             Whether we are fitting a continuous target
@@ -295,11 +301,6 @@ def _fit_and_score(estimator, frame, feature_names, target_feature,
             msg = 'Target: %s; %s' % (target_feature, ', '.join('%s=%s' % (k, v) for k, v in parameters.items()))
         print("[CV (iter %i, fold %i)] %s %s" % (iteration, cv_fold, msg, (64 - len(msg)) * '.'))
 
-    # h2o doesn't currently re-order rows... and sometimes will
-    # complain for some reason. We need to sort our train/test idcs
-    train = sorted(train)
-    test = sorted(test)
-
     # if act_args, then it's a gains search. We just need to slice
     # our existing numpy arrays
     if act_args is not None:
@@ -311,10 +312,6 @@ def _fit_and_score(estimator, frame, feature_names, target_feature,
     else:
         kwargs = scoring_params
 
-    # generate split
-    train_frame = frame[train, :]
-    test_frame = frame[test, :]
-
     start_time = time.time()
 
     # it's probably a pipeline
@@ -362,6 +359,114 @@ def _fit_and_score(estimator, frame, feature_names, target_feature,
     return out
 
 
+def _split_folds(frame, folds):
+    """Slice the train and test frames of each fold once, and assign them
+    to new keys on the cluster, so they are shared by every parameter set
+    (rather than sliced anew for each) until they are removed with
+    ``_remove_frames`` at the end of the search.
+
+    Parameters
+    ----------
+
+    frame : H2OFrame, shape=(n_samples, n_features)
+        The training frame
+
+    folds : list
+        The (train, test) indices of each fold
+
+    Returns
+    -------
+
+    fold_frames : list
+        The (train_frame, test_frame) of each fold
+    """
+    prefix = 'skutil_cv_%s' % uuid.uuid4().hex
+    fold_frames = []
+    try:
+        for cv_fold, (train, test) in enumerate(folds):
+            fold_frames.append((h2o.assign(frame[train, :], '%s_train_%i' % (prefix, cv_fold)),
+                                h2o.assign(frame[test, :], '%s_test_%i' % (prefix, cv_fold))))
+    except:
+        _remove_frames(fold_frames)
+        raise
+    return fold_frames
+
+
+def _remove_frames(fold_frames):
+    """Remove the fold frames from the cluster"""
+    for frames in fold_frames:
+        for f in frames:
+            h2o.remove(f)
+
+
+class _OrderedScorer(object):
+    """Serializes the calls to a scorer from concurrent ``_fit_and_score``
+    jobs, in the order of the jobs. The ``GainsStatisticalReport`` records the
+    statistics of each fold as it is scored (and the scorers are not otherwise
+    thread-safe), so the folds are scored exactly in the order they would be
+    sequentially, while the (far more expensive) training runs concurrently.
+
+    Parameters
+    ----------
+
+    scorer : H2OScorer or GainsStatisticalReport
+        The scorer to wrap.
+    """
+
+    def __init__(self, scorer):
+        self.scorer = scorer
+        self._next = 0
+        self._cond = threading.Condition()
+
+    def turn(self, index):
+        """The scorer as seen by the ``index``-th job"""
+        return _ScorerTurn(self, index)
+
+
+class _ScorerTurn(object):
+    """Scores once all of the jobs before it have, and then passes the
+    turn to the next job. A job that fails before scoring must still
+    ``release`` its turn, or the jobs after it will never score."""
+
+    def __init__(self, ordered, index):
+        self.ordered = ordered
+        self.index = index
+        self.released = False
+
+    def _wait(self):
+        ordered = self.ordered
+        with ordered._cond:
+            while ordered._next != self.index:
+                ordered._cond.wait()
+
+    def score(self, y_truth, pred, **kwargs):
+        self._wait()
+        try:
+            return self.ordered.scorer.score(y_truth, pred, **kwargs)
+        finally:
+            self.release()
+
+    def release(self):
+        """Pass the turn to the next job (only the first call has any effect)"""
+        if self.released:
+            return
+
+        self._wait()
+        ordered = self.ordered
+        with ordered._cond:
+            self.released = True
+            ordered._next += 1
+            ordered._cond.notify_all()
+
+
+def _fit_and_score_in_turn(turn, **kwargs):
+    """Run ``_fit_and_score``, scoring with the job's ``_ScorerTurn``"""
+    try:
+        return _fit_and_score(scorer=turn, **kwargs)
+    finally:
+        turn.release()
+
+
 class BaseH2OSearchCV(BaseH2OFunctionWrapper, VizMixin):
     """Base for all H2O grid searches"""
 
@@ -374,7 +479,7 @@ class BaseH2OSearchCV(BaseH2OFunctionWrapper, VizMixin):
                  scoring_params=None,
                  cv=5, verbose=0, iid=True,
                  validation_frame=None,
-                 minimize='bias'):
+                 minimize='bias', n_jobs=1, cache_size=None):
 
         super(BaseH2OSearchCV, self).__init__(target_feature=target_feature,
                                               min_version=self._min_version,
@@ -389,6 +494,8 @@ class BaseH2OSearchCV(BaseH2OFunctionWrapper, VizMixin):
         self.iid = iid
         self.validation_frame = validation_frame
         self.minimize = minimize
+        self.n_jobs = n_jobs
+        self.cache_size = cache_size
 
     def _fit(self, X, parameter_iterable):
         """Actual fitting,  performing the search over parameters."""
@@ -462,18 +569,34 @@ class BaseH2OSearchCV(BaseH2OFunctionWrapper, VizMixin):
         # do first clone, remember to set the names...
         base_estimator = _clone_h2o_obj(self.estimator, **nms)
 
-        # do fits, scores
-        out = [
-            _fit_and_score(estimator=_clone_h2o_obj(base_estimator),
-                           frame=X, feature_names=self.feature_names,
-                           target_feature=self.target_feature,
-                           scorer=self.scoring_class_, parameters=params,
-                           verbose=self.verbose, scoring_params=self.scoring_params,
-                           train=train, test=test, is_regression=self.is_regression_,
-                           act_args=xtra, cv_fold=cv_fold, iteration=iteration)
-            for iteration, params in enumerate(parameter_iterable)
-            for cv_fold, (train, test) in enumerate(cv.split(X, self.target_feature))
-            ]
+        # the folds are split once, so every parameter set sees the same folds.
+        # h2o doesn't currently re-order rows... and sometimes will
+        # complain for some reason. We need to sort our train/test idcs
+        folds = [(sorted(train), sorted(test)) for train, test in cv.split(X, self.target_feature)]
+        jobs = [(iteration, params, cv_fold)
+                for iteration, params in enumerate(parameter_iterable)
+                for cv_fold in range(len(folds))]
+
+        # do fits, scores. The jobs train concurrently (if n_jobs != 1), but
+        # are scored in order, so the results do not depend on n_jobs
+        scorer = _OrderedScorer(self.scoring_class_)
+        cache = self._new_cache(base_estimator, len(folds))
+        fold_frames = _split_folds(X, folds)
+        try:
+            out = Parallel(n_jobs=self.n_jobs, backend='threading')(
+                delayed(_fit_and_score_in_turn)(
+                    scorer.turn(index), estimator=_clone_h2o_obj(base_estimator, cache=cache),
+                    train_frame=fold_frames[cv_fold][0], test_frame=fold_frames[cv_fold][1],
+                    feature_names=self.feature_names,
+                    target_feature=self.target_feature, parameters=params,
+                    verbose=self.verbose, scoring_params=self.scoring_params,
+                    test=folds[cv_fold][1], is_regression=self.is_regression_,
+                    act_args=xtra, cv_fold=cv_fold, iteration=iteration)
+                for index, (iteration, params, cv_fold) in enumerate(jobs))
+        finally:
+            if cache is not None:
+                cache.clear()
+            _remove_frames(fold_frames)
 
         # Out is a list of quad: score, n_test_samples, estimator, parameters
         n_fits = len(out)
@@ -582,6 +705,19 @@ class BaseH2OSearchCV(BaseH2OFunctionWrapper, VizMixin):
 
         return self
 
+    def _new_cache(self, estimator, n_folds):
+        """Create the cache the candidate pipelines share
+        for their pre-processing steps, if any"""
+        if not isinstance(estimator, H2OPipeline) or len(estimator.steps) < 2 or self.cache_size == 0:
+            return None
+
+        max_size = self.cache_size
+        if max_size is None:
+            # every fold's steps, plus those of the jobs running concurrently
+            n_jobs = self.n_jobs if self.n_jobs > 0 else cpu_count() + 1 + self.n_jobs
+            max_size = (n_folds + n_jobs) * (len(estimator.steps) - 1)
+        return _PreTransformCache(max_size)
+
     def score(self, frame):
         """After the grid search is fit, generates and scores 
         the predictions of the ``best_estimator_``.
@@ -914,6 +1050,20 @@ class H2OGridSearchCV(BaseH2OSearchCV):
         Alternatively, 'variance' will select the model which minimizes
         the standard deviations between cross validation scores.
 
+    n_jobs : int, optional (default=1)
+        The number of (parameter set, fold) combinations to train concurrently,
+        in threads that submit their jobs to the H2O cluster. If -1, one thread
+        per CPU is used. The folds are scored in the same order regardless,
+        so ``grid_scores_`` does not depend on ``n_jobs``.
+
+    cache_size : int, optional (default=None)
+        If ``estimator`` is an ``H2OPipeline``, the maximum number of its fitted
+        pre-processing steps (and the frames they produced) to cache, so that
+        candidates that differ only in the parameters of later steps (i.e., of
+        the final estimator) reuse the steps fit on the same fold, rather than
+        refitting them. If None, every fold's steps are cached; if 0, nothing
+        is. The cached frames are removed from the cluster at the end of ``fit``.
+
 
     .. versionadded:: 0.1.0
     """
@@ -923,7 +1073,7 @@ class H2OGridSearchCV(BaseH2OSearchCV):
                  scoring=None, scoring_params=None,
                  cv=5, verbose=0, iid=True,
                  validation_frame=None,
-                 minimize='bias'):
+                 minimize='bias', n_jobs=1, cache_size=None):
         super(H2OGridSearchCV, self).__init__(
             estimator=estimator,
             feature_names=feature_names,
@@ -931,7 +1081,8 @@ class H2OGridSearchCV(BaseH2OSearchCV):
             scoring=scoring, scoring_params=scoring_params,
             cv=cv, verbose=verbose,
             iid=iid, validation_frame=validation_frame,
-            minimize=minimize
+            minimize=minimize, n_jobs=n_jobs,
+            cache_size=cache_size
         )
 
         self.param_grid = param_grid
@@ -1025,6 +1176,20 @@ class H2ORandomizedSearchCV(BaseH2OSearchCV):
         Alternatively, 'variance' will select the model which minimizes
         the standard deviations between cross validation scores.
 
+    n_jobs : int, optional (default=1)
+        The number of (parameter set, fold) combinations to train concurrently,
+        in threads that submit their jobs to the H2O cluster. If -1, one thread
+        per CPU is used. The folds are scored in the same order regardless,
+        so ``grid_scores_`` does not depend on ``n_jobs``.
+
+    cache_size : int, optional (default=None)
+        If ``estimator`` is an ``H2OPipeline``, the maximum number of its fitted
+        pre-processing steps (and the frames they produced) to cache, so that
+        candidates that differ only in the parameters of later steps (i.e., of
+        the final estimator) reuse the steps fit on the same fold, rather than
+        refitting them. If None, every fold's steps are cached; if 0, nothing
+        is. The cached frames are removed from the cluster at the end of ``fit``.
+
 
     .. versionadded:: 0.1.0
     """
@@ -1035,7 +1200,7 @@ class H2ORandomizedSearchCV(BaseH2OSearchCV):
                  scoring=None, scoring_params=None,
                  cv=5, verbose=0, iid=True,
                  validation_frame=None,
-                 minimize='bias'):
+                 minimize='bias', n_jobs=1, cache_size=None):
         super(H2ORandomizedSearchCV, self).__init__(
             estimator=estimator,
             feature_names=feature_names,
@@ -1043,7 +1208,8 @@ class H2ORandomizedSearchCV(BaseH2OSearchCV):
             scoring=scoring, scoring_params=scoring_params,
             cv=cv, verbose=verbose,
             iid=iid, validation_frame=validation_frame,
-            minimize=minimize
+            minimize=minimize, n_jobs=n_jobs,
+            cache_size=cache_size
         )
 
         self.param_grid = param_grid
@@ -1200,6 +1366,20 @@ class H2OGainsRandomizedSearchCV(H2ORandomizedSearchCV):
     error_behavior : str, optional (default='warn')
         How to handle the pd.qcut ValueError. One of {'warn','raise','ignore'}
 
+    n_jobs : int, optional (default=1)
+        The number of (parameter set, fold) combinations to train concurrently,
+        in threads that submit their jobs to the H2O cluster. If -1, one thread
+        per CPU is used. The folds are scored in the same order regardless,
+        so ``grid_scores_`` does not depend on ``n_jobs``.
+
+    cache_size : int, optional (default=None)
+        If ``estimator`` is an ``H2OPipeline``, the maximum number of its fitted
+        pre-processing steps (and the frames they produced) to cache, so that
+        candidates that differ only in the parameters of later steps (i.e., of
+        the final estimator) reuse the steps fit on the same fold, rather than
+        refitting them. If None, every fold's steps are cached; if 0, nothing
+        is. The cached frames are removed from the cluster at the end of ``fit``.
+
 
     .. versionadded:: 0.1.0
     """
@@ -1212,7 +1392,8 @@ class H2OGainsRandomizedSearchCV(H2ORandomizedSearchCV):
                  scoring_params=None, cv=5,
                  verbose=0, iid=True,  # n_groups=10,
                  validation_frame=None, minimize='bias',
-                 error_score=np.nan, error_behavior='warn'):
+                 error_score=np.nan, error_behavior='warn', n_jobs=1,
+                 cache_size=None):
         super(H2OGainsRandomizedSearchCV, self).__init__(
             estimator=estimator,
             param_grid=param_grid,
@@ -1222,7 +1403,8 @@ class H2OGainsRandomizedSearchCV(H2ORandomizedSearchCV):
             scoring=scoring, scoring_params=scoring_params,
             cv=cv, verbose=verbose,
             iid=iid, validation_frame=validation_frame,
-            minimize=minimize
+            minimize=minimize, n_jobs=n_jobs,
+            cache_size=cache_size
         )
 
         # self.n_groups = 10
@@ -1,4 +1,6 @@
 from __future__ import print_function, division, absolute_import
+import threading
+from collections import OrderedDict
 import h2o
 from ..base import overrides, since
 from sklearn.utils import tosequence
@@ -39,6 +41,125 @@ def _union_exclusions(a, b):
     return list(set(flatten_all([a, b])))
 
 
+def _params_key(step):
+    """A hashable key for the class and (shallow) parameters of a step"""
+    return step.__class__.__name__, repr(sorted(six.iteritems(step.get_params(deep=False))))
+
+
+class _CacheEntry(object):
+    """A fitted step, the frame it produced and the remaining feature names,
+    along with the number of pipeline fits currently using the frame"""
+    __slots__ = ('step', 'frame', 'feature_names', 'owned', 'pins', 'evicted')
+
+    def __init__(self, step, frame, feature_names, owned):
+        self.step = step
+        self.frame = frame
+        self.feature_names = feature_names
+        self.owned = owned
+        self.pins = 0
+        self.evicted = False
+
+
+class _PreTransformCache(object):
+    """A bounded, least-recently-used cache of the fitted pre-processing steps
+    of ``H2OPipeline`` instances, and of the frames they produced. A grid search
+    shares one between the pipelines it fits, so that candidates which differ
+    only in the parameters of later steps (i.e., of the final estimator) reuse
+    the steps fit on the same fold, rather than refitting them. Entries are keyed
+    by the key of the frame the pipeline was fit on, and by the parameters of the
+    step and of every step before it.
+
+    Each entry returned by ``get`` or ``put`` is pinned until it is passed to
+    ``release`` (at the end of the pipeline's fit), as its frame may still be in
+    use. The frames produced by the cached steps are removed from the cluster
+    when they are evicted, or, if they are pinned at the time, once they are
+    released. Every remaining frame is removed on ``clear``.
+
+    Parameters
+    ----------
+
+    max_size : int
+        The maximum number of entries (steps) to cache. For the cached
+        steps to be reused across candidates, this should be at least the
+        number of folds times the number of pre-processing steps (plus the
+        number of steps in the jobs running concurrently). Pinned entries
+        that are evicted are held past this bound until they are released.
+
+    remove : callable, optional (default=None)
+        The function that removes a frame from the cluster.
+        If None, ``h2o.remove``.
+    """
+
+    def __init__(self, max_size, remove=None):
+        self.max_size = max_size
+        self.remove = remove if remove is not None else h2o.remove
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._evicted = []  # evicted, but still pinned
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (and pin) the entry cached for ``key``, or None"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries[key] = entry  # now the most recently used
+            self.hits += 1
+            entry.pins += 1
+            return entry
+
+    def put(self, key, step, frame, feature_names, owned):
+        """Cache (and pin) a fitted step, the frame it produced and the remaining
+        feature names. ``owned`` is whether the frame was created by the step (and
+        not just passed through), and should thus be removed from the cluster.
+        Returns the entry. If ``key`` was already cached (by a concurrent fit),
+        nothing is cached, and the entry's frame is removed once it is released."""
+        with self._lock:
+            entry = _CacheEntry(step, frame, feature_names, owned)
+            entry.pins += 1
+            if key in self._entries:
+                self._evict(entry)
+                return entry
+
+            self._entries[key] = entry
+            while len(self._entries) > self.max_size:
+                self._evict(self._entries.popitem(last=False)[1])
+            return entry
+
+    def release(self, entries):
+        """Unpin the entries returned by ``get`` and ``put``, removing the
+        frames of any that were evicted in the meantime"""
+        with self._lock:
+            for entry in entries:
+                entry.pins -= 1
+                if entry.evicted and not entry.pins:
+                    self._evicted.remove(entry)
+                    self._remove(entry)
+
+    def clear(self):
+        """Remove every cached frame from the cluster (whether pinned or not)"""
+        with self._lock:
+            while self._entries:
+                self._remove(self._entries.popitem(last=False)[1])
+            while self._evicted:
+                self._remove(self._evicted.pop())
+
+    def _evict(self, entry):
+        if entry.pins:
+            entry.evicted = True
+            self._evicted.append(entry)
+        else:
+            self._remove(entry)
+
+    def _remove(self, entry):
+        if entry.owned:
+            self.remove(entry.frame)
+
+
 class H2OPipeline(BaseH2OFunctionWrapper, VizMixin):
     """Create a sklearn-esque pipeline of H2O steps finished with an 
     optional H2OEstimator. Note that as of version 0.1.0, the behavior
@@ -250,13 +371,31 @@ class H2OPipeline(BaseH2OFunctionWrapper, VizMixin):
         s = self.steps[-1][1]
         return s
 
-    def _pre_transform(self, frame=None):
+    def _pre_transform(self, frame=None, pinned=None):
         frame_t = frame
 
+        # if fit within a grid search, the steps may have already been
+        # fit on this frame (with the same parameters) for another candidate
+        cache = getattr(self, '_pre_transform_cache', None)
+        cache_key = None
+        if cache is not None and frame is not None and pinned is not None:
+            cache_key = (frame.frame_id, repr(self.feature_names), self.target_feature,
+                         repr(self.exclude_from_ppc))
+            self.steps = list(self.steps)  # cached steps are swapped in
+
         # we have to set the feature names at each stage to be
         # the remaining feature names (not the target though)
         next_feature_names = self.feature_names
-        for name, transform in self.steps[:-1]:
+        for i, (name, transform) in enumerate(self.steps[:-1]):
+            if cache_key is not None:
+                cache_key += ((name, _params_key(transform)),)
+                entry = cache.get(cache_key)
+                if entry is not None:
+                    pinned.append(entry)  # released at the end of fit
+                    transform, frame_t, next_feature_names = entry.step, entry.frame, entry.feature_names
+                    self.steps[i] = (name, transform)
+                    continue
+
             # for each transformer in the steps sequence, we need
             # to ensure the ``target_feature`` has been set... we do
             # this in the fit method and not the init because we've
@@ -276,6 +415,7 @@ class H2OPipeline(BaseH2OFunctionWrapper, VizMixin):
             transform.exclude_features = _union_exclusions(self.exclude_from_ppc,
                                                            transform.exclude_features)
 
+            frame_in = frame_t
             if hasattr(transform, "fit_transform"):
                 frame_t = transform.fit_transform(frame_t)
             else:
@@ -286,6 +426,10 @@ class H2OPipeline(BaseH2OFunctionWrapper, VizMixin):
             if not next_feature_names or len(next_feature_names) < 1:
                 raise ValueError('no columns retained after fit!')
 
+            if cache_key is not None:
+                pinned.append(cache.put(cache_key, transform, frame_t, next_feature_names,
+                                        owned=frame_t.frame_id != frame_in.frame_id))
+
         # this will have y re-combined in the matrix
         return frame_t, next_feature_names
 
@@ -319,28 +463,34 @@ class H2OPipeline(BaseH2OFunctionWrapper, VizMixin):
         # reset to the cleaned ones, if necessary...
         self.feature_names, self.target_feature = validate_x_y(frame, self.feature_names, self.target_feature)
 
-        # get the fit
-        Xt, training_cols_ = self._pre_transform(frame)
-
-        # if there are any exclude names, remove them from training_cols_, then assign to self
-        if self.exclude_from_fit:
-            training_cols_ = [i for i in training_cols_ if i not in self.exclude_from_fit]
-        self.training_cols_ = training_cols_
-
-        # if the last step is not an h2o estimator, we need to do things differently...
-        if isinstance(self.steps[-1][1], H2OEstimator):
-            self.steps[-1][1].train(training_frame=Xt,
-                                    x=self.training_cols_,
-                                    y=self.target_feature)
-        else:
-            _est = self.steps[-1][1]
+        # the cached frames (if fit within a grid search) used by this fit
+        pinned = []
+        try:
+            # get the fit
+            Xt, training_cols_ = self._pre_transform(frame, pinned)
+
+            # if there are any exclude names, remove them from training_cols_, then assign to self
+            if self.exclude_from_fit:
+                training_cols_ = [i for i in training_cols_ if i not in self.exclude_from_fit]
+            self.training_cols_ = training_cols_
+
+            # if the last step is not an h2o estimator, we need to do things differently...
+            if isinstance(self.steps[-1][1], H2OEstimator):
+                self.steps[-1][1].train(training_frame=Xt,
+                                        x=self.training_cols_,
+                                        y=self.target_feature)
+            else:
+                _est = self.steps[-1][1]
 
-            # set the instance members
-            _est.feature_names = self.training_cols_
-            _est.target_feature = self.target_feature
+                # set the instance members
+                _est.feature_names = self.training_cols_
+                _est.target_feature = self.target_feature
 
-            # do the fit
-            _est.fit(Xt)
+                # do the fit
+                _est.fit(Xt)
+        finally:
+            if pinned:
+                self._pre_transform_cache.release(pinned)
 
         return self
 
@@ -28,7 +28,7 @@ from skutil.h2o.util import (h2o_frame_memory_estimate, h2o_corr_plot, h2o_binco
 from skutil.h2o.grid_search import _as_numpy
 from skutil.h2o.metrics import *
 from skutil.h2o.metrics import _get_bool, h2o_precision_recall_fscore_support, _err_for_discrete, _err_for_continuous
-from skutil.h2o.grid_search import _val_exp_loss_prem
+from skutil.h2o.grid_search import _val_exp_loss_prem, _OrderedScorer
 from skutil.utils import load_iris_df, load_breast_cancer_df, shuffle_dataframe, df_memory_estimate, load_boston_df, flatten_all
 from skutil.testing import assert_fails, assert_elements_almost_equal
 from skutil.feature_selection import NearZeroVarianceFilterer
@@ -39,13 +39,14 @@ from skutil.h2o.split import (check_cv, H2OKFold,
 from skutil.h2o.balance import H2OUndersamplingClassBalancer, H2OOversamplingClassBalancer
 from skutil.h2o.transform import H2OSelectiveImputer, H2OInteractionTermTransformer, H2OSelectiveScaler
 from skutil.h2o.frame import is_integer, is_float, value_counts
-from skutil.h2o.pipeline import _union_exclusions
+from skutil.h2o.pipeline import _union_exclusions, _PreTransformCache
 from skutil.h2o.select import _validate_use
 from skutil.base import overrides
 
 from sklearn.datasets import load_iris, load_boston
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.externals import six
+from sklearn.externals.joblib import Parallel, delayed
 from sklearn.base import BaseEstimator
 from scipy.stats import randint, uniform
 
@@ -88,6 +89,34 @@ def new_estimators():
     )
 
 
+class _RecordingScorer(object):
+    """A stand-in for a (stateful) scorer, which records the order of its calls"""
+
+    def __init__(self):
+        self.scored = []
+
+    def score(self, y_truth, pred, **kwargs):
+        self.scored.append(pred)
+        return -pred
+
+
+def _job_in_turn(turn, index):
+    # (these are module-level, since joblib pickles the functions it is given)
+    time.sleep(0.01 * (8 - index))  # later jobs finish training first
+    if index == 3:
+        raise ValueError('failed before scoring')
+    return turn.score(None, index)
+
+
+def _run_in_turn(turn, index):
+    try:
+        return _job_in_turn(turn, index)
+    except ValueError:
+        return None
+    finally:
+        turn.release()
+
+
 def test_h2o_no_conn_needed():
     # make an anonymous class that extends base h2o
     class AnonH2O(BaseH2OFunctionWrapper):
@@ -152,6 +181,47 @@ def test_h2o_no_conn_needed():
     assert _get_bool([True, False])
     assert_fails(_err_for_discrete, ValueError, 'binary')  # this method fails on non-'continuous'
 
+    # test that concurrent grid search jobs score in order with a stand-in (stateful) scorer
+    recorder = _RecordingScorer()
+    ordered = _OrderedScorer(recorder)
+    out = Parallel(n_jobs=4, backend='threading')(delayed(_run_in_turn)(ordered.turn(i), i) for i in range(8))
+    assert out == [0, -1, -2, None, -4, -5, -6, -7]
+    assert recorder.scored == [0, 1, 2, 4, 5, 6, 7]
+
+    # test the LRU cache of pipelines' fitted pre-processing steps, with a stand-in for h2o.remove
+    removed = []
+    cache = _PreTransformCache(max_size=2, remove=removed.append)
+    a = cache.put(('fold0', 'a'), 'step_a', 'frame_a', ['x'], owned=True)
+    b = cache.put(('fold0', 'b'), 'step_b', 'frame_b', ['y'], owned=True)
+
+    # a step fit concurrently with one already cached is not cached, and its frame is removed once released
+    lost = cache.put(('fold0', 'b'), 'step_b', 'other', ['y'], owned=True)
+    assert lost.frame == 'other' and not removed
+    cache.release([a, b, lost])
+    assert removed == ['other']
+
+    hit = cache.get(('fold0', 'a'))  # a is now the most recently used
+    assert (hit.step, hit.frame, hit.feature_names) == ('step_a', 'frame_a', ['x'])
+    cache.release([hit])
+    c = cache.put(('fold0', 'c'), 'step_c', 'frame_c', ['z'], owned=False)  # evicts b
+    assert cache.get(('fold0', 'b')) is None
+    assert removed == ['other', 'frame_b']
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # an entry in use by a running fit is not removed when it is evicted, only once it is released
+    in_use = cache.get(('fold0', 'a'))
+    cache.put(('fold1', 'a'), 'step_a', 'frame_a1', ['x'], owned=True)  # evicts c (not owned)
+    cache.put(('fold1', 'b'), 'step_b', 'frame_b1', ['y'], owned=True)  # evicts a, pinned
+    assert cache.get(('fold0', 'a')) is None
+    assert removed == ['other', 'frame_b']
+    cache.release([in_use, c])
+    assert removed == ['other', 'frame_b', 'frame_a']
+
+    # clear removes everything, pinned or not
+    cache.clear()
+    assert sorted(removed) == ['frame_a', 'frame_a1', 'frame_b', 'frame_b1', 'other']
+    assert cache.get(('fold1', 'b')) is None
+
 
 # if we can't start an h2o instance, let's just pass all these tests
 def test_h2o_with_conn():
@@ -699,7 +769,7 @@ def test_h2o_with_conn():
                 grid = H2ORandomizedSearchCV(pipe, param_grid=hyper,
                                              feature_names=F.columns.tolist(), target_feature='species',
                                              scoring='accuracy_score', iid=True, verbose=0, cv=2,
-                                             validation_frame=frame)
+                                             validation_frame=frame, n_jobs=2)
 
                 grid.fit(frame)
 
@@ -1328,6 +1398,28 @@ def test_h2o_with_conn():
                 actual_names = sorted([str(u) for u in X_trans.columns])
                 assert all([expected_names[i] == actual_names[i] for i in range(len(expected_names))])
 
+                # test screening the interactions against a target
+                y_pd = X_pd.copy()
+                y_pd['y'] = X_pd['c'] * X_pd['d']
+
+                try:
+                    y_frame = H2OFrame.from_python(y_pd, column_names=y_pd.columns.tolist())[1:, :]
+                except Exception as e:
+                    y_frame = None
+
+                if y_frame is not None:
+                    trans = H2OInteractionTermTransformer(target_feature='y', screening='correlation',
+                                                          k=1, chunk_size=2)
+                    X_trans = trans.fit_transform(y_frame)
+                    assert trans.pairs_ == [('c', 'd')]
+                    assert [str(u) for u in X_trans.columns] == ['a', 'b', 'c', 'd', 'y', 'c_d_I']
+
+                    # fails without a target or limit
+                    assert_fails(H2OInteractionTermTransformer(screening='correlation', k=1).fit,
+                                 ValueError, y_frame)
+                    assert_fails(H2OInteractionTermTransformer(target_feature='y', screening='correlation').fit,
+                                 ValueError, y_frame)
+
             else:
                 pass
 
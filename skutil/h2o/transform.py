@@ -5,6 +5,7 @@ from .base import BaseH2OTransformer, _frame_from_x_y, check_frame
 from ..utils import is_numeric, flatten_all
 from ..utils.fixes import is_iterable, dict_values
 from ..preprocessing import ImputerMixin
+from ..preprocessing.transform import _interaction_scorer, _screen_interactions
 from sklearn.externals import six
 import pandas as pd
 from sklearn.utils.validation import check_is_fitted
@@ -441,6 +442,28 @@ class H2OInteractionTermTransformer(BaseH2OTransformer):
         If set to True, will only return features in feature_names
         and their respective generated interaction terms.
 
+    screening : str, callable or None, optional (default=None)
+        How to score the interaction terms against the ``target_feature``
+        in ``fit``, in order to keep only the best (per ``k`` and ``threshold``).
+        One of 'correlation' (absolute Pearson correlation), 'f_regression',
+        'f_classif', 'mutual_info_regression' or 'mutual_info_classif' (the
+        sklearn univariate scores), or a callable that takes ``(X, y)`` and returns
+        either an array of scores or a tuple of (scores, pvalues). The interaction
+        terms are generated in blocks of ``chunk_size`` columns, each of which is
+        collected and scored locally, so only one block is ever held in memory.
+        Only the kept pairs will be computed by ``transform``. If None, all
+        interaction terms are kept.
+
+    k : int or None, optional (default=None)
+        If ``screening``, the maximum number of interaction terms to keep.
+
+    threshold : float or None, optional (default=None)
+        If ``screening``, the minimum score of the interaction terms to keep.
+
+    chunk_size : int, optional (default=256)
+        The number of interaction terms generated (and scored) at once
+        when ``screening``.
+
 
     Attributes
     ----------
@@ -449,6 +472,13 @@ class H2OInteractionTermTransformer(BaseH2OTransformer):
         The interaction term function assigned 
         in the ``fit`` method.
 
+    pairs_ : list of tuples or None
+        If ``screening``, the pairs of feature names whose interaction
+        terms were kept (in the order they will be generated). Else None.
+
+    scores_ : np.ndarray or None
+        If ``screening``, the scores of the kept interaction terms. Else None.
+
 
     .. versionadded:: 0.1.0
     """
@@ -457,7 +487,8 @@ class H2OInteractionTermTransformer(BaseH2OTransformer):
     _max_version = None
 
     def __init__(self, feature_names=None, target_feature=None, exclude_features=None,
-                 interaction_function=None, name_suffix='I', only_return_interactions=False):
+                 interaction_function=None, name_suffix='I', only_return_interactions=False,
+                 screening=None, k=None, threshold=None, chunk_size=256):
 
         super(H2OInteractionTermTransformer, self).__init__(feature_names=feature_names,
                                                             target_feature=target_feature,
@@ -468,6 +499,10 @@ class H2OInteractionTermTransformer(BaseH2OTransformer):
         self.interaction_function = interaction_function
         self.name_suffix = name_suffix
         self.only_return_interactions = only_return_interactions
+        self.screening = screening
+        self.k = k
+        self.threshold = threshold
+        self.chunk_size = chunk_size
 
     def fit(self, frame):
         """Fit the transformer.
@@ -483,8 +518,9 @@ class H2OInteractionTermTransformer(BaseH2OTransformer):
 
         self
         """
-        frame = _frame_from_x_y(frame, self.feature_names, self.target_feature, self.exclude_features)
-        self.cols = [str(u) for u in frame.columns]  # the cols we'll ultimately operate on
+        target = self.target_feature
+        X = _frame_from_x_y(frame, self.feature_names, target, self.exclude_features)
+        self.cols = [str(u) for u in X.columns]  # the cols we'll ultimately operate on
         self.fun_ = self.interaction_function if self.interaction_function is not None else _mul
 
         # validate function
@@ -495,8 +531,48 @@ class H2OInteractionTermTransformer(BaseH2OTransformer):
         if len(self.cols) < 2:
             raise ValueError('need at least two features')
 
+        self.pairs_ = self.scores_ = None
+        if self.screening is not None:
+            score = _interaction_scorer(self.screening)
+            if target is None:
+                raise ValueError('target_feature is required to screen the interactions')
+            if self.k is None and self.threshold is None:
+                raise ValueError('screening requires k and/or threshold')
+            if self.chunk_size < 1:
+                raise ValueError('chunk_size must be a positive integer')
+
+            y = frame[target].as_data_frame(use_pandas=True)[target].values
+            pairs = self._pairs()
+
+            kept, self.scores_ = _screen_interactions(self._interaction_blocks(X, pairs), score,
+                                                      y, self.k, self.threshold)
+            self.pairs_ = [pairs[p] for p in kept]
+
         return self
 
+    def _pairs(self):
+        """Get the pairs of features to interact: all of
+        them, unless they were screened in ``fit``."""
+        cols = self.cols
+        if getattr(self, 'pairs_', None) is not None:
+            return self.pairs_
+        return [(cols[i], cols[j]) for i in range(len(cols) - 1) for j in range(i + 1, len(cols))]
+
+    def _interaction_blocks(self, X, pairs):
+        """Generate the interaction terms of the pairs in blocks of ``chunk_size``,
+        each collected into a local matrix along with its positions in ``pairs``."""
+        fun, chunk_size = self.fun_, self.chunk_size
+
+        for start in range(0, len(pairs), chunk_size):
+            block = None
+            for col_i, col_j in pairs[start:start + chunk_size]:
+                new_col = fun(X[col_i], X[col_j])
+                new_col.columns = ['%s_%s' % (col_i, col_j)]
+                block = new_col if block is None else block.cbind(new_col)
+
+            positions = np.arange(start, min(start + chunk_size, len(pairs)))
+            yield positions, block.as_data_frame(use_pandas=True).as_matrix()
+
     def transform(self, X):
         """Perform the interaction term expansion.
         
@@ -516,25 +592,21 @@ class H2OInteractionTermTransformer(BaseH2OTransformer):
         frame = check_frame(X, copy=True)  # get a copy
         
         cols, fun, suff = self.cols, self.fun_, self.name_suffix
-        n_features = len(cols)
 
         # these are the names to return if only_return_interactions
         interaction_names = [x for x in cols]
 
-        # we can do this in N^2 or we can do it in an uglier N choose 2...
-        for i in range(n_features - 1):
-            for j in range(i + 1, n_features):
-                col_i, col_j = cols[i], cols[j]
-
-                new_col_nm = '%s_%s_%s' % (col_i, col_j, suff)
-                new_col = fun(frame[col_i], frame[col_j])
-                new_col.columns = [new_col_nm]
+        # all of the pairs (in N choose 2), unless they were screened
+        for col_i, col_j in self._pairs():
+            new_col_nm = '%s_%s_%s' % (col_i, col_j, suff)
+            new_col = fun(frame[col_i], frame[col_j])
+            new_col.columns = [new_col_nm]
 
-                # add the new col nm to the list of interaction names
-                interaction_names.append(new_col_nm)
+            # add the new col nm to the list of interaction names
+            interaction_names.append(new_col_nm)
 
-                # cbind
-                frame = frame.cbind(new_col)
+            # cbind
+            frame = frame.cbind(new_col)
 
         # return matrix if needed
         return frame if not self.only_return_interactions else frame[interaction_names]
@@ -1,7 +1,9 @@
 """
-skutil.odr is a python port of R's QR Decomposition backend (legacy Fortran subroutines)
+skutil.odr is a python port of R's QR Decomposition backend (legacy Fortran subroutines).
+The TSQRDecomposition extends it to tall matrices that are streamed in row-chunks.
 """
 
 from .dqrutl import *
+from .tsqr import *
 
 __all__ = [s for s in dir() if not s.startswith("_")]  # Remove hiddens
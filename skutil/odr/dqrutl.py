@@ -1,6 +1,8 @@
 from __future__ import print_function, division, absolute_import
+from collections import namedtuple
 import numpy as np
 from skutil.odr import dqrsl # what happens if we make this absolute?
+from scipy.linalg import lapack, solve_triangular
 from sklearn.utils import check_array
 from sklearn.base import BaseEstimator
 from numpy.linalg import matrix_rank
@@ -24,7 +26,32 @@ def _safecall(fun, *args, **kwargs):
     fun(*args, **kwargs)
 
 
-def qr_decomposition(X, job=1):
+def _lapack_safecall(fun, *args, **kwargs):
+    """Call a scipy LAPACK wrapper whose last two outputs are (work, info),
+    first querying it for the optimal (blocked) workspace size, since the
+    wrappers' default ``lwork`` is the minimum, which forces the unblocked
+    algorithm. Raises a ``ValueError`` if ``info`` is nonzero."""
+    kwargs['lwork'] = -1
+    ret = fun(*args, **kwargs)
+    kwargs['lwork'] = int(ret[-2][0])
+
+    ret = fun(*args, **kwargs)
+    if ret[-1] != 0:
+        raise ValueError('illegal value in argument %i of LAPACK routine' % -ret[-1])
+    return ret[:-2]
+
+
+def _r_rank(qr, tol):
+    """Get the rank of a (pivoted) QR decomposition from the diagonal
+    of R: the number of diagonal elements whose magnitude is greater than
+    ``tol`` times that of the first (largest, if pivoted) element."""
+    d = np.abs(np.diag(qr))
+    if not d.shape[0] or d[0] == 0:
+        return 0
+    return int((d > tol * d[0]).sum())
+
+
+def qr_decomposition(X, job=1, engine='linpack', tol=1e-7, overwrite_X=False):
     """Performs the QR decomposition using LINPACK, BLAS and LAPACK
     Fortran subroutines.
 
@@ -38,6 +65,27 @@ def qr_decomposition(X, job=1):
         Whether to perform pivoting. 0 is False, any other value
         will be coerced to 1 (True).
 
+    engine : str, optional (default='linpack')
+        The backend, one of ('linpack', 'lapack'). If 'linpack', the
+        unblocked LINPACK ``dqrdc`` routine is used, and the rank is computed
+        via the singular value decomposition (``numpy.linalg.matrix_rank``).
+        If 'lapack', the blocked Householder LAPACK routine ``dgeqp3`` (or
+        ``dgeqrf``, if not ``job``) is used, which pivots the column with the
+        largest remaining norm to the front at each step (whereas ``dqrdc``
+        does not reorder the columns at all), and the rank is determined from
+        the diagonal of R (see ``tol``).
+
+    tol : float, optional (default=1e-7)
+        The tolerance for determining the rank when ``engine`` is 'lapack'
+        (the default tolerance of R's ``qr``). The rank is the number of
+        diagonal elements of R whose magnitude is greater than ``tol`` times
+        that of the first diagonal element.
+
+    overwrite_X : bool, optional (default=False)
+        Whether ``X`` may be overwritten with the decomposition rather than
+        copied. This avoids the copy only if ``X`` is already a
+        Fortran-ordered float64 ``np.ndarray``.
+
     Returns
     -------
 
@@ -49,13 +97,20 @@ def qr_decomposition(X, job=1):
 
     qraux : np.ndarray, shape=(n_features,)
         Contains further information required to recover
-        the orthogonal part of the decomposition.
+        the orthogonal part of the decomposition. If ``engine``
+        is 'lapack', these are the scalar factors of the elementary
+        reflectors (LAPACK's ``tau``), of shape (min(n_samples, n_features),).
 
     pivot : np.ndarray, shape=(n_features,)
         The pivot array, or None if not ``job``
     """
+    if engine not in ('linpack', 'lapack'):
+        raise ValueError('engine must be one of (\'linpack\', \'lapack\'), but got %s' % engine)
+
+    X = check_array(X, dtype=np.float64, order='F', copy=not overwrite_X)
+    if engine == 'lapack':
+        return _qr_lapack(X, job, tol)
 
-    X = check_array(X, dtype='numeric', order='F', copy=True)
     n, p = X.shape
 
     # check on size
@@ -85,6 +140,62 @@ def qr_decomposition(X, job=1):
             (pivot - 1) if job_ else None)  # subtract one because pivot started at 1 for the fortran
 
 
+def _qr_lapack(X, job, tol):
+    """Perform the QR decomposition of a Fortran-ordered float64
+    matrix in place with LAPACK. See ``qr_decomposition``."""
+    if job:
+        qr, pivot, tau = _lapack_safecall(lapack.dgeqp3, X, overwrite_a=True)
+        pivot = pivot - 1  # fortran is 1-based
+    else:
+        qr, tau = _lapack_safecall(lapack.dgeqrf, X, overwrite_a=True)
+        pivot = None
+
+    return qr, _r_rank(qr, tol), tau, pivot
+
+
+def _linpack_reflectors(qr, qraux, k):
+    """Convert the Householder transformations of a LINPACK QR decomposition
+    to LAPACK's representation, so that they can be applied to a block of
+    vectors with the blocked routine ``dormqr``. ``dqrdc`` stores the j-th
+    transformation as I - uu'/u[0], with u[0] in ``qraux[j]`` and the rest of
+    u below the diagonal, whereas LAPACK stores I - tau * vv', with v[0] = 1.
+    Thus, v = u / u[0] and tau = u[0].
+
+    Parameters
+    ----------
+
+    qr : np.ndarray, shape=(n_samples, n_features)
+        The decomposed matrix.
+
+    qraux : np.ndarray, shape=(n_features,)
+        The auxiliary output of ``dqrdc``.
+
+    k : int
+        The number of columns of the decomposition to use (i.e., the rank).
+
+    Returns
+    -------
+
+    v : np.ndarray, shape=(n_samples, n_reflectors)
+        The reflectors, stored below the diagonal. The rest is ignored.
+
+    tau : np.ndarray, shape=(n_reflectors,)
+        The scalar factors of the reflectors.
+    """
+    n_reflectors = min(k, qr.shape[0] - 1)  # as in dqrsl
+    tau = qraux[:n_reflectors].copy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        v = np.asfortranarray(qr[:, :n_reflectors] / tau)
+    v[:, tau == 0] = 0.  # the identity
+
+    return v, tau
+
+
+# The optional outputs of QRDecomposition.solve
+_QRSolveTuple = namedtuple('_QRSolveTuple', ('coef', 'qty', 'rsd', 'xb'))
+
+
 def _qr_R(qr):
     """Extract the R matrix from a QR decomposition"""
     min_dim = min(qr.shape)
@@ -106,6 +217,19 @@ class QRDecomposition(BaseEstimator):
         Whether to perform pivoting. 0 is False, any other value
         will be coerced to 1 (True).
 
+    engine : str, optional (default='linpack')
+        The backend, one of ('linpack', 'lapack'). The 'lapack' engine
+        uses the blocked Householder routine ``dgeqp3`` (which pivots by
+        column norm), and determines the rank from R rather than from a
+        separate singular value decomposition. See ``qr_decomposition``.
+
+    tol : float, optional (default=1e-7)
+        The tolerance for determining the rank when ``engine`` is 'lapack'.
+
+    overwrite_X : bool, optional (default=False)
+        Whether ``X`` may be overwritten with the decomposition rather than
+        copied (only possible if ``X`` is a Fortran-ordered float64 ``np.ndarray``).
+
     Attributes
     ----------
 
@@ -123,54 +247,127 @@ class QRDecomposition(BaseEstimator):
         The rank of the input matrix
     """
 
-    def __init__(self, X, pivot=1):
+    def __init__(self, X, pivot=1, engine='linpack', tol=1e-7, overwrite_X=False):
         self.job_ = 0 if not pivot else 1
-        self._decompose(X)
+        self.engine = engine
+        self.tol = tol
+        self._decompose(X, overwrite_X)
 
-    def _decompose(self, X):
+    def _decompose(self, X, overwrite_X=False):
         """Decomposes the matrix"""
         # perform the decomposition
-        self.qr, self.rank, self.qraux, self.pivot = qr_decomposition(X, self.job_)
+        self.qr, self.rank, self.qraux, self.pivot = qr_decomposition(
+            X, self.job_, engine=self.engine, tol=self.tol, overwrite_X=overwrite_X)
+        self._reflectors = None
 
     def get_coef(self, X):
-        qr, qraux = self.qr, self.qraux
-        n, p = qr.shape
-
-        # sanity check
-        assert isinstance(qr, np.ndarray), 'internal error: QR should be a np.ndarray but got %s' % type(qr)
-        assert isinstance(qraux, np.ndarray), 'internal error: qraux should be a np.ndarray but got %s' % type(qraux)
-
-        # validate input array
-        X = check_array(X, dtype='numeric', copy=True, order='F')
-        nx, ny = X.shape
-        if nx != n:
-            raise ValueError('qr and X must have same number of rows')
-
-        # check on size
-        _validate_matrix_size(n, p)
-
-        # get the rank of the decomposition
-        k = self.rank
-
-        # get ix vector
-        # if p > n:
-        #   ix = np.ones(n + (p - n)) * np.nan
-        #   ix[:n] = np.arange(n) # i.e., array([0,1,2,nan,nan,nan])
-        # else:
-        #   ix = np.arange(n)
-
-        # set up the structures to alter
-        coef, info = (np.zeros((k, ny), dtype=np.double, order='F'),
-                      np.zeros(1, dtype=np.int, order='F'))
-
-        # call the fortran module IN PLACE
-        _safecall(dqrsl.dqrcf, qr, n, k, qraux, X, ny, coef, 0)
-
-        # post-processing
-        # if k < p:
-        #   cf = np.ones((p,ny)) * np.nan
-        #   cf[self.pivot[np.arange(k)], :] = coef
-        return coef if not k < p else coef[self.pivot[np.arange(k)], :]
+        """Get the least squares coefficients of the first ``rank``
+        (pivoted) columns of the decomposed matrix for each column of ``X``.
+        ``X`` is not altered; see ``solve`` to avoid the copy.
+
+        Parameters
+        ----------
+
+        X : array_like, shape=(n_samples, n_targets)
+            The right-hand sides.
+
+        Returns
+        -------
+
+        coef : np.ndarray, shape=(rank, n_targets)
+            The coefficients. If pivoting was performed, the j-th row
+            corresponds to column ``pivot[j]`` of the decomposed matrix.
+        """
+        return self.solve(X, overwrite_Y=False)
+
+    def _apply_q(self, Y, trans):
+        """Apply Q (or Q' if ``trans``) to a Fortran-ordered block in place"""
+        if self.engine == 'lapack':
+            v, tau = self.qr[:, :self.qraux.shape[0]], self.qraux
+        else:
+            # only converted (and cached) the first time it's needed
+            if self._reflectors is None:
+                self._reflectors = _linpack_reflectors(self.qr, self.qraux, self.rank)
+            v, tau = self._reflectors
+
+        if not tau.shape[0]:
+            return Y
+
+        Y, = _lapack_safecall(lapack.dormqr, 'L', 'T' if trans else 'N', v, tau, Y, overwrite_c=True)
+        return Y
+
+    def solve(self, Y, overwrite_Y=True, qty=False, rsd=False, xb=False):
+        """Solve the least squares problem for a block of right-hand sides
+        at once, reusing the factorization. Q' is applied to the entire block
+        in one pass of the blocked LAPACK routine ``dormqr`` (for either engine),
+        and the coefficients for all of the columns are found with a single
+        (level-3 BLAS) triangular solve. If requested, the residuals and fitted
+        values are recovered from Q'Y with a single further application of Q
+        (rather than by refitting, or one vector at a time as ``dqrsl`` does).
+
+        Parameters
+        ----------
+
+        Y : array_like, shape=(n_samples, n_targets) or (n_samples,)
+            The right-hand sides.
+
+        overwrite_Y : bool, optional (default=True)
+            Whether ``Y`` may be overwritten with Q'Y rather than copied.
+            This avoids the copy only if ``Y`` is already a Fortran-ordered
+            float64 ``np.ndarray``.
+
+        qty : bool, optional (default=False)
+            Whether to also return Q'Y.
+
+        rsd : bool, optional (default=False)
+            Whether to also return the residuals, Y - Xb.
+
+        xb : bool, optional (default=False)
+            Whether to also return the fitted values, Xb.
+
+        Returns
+        -------
+
+        coef : np.ndarray, shape=(rank, n_targets)
+            The coefficients of the first ``rank`` (pivoted) columns of
+            the decomposed matrix. If pivoting was performed, the j-th row
+            corresponds to column ``pivot[j]`` of the decomposed matrix.
+            If any of ``qty``, ``rsd`` or ``xb`` are True, a namedtuple of
+            (coef, qty, rsd, xb) is returned instead, in which any output
+            that was not requested is None.
+        """
+        Y = np.asarray(Y)
+        one_d = Y.ndim == 1
+        Y = check_array(Y.reshape(-1, 1) if one_d else Y, dtype=np.float64, order='F', copy=not overwrite_Y)
+
+        n, k = self.qr.shape[0], self.rank
+        if Y.shape[0] != n:
+            raise ValueError('qr and Y must have same number of rows')
+
+        Y = self._apply_q(Y, trans=True)
+        coef = solve_triangular(self.qr[:k, :k], Y[:k], lower=False) if k \
+            else np.zeros((0, Y.shape[1]), dtype=np.float64)
+
+        if not (qty or rsd or xb):
+            return coef[:, 0] if one_d else coef
+
+        # the residuals are Q applied to Q'Y with its first k rows zeroed, and the fitted
+        # values Q applied to Q'Y with the rest zeroed: stack them to apply Q just once
+        ny, residuals, fitted = Y.shape[1], None, None
+        if rsd or xb:
+            proj = np.zeros((n, 2 * ny), dtype=np.float64, order='F')
+            proj[k:, :ny] = Y[k:]
+            proj[:k, ny:] = Y[:k]
+            proj = self._apply_q(proj, trans=False)
+            residuals, fitted = proj[:, :ny], proj[:, ny:]
+
+        if one_d:
+            coef, Y, residuals, fitted = [a if a is None else a[:, 0] for a in (coef, Y, residuals, fitted)]
+
+        return _QRSolveTuple(coef=coef,
+                             qty=Y if qty else None,
+                             rsd=residuals if rsd else None,
+                             xb=fitted if xb else None)
 
     def get_rank(self):
         """Get the rank of the decomposition.
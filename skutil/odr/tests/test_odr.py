@@ -31,3 +31,101 @@ def test_qr():
 
     # ensure dimension error
     assert_fails(q.get_coef, ValueError, X[:140, :])
+
+
+def test_qr_lapack():
+    rs = np.random.RandomState(42)
+    x = rs.rand(100, 6)
+    x[:, 4] = x[:, 0] + x[:, 1]  # make it rank deficient
+    y = rs.rand(100, 3)
+
+    q = QRDecomposition(x, engine='lapack')
+    assert q.get_rank() == 5
+    assert_array_equal(np.sort(q.pivot), np.arange(6))
+
+    # R should match numpy's, up to the sign of each row
+    R = np.triu(q.get_R()[:6])
+    assert_array_almost_equal(np.abs(R), np.abs(np.linalg.qr(x[:, q.pivot], mode='r')))
+
+    # the coefficients are in pivot order
+    keep = q.pivot[:q.rank]
+    assert_array_almost_equal(q.get_coef(y), np.linalg.lstsq(x[:, keep], y, rcond=-1)[0])
+    assert_fails(q.get_coef, ValueError, y[:90, :])
+
+    # no pivoting
+    q = QRDecomposition(x[:, :4], pivot=0, engine='lapack')
+    assert q.pivot is None
+    assert_array_almost_equal(q.get_coef(x[:, :4]), np.eye(4))
+
+    # overwrite a fortran-ordered float array in place
+    z = np.asfortranarray(x)
+    q = QRDecomposition(z, engine='lapack', overwrite_X=True)
+    assert q.qr is z
+
+    # bad engine
+    assert_fails(QRDecomposition, ValueError, x, 1, 'linpak')
+
+
+def test_qr_solve():
+    rs = np.random.RandomState(42)
+    x = rs.rand(100, 5)
+    y = rs.rand(100, 3)
+    coef = np.linalg.lstsq(x, y, rcond=-1)[0]
+
+    for engine in ('linpack', 'lapack'):
+        q = QRDecomposition(x, engine=engine)
+
+        # a copy should not alter y
+        y_copy = y.copy()
+        out = q.solve(y_copy, overwrite_Y=False, qty=True, rsd=True, xb=True)
+        assert_array_equal(y, y_copy)
+
+        # coefficients are in pivot order
+        assert_array_almost_equal(out.coef, coef[q.pivot])
+        assert_array_almost_equal(out.xb, x.dot(coef))
+        assert_array_almost_equal(out.rsd, y - x.dot(coef))
+        assert_array_almost_equal(out.rsd + out.xb, y)
+        assert_array_almost_equal(np.linalg.norm(out.qty, axis=0), np.linalg.norm(y, axis=0))
+        assert_array_almost_equal(q.get_coef(y), out.coef)
+
+        # by default, a fortran-ordered block is overwritten with Q'Y
+        y_f = np.asfortranarray(y)
+        assert_array_almost_equal(q.solve(y_f), out.coef)
+        assert_array_almost_equal(y_f, out.qty)
+
+        # a single right-hand side
+        out = q.solve(y[:, 0], overwrite_Y=False, rsd=True)
+        assert out.coef.shape == (5,)
+        assert out.qty is None and out.xb is None
+        assert_array_almost_equal(out.rsd, y[:, 0] - x.dot(coef[:, 0]))
+
+        assert_fails(q.solve, ValueError, y[:90, :])
+
+
+def test_tsqr():
+    rs = np.random.RandomState(42)
+    x = rs.rand(1000, 6)
+    y = rs.rand(1000, 2)
+    xy = np.hstack([x, y])
+    q = QRDecomposition(x, engine='lapack')
+
+    # chunks of different sizes, including one shorter than it is wide
+    for size in (97, 1000, 4):
+        t = TSQRDecomposition([xy[i:i + size] for i in range(0, 1000, size)], n_targets=2)
+        assert t.n_samples_ == 1000
+        assert t.get_rank() == 6
+        assert_array_equal(t.pivot, q.pivot)
+        assert_array_almost_equal(np.abs(np.triu(t.get_R()[:6])), np.abs(np.triu(q.get_R()[:6])))
+        assert_array_almost_equal(t.get_coef(), q.get_coef(y))
+
+    # a callable chunk source, without targets, and a rank deficient matrix
+    x[:, 4] = x[:, 0] + x[:, 1]
+    t = TSQRDecomposition(lambda: (x[i:i + 100] for i in range(0, 1000, 100)))
+    assert t.get_rank() == 5
+    assert_fails(t.get_coef, ValueError)
+    assert_fails(t.get_coef, ValueError, y)
+
+    # bad chunks
+    assert_fails(TSQRDecomposition, ValueError, [])
+    assert_fails(TSQRDecomposition, ValueError, [x[:10], x[:10, :5]])
+    assert_fails(TSQRDecomposition, ValueError, [x[:10]], 6)
@@ -0,0 +1,213 @@
+from __future__ import print_function, division, absolute_import
+import numpy as np
+from scipy.linalg import lapack
+from sklearn.utils import check_array
+from sklearn.externals.joblib import Parallel, delayed, cpu_count
+from .dqrutl import QRDecomposition, _lapack_safecall
+from ..utils._stream import _chunk_source
+
+__all__ = [
+    'TSQRDecomposition'
+]
+
+
+def _r_factor(X, overwrite_X=False):
+    """Get the R factor of the (blocked LAPACK) QR decomposition of a
+    block, padded with zero rows to be square if the block is short."""
+    X = check_array(X, dtype=np.float64)
+    n, p = X.shape
+
+    qr, _ = _lapack_safecall(lapack.dgeqrf, X, overwrite_a=overwrite_X)
+    R = np.zeros((p, p), dtype=np.float64)
+    R[:min(n, p)] = np.triu(qr[:p])
+    return R
+
+
+def _merge_r(R_a, R_b):
+    """Merge the R factors of two blocks of rows into the R factor
+    of the rows of both, by factoring the two stacked triangles."""
+    return _r_factor(np.vstack([R_a, R_b]), overwrite_X=True)
+
+
+class TSQRDecomposition(QRDecomposition):
+    """Performs the tall-skinny QR (TSQR) decomposition of a matrix whose
+    rows are streamed in chunks, such that the matrix never needs to be held
+    in memory at once. Each chunk is factored independently (in parallel, if
+    ``n_jobs`` is not 1), and the R factors of the chunks are merged pairwise
+    in a binary reduction tree as they arrive (as in Demmel et al. [1]), so
+    at most O(log(n_chunks)) R factors are held at once. The orthogonal factor,
+    Q, is never formed.
+
+    Finally, the (pivoted) LAPACK QR decomposition of the merged R factor is
+    computed. Since X = Q_1 R and RP = Q_2 R_2 imply XP = (Q_1 Q_2) R_2, the
+    resulting R, rank and pivots are those of the decomposition of X itself
+    (as by ``QRDecomposition(X, engine='lapack')``), and the same interface
+    is provided. However, since Q is not retained, least squares coefficients
+    can only be computed for right-hand sides streamed along with the matrix,
+    as the trailing ``n_targets`` columns of each chunk: since their rows of
+    the merged R factor hold Q_1'Y, they are carried through the reduction
+    along with the matrix.
+
+    Parameters
+    ----------
+
+    chunks : iterable or callable
+        An iterable of row-chunks of the matrix (array_like, or Pandas
+        ``DataFrame``, each of shape=(n_chunk_samples, n_features + n_targets)),
+        or a callable that returns a new such iterator each time it is called
+        (i.e., ``lambda: pd.read_csv(path, chunksize=100000)``).
+
+    n_targets : int, optional (default=0)
+        The number of trailing columns in each chunk that are right-hand sides
+        for ``get_coef`` rather than columns of the matrix to decompose.
+
+    pivot : int, optional (default=1)
+        Whether to perform pivoting. 0 is False, any other value
+        will be coerced to 1 (True).
+
+    tol : float, optional (default=1e-7)
+        The tolerance for determining the rank. The rank is the number of
+        diagonal elements of R whose magnitude is greater than ``tol`` times
+        that of the first diagonal element.
+
+    n_jobs : int, 1 by default
+       The number of jobs to use for factoring the chunks. If -1 all CPUs are
+       used. If 1 is given, no parallel computing code is used at all, which
+       is useful for debugging. For n_jobs below -1, (n_cpus + 1 + n_jobs) are
+       used. Thus for n_jobs = -2, all CPUs but one are used.
+
+
+    Attributes
+    ----------
+
+    qr : array_like, shape (n_features, n_features)
+        The decomposition of the merged R factor
+
+    qraux : array_like, shape (n_features,)
+        The scalar factors of the elementary reflectors of the
+        decomposition of the merged R factor (LAPACK's ``tau``).
+
+    pivot : array_like, shape (n_features,)
+        The pivots, if pivot was set to 1, else None
+
+    rank : int
+        The rank of the input matrix
+
+    n_samples_ : int
+        The number of rows in the matrix
+
+    qty_ : np.ndarray, shape=(n_features, n_targets)
+        The first ``n_features`` rows of Q_1'Y, where Y
+        are the streamed right-hand sides.
+
+
+    References
+    ----------
+
+    .. [1] Demmel, J., Grigori, L., Hoemmen, M. & Langou, J. "Communication-optimal
+           Parallel and Sequential QR and LU Factorizations" (2012). SIAM Journal on
+           Scientific Computing, 34(1), A206-A239.
+    """
+
+    def __init__(self, chunks, n_targets=0, pivot=1, tol=1e-7, n_jobs=1):
+        self.job_ = 0 if not pivot else 1
+        self.engine = 'lapack'
+        self.tol = tol
+        self.n_targets = n_targets
+        self.n_jobs = n_jobs
+
+        R = self._reduce(chunks)
+        n_features = R.shape[1] - n_targets
+        if n_features < 1:
+            raise ValueError('n_targets (%i) must be less than the number of columns (%i)'
+                             % (n_targets, R.shape[1]))
+
+        self.qty_ = R[:n_features, n_features:]
+        self._decompose(np.asfortranarray(R[:n_features, :n_features]), overwrite_X=True)
+
+    def _reduce(self, chunks):
+        """Factor the chunks, and merge their R factors"""
+        n_jobs = self.n_jobs
+        n_batch = max(1, n_jobs if n_jobs > 0 else cpu_count() + 1 + n_jobs)
+
+        # levels[i] is None, or the R factor of 2^i batches' rows (a binary counter)
+        levels, batch, n_cols = [], [], None
+        self.n_samples_ = 0
+
+        def push(R):
+            for i, level in enumerate(levels):
+                if level is None:
+                    levels[i] = R
+                    return
+                R, levels[i] = _merge_r(level, R), None
+            levels.append(R)
+
+        def factor(batch):
+            if n_batch == 1:
+                Rs = [_r_factor(c) for c in batch]
+            else:
+                Rs = Parallel(n_jobs=n_jobs)(delayed(_r_factor)(c) for c in batch)
+
+            R = Rs[0]
+            for other in Rs[1:]:
+                R = _merge_r(R, other)
+            push(R)
+
+        for chunk in _chunk_source(chunks)():
+            chunk = np.asarray(chunk)
+            if chunk.ndim != 2:
+                raise ValueError('expected 2d chunks, but got a chunk of shape %s' % str(chunk.shape))
+            if n_cols is None:
+                n_cols = chunk.shape[1]
+            elif chunk.shape[1] != n_cols:
+                raise ValueError('expected %i columns, but got %i' % (n_cols, chunk.shape[1]))
+            if not chunk.shape[0]:
+                continue
+
+            self.n_samples_ += chunk.shape[0]
+            batch.append(chunk)
+            if len(batch) == n_batch:
+                factor(batch)
+                batch = []
+
+        if batch:
+            factor(batch)
+
+        # merge whatever is left in the tree
+        levels = [level for level in levels if level is not None]
+        if not levels:
+            raise ValueError('no rows in the data')
+
+        R = levels[0]
+        for level in levels[1:]:
+            R = _merge_r(level, R)
+        return R
+
+    def get_coef(self, X=None):
+        """Get the least squares coefficients of the first ``rank``
+        (pivoted) columns of the decomposed matrix for each of the
+        right-hand sides that were streamed along with it.
+
+        Parameters
+        ----------
+
+        X : None
+            Since Q is not retained, the coefficients can only be computed
+            for the streamed right-hand sides (see ``n_targets``). Any other
+            value will raise a ``ValueError``.
+
+        Returns
+        -------
+
+        coef : np.ndarray, shape=(rank, n_targets)
+            The coefficients. If pivoting was performed, the j-th row
+            corresponds to column ``pivot[j]`` of the decomposed matrix.
+        """
+        if X is not None:
+            raise ValueError('TSQRDecomposition can only compute coefficients for '
+                             'the right-hand sides streamed with the matrix (n_targets)')
+        if not self.n_targets:
+            raise ValueError('no right-hand sides were streamed (n_targets=0)')
+
+        # R = Q_2 R_2 P', and R b = Q_1'y, so b is solved through the decomposition of R
+        return self.solve(self.qty_, overwrite_Y=False)
@@ -0,0 +1,618 @@
+# -*- coding: utf-8 -*-
+"""
+Compile fitted pipelines of skutil transformers into NumPy-only scoring
+plans for low-latency (i.e., online, one-row-at-a-time) inference.
+"""
+
+from __future__ import print_function, division, absolute_import
+import warnings
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+from sklearn.utils.validation import check_is_fitted
+from .decomposition import SelectivePCA, SelectiveTruncatedSVD
+from .feature_selection import FeatureRetainer
+from .feature_selection.base import _BaseFeatureSelector
+from .preprocessing import (BoxCoxTransformer, FunctionMapper, InteractionTermTransformer,
+                            OneHotCategoricalEncoder, SelectiveImputer, SelectiveScaler,
+                            SpatialSignTransformer, YeoJohnsonTransformer)
+from .preprocessing.transform import _is_vectorized, _mul, _eqls, _row_spatial_sign, ZERO
+from .utils.util import _ColumnIndexer, _column_indexer, _def_headers, __min_log__
+
+__all__ = [
+    'CompiledPipeline',
+    'compile_pipeline'
+]
+
+
+def _positions(names, cols):
+    """Get the positions of cols in names (the current column order of the plan)"""
+    index = dict((nm, i) for i, nm in enumerate(names))
+    missing = [c for c in cols if c not in index]
+    if missing:
+        raise KeyError('%s not in index' % str(missing))
+    return np.array([index[c] for c in cols], dtype=np.intp)
+
+
+def _as_index(positions):
+    """Get a slice for positions that are consecutive (so the selected
+    columns are a view, and can be altered in place), else the positions"""
+    positions = np.asarray(positions, dtype=np.intp)
+    if positions.shape[0] and (np.diff(positions) == 1).all():
+        return slice(positions[0], positions[-1] + 1)
+    return positions
+
+
+def _safe_log(x):
+    """The vectorized equivalent of ``skutil.utils.log``"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.maximum(__min_log__, np.log(x))
+
+
+# The ops of a plan. Each is called with the (private) matrix in the current
+# column order, and may alter it in place, returning the matrix for the next op.
+
+class _Take(object):
+    """Select (and order) the columns at the given positions"""
+
+    def __init__(self, positions):
+        self.positions = positions
+
+    def __call__(self, x):
+        return x[:, self.positions]
+
+
+class _Fill(object):
+    """Fill the missing values of the selected columns"""
+
+    def __init__(self, positions, fills):
+        self.positions = positions
+        self.fills = np.array(np.broadcast_to(fills, positions.shape), dtype=object)
+
+    def __call__(self, x):
+        block = x[:, self.positions]
+        missing = np.isnan(block) if block.dtype.kind == 'f' else pd.isnull(block)
+        if missing.any():
+            rows, cols = np.nonzero(missing)
+            x[rows, self.positions[cols]] = self.fills[cols]
+        return x
+
+
+class _Affine(object):
+    """Scale and shift each of the selected columns"""
+
+    def __init__(self, positions, scale, offset):
+        self.index = _as_index(positions)
+        self.scale = scale
+        self.offset = offset
+
+    def __call__(self, x):
+        if isinstance(self.index, slice):
+            block = x[:, self.index]
+            block *= self.scale
+            block += self.offset
+        else:
+            x[:, self.index] = x[:, self.index] * self.scale + self.offset
+        return x
+
+
+class _ApplyBlock(object):
+    """Apply a (vectorized) function to the block of the selected columns"""
+
+    def __init__(self, positions, fun, kwargs=None):
+        self.positions = positions
+        self.fun = fun
+        self.kwargs = kwargs or {}
+
+    def __call__(self, x):
+        x[:, self.positions] = self.fun(x[:, self.positions], **self.kwargs)
+        return x
+
+
+class _BoxCox(object):
+    """The Box-Cox transformation of the selected columns"""
+
+    def __init__(self, positions, lambdas, shifts, shift_amt):
+        lambdas = np.asarray(lambdas, dtype=np.float64)
+        logged = np.array([_eqls(lam, ZERO) for lam in lambdas], dtype=bool)
+
+        self.positions = positions
+        self.shifts = shifts
+        self.shift_amt = shift_amt
+        self.logged = positions[logged]
+        self.powered, self.lambdas = positions[~logged], lambdas[~logged]
+
+    def __call__(self, x):
+        x[:, self.positions] += self.shifts
+
+        # as in the transformer, every column (not only those selected) is truncated
+        np.maximum(x, self.shift_amt, out=x)
+
+        x[:, self.powered] = (np.power(x[:, self.powered], self.lambdas) - 1) / self.lambdas
+        if self.logged.shape[0]:
+            x[:, self.logged] = _safe_log(x[:, self.logged])
+        return x
+
+
+class _YeoJohnson(object):
+    """The Yeo-Johnson transformation of the selected columns"""
+
+    def __init__(self, positions, lambdas):
+        self.positions = positions
+        self.lambdas = lambdas
+
+    def __call__(self, x):
+        for j, lam in zip(self.positions, self.lambdas):
+            col = x[:, j]
+            pos = col >= 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                if _eqls(lam, ZERO):
+                    pos_vals = _safe_log(col + 1)
+                else:
+                    pos_vals = (np.power(col + 1, lam) - 1.0) / lam
+                if lam == 2.0:
+                    neg_vals = -_safe_log(-col + 1)
+                else:
+                    neg_vals = -(np.power(-col + 1, 2.0 - lam) - 1.0) / (2.0 - lam)
+            x[:, j] = np.where(pos, pos_vals, neg_vals)
+        return x
+
+
+class _RowSpatialSign(object):
+    """Divide each row of the selected columns by its norm"""
+
+    def __init__(self, positions, chunk_size):
+        self.positions = positions
+        self.chunk_size = chunk_size
+
+    def __call__(self, x):
+        x[:, self.positions] = _row_spatial_sign(np.array(x[:, self.positions], dtype=np.float64),
+                                                 self.chunk_size)
+        return x
+
+
+class _Project(object):
+    """Project the selected columns onto components (centering and scaling
+    the projection as needed), placing the projection before the others"""
+
+    def __init__(self, positions, others, components, mean=None, scale=None, dtype=np.float64):
+        self.positions = positions
+        self.others = others
+        self.components = components
+        self.mean = mean
+        self.scale = scale
+        self.dtype = dtype
+
+    def __call__(self, x):
+        block = np.asarray(x[:, self.positions], dtype=self.dtype)
+        if self.mean is not None:
+            block = block - self.mean
+
+        projected = block.dot(self.components.T)
+        if self.scale is not None:
+            projected *= self.scale
+        return np.hstack([projected, x[:, self.others]])
+
+
+class _OneHot(object):
+    """One-hot encode the selected (categorical) columns, placing
+    the dummy columns after the (numeric) others"""
+
+    def __init__(self, positions, others, vocabularies, fill):
+        self.positions = positions
+        self.others = others
+        self.vocabularies = vocabularies
+        self.fill = fill
+
+    def __call__(self, x):
+        n_samples, n_others = x.shape[0], len(self.others)
+        rows = np.arange(n_samples)
+        out = np.zeros((n_samples, n_others + sum(len(v) + 1 for v in self.vocabularies)))
+        out[:, :n_others] = x[:, self.others]
+
+        offset = n_others
+        for j, vocabulary in zip(self.positions, self.vocabularies):
+            col = x[:, j]
+            if self.fill is not None:
+                col = np.where(pd.isnull(col), self.fill, col)
+
+            # unseen levels are encoded in the trailing NA column
+            na = len(vocabulary)
+            out[rows, offset + np.array([vocabulary.get(v, na) for v in col], dtype=np.intp)] = 1.
+            offset += na + 1
+        return out
+
+
+class _Interactions(object):
+    """Append the products of pairs of columns"""
+
+    def __init__(self, keep, ii, jj):
+        self.keep = keep
+        self.ii = ii
+        self.jj = jj
+
+    def __call__(self, x):
+        return np.hstack([x[:, self.keep], x[:, self.ii] * x[:, self.jj]])
+
+
+def _affine_scaler(scaler, n_features):
+    """Get the (scale, offset) of each feature if a fit sklearn scaler
+    is affine in each feature (i.e., ``StandardScaler``, ``MinMaxScaler``,
+    ``MaxAbsScaler`` or ``RobustScaler``), else None. The affine map is
+    recovered by transforming probes (and then verified on another)."""
+    offset = scaler.transform(np.zeros((1, n_features)))[0]
+    scale = scaler.transform(np.ones((1, n_features)))[0] - offset
+    check = scaler.transform(np.full((1, n_features), -3.))[0]
+    if not np.allclose(check, offset - 3. * scale):
+        return None
+    return scale, offset
+
+
+def _compile_selector(step, names):
+    check_is_fitted(step, 'drop_')
+    if not step.drop_:
+        return None, names
+
+    drops = set(step.drop_)
+    if not all(d in names for d in drops):
+        warnings.warn('one or more features to drop not contained '
+                      'in input data feature names', UserWarning)
+    keep = [nm for nm in names if nm not in drops]
+    return _Take(_positions(names, keep)), keep
+
+
+def _compile_retainer(step, names):
+    check_is_fitted(step, 'drop_')
+    keep = list(names) if step.cols is None else list(step.cols)
+    return _Take(_positions(names, keep)), keep
+
+
+def _compile_imputer(step, names):
+    check_is_fitted(step, 'fills_')
+    cols = list(names) if step.cols is None else list(step.cols)
+    fills = step.fills_
+    if isinstance(fills, dict):
+        fills = np.array([fills[c] for c in cols], dtype=object)
+    return _Fill(_positions(names, cols), fills), names
+
+
+def _compile_scaler(step, names):
+    check_is_fitted(step, 'scaler_')
+    cols = list(names) if not step.cols else list(step.cols)
+    positions = _positions(names, cols)
+
+    affine = _affine_scaler(step.scaler_, len(cols))
+    if affine is None:
+        return _ApplyBlock(positions, step.scaler_.transform), names
+    return _Affine(positions, *affine), names
+
+
+def _compile_box_cox(step, names):
+    check_is_fitted(step, 'shift_')
+    cols = list(names) if not step.cols else list(step.cols)
+    return _BoxCox(_positions(names, cols), [step.lambda_[c] for c in cols],
+                   np.array([step.shift_[c] for c in cols]), step.shift_amt), names
+
+
+def _compile_yeo_johnson(step, names):
+    check_is_fitted(step, 'lambda_')
+    cols = list(names) if not step.cols else list(step.cols)
+    return _YeoJohnson(_positions(names, cols), [step.lambda_[c] for c in cols]), names
+
+
+def _compile_spatial_sign(step, names):
+    check_is_fitted(step, 'sq_nms_')
+    if step.sq_nms_ is None:
+        cols = list(names) if not step.cols else list(step.cols)
+        return _RowSpatialSign(_positions(names, cols), step.chunk_size), names
+
+    cols = list(step.sq_nms_.keys())
+    norms = np.array([step.sq_nms_[c] for c in cols])
+    return _Affine(_positions(names, cols), 1. / norms, 0.), names
+
+
+def _compile_function_mapper(step, names):
+    check_is_fitted(step, 'is_fit_')
+    fun = step.fun
+    if not (_is_vectorized(fun) if step.vectorized is None else step.vectorized):
+        raise ValueError('only FunctionMappers of vectorized functions (see '
+                         'skutil.preprocessing.vectorized) can be compiled')
+
+    cols = list(names) if not step.cols else list(step.cols)
+    return _ApplyBlock(_positions(names, cols), fun, step.kwargs), names
+
+
+def _compile_interactions(step, names):
+    check_is_fitted(step, 'fun_')
+    if step.fun_ is not _mul:
+        raise ValueError('only InteractionTermTransformers of the default '
+                         '(product) interaction_function can be compiled')
+
+    cols = list(names) if not step.cols else list(step.cols)
+    positions = _positions(names, cols)
+    ii, jj = step._pairs(cols)
+
+    keep = cols if step.only_return_interactions else list(names)
+    return (_Interactions(_positions(names, keep), positions[ii], positions[jj]),
+            keep + step._interaction_names(cols, ii, jj))
+
+
+def _compile_one_hot(step, names):
+    check_is_fitted(step, 'obj_cols_')
+    if not step.one_hot_:
+        return None, names
+
+    cols = step.obj_cols_.tolist()
+    indexer = _ColumnIndexer(names, cols)
+    vocabularies = [dict((level, i) for i, level in enumerate(encoder.classes_))
+                    for encoder in step.lab_encoders_]
+    return (_OneHot(indexer.positions, indexer.others, vocabularies, step.fill),
+            list(step.trans_nms_))
+
+
+def _compile_pca(step, names):
+    check_is_fitted(step, 'pca_')
+    cols = list(names) if not step.cols else list(step.cols)
+    indexer = _ColumnIndexer(names, cols)
+
+    pca = step.pca_
+    scale = np.ones(pca.components_.shape[0])
+    if pca.whiten:
+        scale /= np.sqrt(pca.explained_variance_)
+    if step.weight:
+        weights = pca.explained_variance_ratio_.copy()
+        weights -= np.median(weights)
+        weights += 1
+        scale *= weights
+
+    op = _Project(indexer.positions, indexer.others, pca.components_, pca.mean_, scale, step.dtype)
+    return op, ['PC%i' % (i + 1) for i in range(pca.components_.shape[0])] + indexer.other_names
+
+
+def _compile_svd(step, names):
+    check_is_fitted(step, 'svd_')
+    cols = list(names) if not step.cols else list(step.cols)
+    indexer = _ColumnIndexer(names, cols)
+
+    components = step.svd_.components_
+    op = _Project(indexer.positions, indexer.others, components)
+    return op, ['Concept%i' % (i + 1) for i in range(components.shape[0])] + indexer.other_names
+
+
+# the compilable steps (subclasses before their bases)
+_COMPILERS = [
+    (FeatureRetainer, _compile_retainer),
+    (_BaseFeatureSelector, _compile_selector),
+    (SelectiveImputer, _compile_imputer),
+    (SelectiveScaler, _compile_scaler),
+    (BoxCoxTransformer, _compile_box_cox),
+    (YeoJohnsonTransformer, _compile_yeo_johnson),
+    (SpatialSignTransformer, _compile_spatial_sign),
+    (FunctionMapper, _compile_function_mapper),
+    (InteractionTermTransformer, _compile_interactions),
+    (OneHotCategoricalEncoder, _compile_one_hot),
+    (SelectivePCA, _compile_pca),
+    (SelectiveTruncatedSVD, _compile_svd)
+]
+
+
+# the methods of a final estimator that a compiled pipeline delegates to
+_ESTIMATOR_METHODS = ('predict', 'predict_proba', 'decision_function')
+
+
+def _compiler(step):
+    for cls, compiler in _COMPILERS:
+        if isinstance(step, cls):
+            return compiler
+    return None
+
+
+class CompiledPipeline(object):
+    """A fitted pipeline of skutil transformers, compiled (by
+    ``compile_pipeline``) into a plan of NumPy operations over a fixed
+    column order. Each transformer's fitted state (i.e., the ``lambda_``
+    of a ``BoxCoxTransformer``, the components of a ``SelectivePCA`` or the
+    vocabularies of a ``OneHotCategoricalEncoder``) is exported into an op
+    that acts on a single matrix, so that, unlike the pipeline, no step
+    re-validates or copies its input or builds a new ``DataFrame``.
+
+    Parameters
+    ----------
+
+    columns : list, shape=(n_features,)
+        The names of the input columns, in order.
+
+    ops : list
+        The compiled operations, in order.
+
+    feature_names : list
+        The names of the columns of the output of the transformers.
+
+    estimator : estimator, optional (default=None)
+        The final estimator of the pipeline, if any.
+
+    dtype : numpy dtype, optional (default=np.float64)
+        The dtype of the matrix into which the input is copied
+        (object, if any categorical columns must be encoded).
+
+
+    Attributes
+    ----------
+
+    columns : list, shape=(n_features,)
+        The names of the input columns, in order.
+
+    feature_names : list
+        The names of the columns of the output of ``transform``.
+    """
+
+    def __init__(self, columns, ops, feature_names, estimator=None, dtype=np.float64):
+        self.columns = columns
+        self.ops = ops
+        self.feature_names = feature_names
+        self.estimator = estimator
+        self.dtype = dtype
+        self._indexer = _ColumnIndexer(columns)
+
+    def _matrix(self, X):
+        """Copy the input into a matrix in the fixed column order"""
+        if isinstance(X, pd.DataFrame):
+            indexer = _column_indexer(self._indexer, X, self.columns)
+            values = X.values if indexer is self._indexer else X.take(indexer.positions, axis=1).values
+        else:
+            values = np.asarray(X)
+            if values.ndim == 1:  # a single row
+                values = values.reshape(1, -1)
+            if values.shape[1] != len(self.columns):
+                raise ValueError('expected %i columns, but got %i'
+                                 % (len(self.columns), values.shape[1]))
+
+        return np.array(values, dtype=self.dtype)
+
+    def transform(self, X):
+        """Apply the compiled transformers.
+
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame`` or array_like, shape=(n_samples, n_features)
+            The rows to transform. If ``X`` is a ``DataFrame``, its columns
+            are selected by name, otherwise they must be in the order of
+            ``columns``. A 1d array is treated as a single row.
+
+
+        Returns
+        -------
+
+        x : np.ndarray, shape=(n_samples, n_output_features)
+            The transformed matrix, whose columns are ``feature_names``
+        """
+        x = self._matrix(X)
+        for op in self.ops:
+            x = op(x)
+        return x
+
+    def _estimator(self):
+        if self.estimator is None:
+            raise ValueError('the compiled pipeline has no final estimator')
+        return self.estimator
+
+    def predict(self, X):
+        """Apply the compiled transformers, and predict
+        with the final estimator of the pipeline.
+
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame`` or array_like, shape=(n_samples, n_features)
+            The rows to predict (see ``transform``).
+        """
+        return self._estimator().predict(self.transform(X))
+
+    def predict_proba(self, X):
+        """Apply the compiled transformers, and predict the class
+        probabilities with the final estimator of the pipeline.
+
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame`` or array_like, shape=(n_samples, n_features)
+            The rows to predict (see ``transform``).
+        """
+        return self._estimator().predict_proba(self.transform(X))
+
+    def decision_function(self, X):
+        """Apply the compiled transformers, and compute the decision
+        function with the final estimator of the pipeline.
+
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame`` or array_like, shape=(n_samples, n_features)
+            The rows to predict (see ``transform``).
+        """
+        return self._estimator().decision_function(self.transform(X))
+
+
+def compile_pipeline(pipeline, columns):
+    """Compile a fitted ``sklearn.pipeline.Pipeline`` of skutil transformers
+    (or a single fitted skutil transformer) into a :class:`CompiledPipeline`,
+    a scoring plan of NumPy operations over a fixed column order, for
+    low-latency inference on one row (or a small batch of rows) at a time.
+
+    The following transformers can be compiled: the feature selectors
+    (``FeatureDropper``, ``FeatureRetainer``, ``MulticollinearityFilterer``,
+    etc.), ``SelectiveImputer``, ``SelectiveScaler``, ``BoxCoxTransformer``,
+    ``YeoJohnsonTransformer``, ``SpatialSignTransformer``, ``FunctionMapper``
+    (of vectorized functions only), ``InteractionTermTransformer`` (of the
+    default product only), ``OneHotCategoricalEncoder``, ``SelectivePCA``
+    and ``SelectiveTruncatedSVD``. The final step of the pipeline may be
+    any estimator, which will be passed the transformed matrix.
+
+    Parameters
+    ----------
+
+    pipeline : ``sklearn.pipeline.Pipeline`` or transformer
+        The fitted pipeline.
+
+    columns : array_like, shape=(n_features,)
+        The names of the columns of the frames the pipeline
+        transforms (i.e., ``X_train.columns``), in order.
+
+
+    Returns
+    -------
+
+    plan : ``CompiledPipeline``
+        The compiled pipeline.
+
+
+    Examples
+    --------
+
+        >>> from sklearn.pipeline import Pipeline
+        >>> from sklearn.linear_model import LogisticRegression
+        >>> from skutil.pipeline import compile_pipeline
+        >>> from skutil.preprocessing import BoxCoxTransformer, SelectiveScaler
+        >>> from skutil.utils import load_iris_df
+        >>>
+        >>> X = load_iris_df(include_tgt=True)
+        >>> y = X.pop('Species')
+        >>> pipe = Pipeline([
+        ...     ('boxcox', BoxCoxTransformer()),
+        ...     ('scaler', SelectiveScaler()),
+        ...     ('model', LogisticRegression())
+        ... ]).fit(X, y)
+        >>>
+        >>> plan = compile_pipeline(pipe, X.columns)
+        >>> plan.predict(X.iloc[:1].values) # doctest: +SKIP
+        array([0])
+    """
+    if isinstance(pipeline, Pipeline):
+        steps = [step for _, step in pipeline.steps if step is not None and step != 'passthrough']
+    else:
+        steps = [pipeline]
+
+    names = list(columns)
+    ops, estimator, dtype = [], None, np.float64
+    for i, step in enumerate(steps):
+        compiler = _compiler(step)
+        if compiler is None:
+            if i == len(steps) - 1 and any(hasattr(step, m) for m in _ESTIMATOR_METHODS):
+                estimator = step
+                break
+            raise ValueError('%s cannot be compiled' % type(step).__name__)
+
+        # categorical columns must be carried as objects until they're encoded
+        if isinstance(step, OneHotCategoricalEncoder) and step.one_hot_:
+            dtype = object
+
+        op, names = compiler(step, names)
+        if op is not None:
+            ops.append(op)
+
+        # the next step would see the default names of a matrix
+        if not step.as_df:
+            names = _def_headers(names)
+
+    return CompiledPipeline(list(columns), ops, names, estimator, dtype)
@@ -10,6 +10,7 @@ from sklearn.neighbors import NearestNeighbors
 from skutil.base import overrides, BaseSkutil
 from ..utils.fixes import dict_keys
 from ..utils import *
+from ..utils.profiling import profiled
 
 __all__ = [
     'OversamplingClassBalancer',
@@ -382,6 +383,7 @@ class OversamplingClassBalancer(_BaseBalancer):
                                                         as_df=as_df)
 
     @overrides(BalancerMixin)
+    @profiled
     def balance(self, X):
         """Apply the oversampling balance operation. Oversamples
         the minority class to the provided ratio of minority
@@ -474,6 +476,7 @@ class SMOTEClassBalancer(_BaseBalancer):
         self.k = k
 
     @overrides(BalancerMixin)
+    @profiled
     def balance(self, X):
         """Apply the SMOTE balancing operation. Oversamples
         the minority class to the provided ratio of minority
@@ -620,6 +623,7 @@ class UndersamplingClassBalancer(_BaseBalancer):
                                                          shuffle=shuffle,
                                                          as_df=as_df)
 
+    @profiled
     def balance(self, X):
         """Apply the undersampling balance operation. Undersamples
         the majority class to the provided ratio over the second-most-
@@ -8,6 +8,8 @@ import numpy as np
 import pandas as pd
 from skutil.base import BaseSkutil
 from skutil.utils import validate_is_pd
+from ..utils.util import _ColumnIndexer, _column_indexer
+from ..utils.profiling import profiled
 
 __all__ = [
     'SafeLabelEncoder',
@@ -127,6 +129,7 @@ class OneHotCategoricalEncoder(BaseSkutil, TransformerMixin):
         super(OneHotCategoricalEncoder, self).__init__(cols=None, as_df=as_df)
         self.fill = fill
 
+    @profiled
     def fit(self, X, y=None):
         """Fit the encoder.
 
@@ -192,9 +195,9 @@ class OneHotCategoricalEncoder(BaseSkutil, TransformerMixin):
         trans = np.array(trans_array).transpose()
 
         # flatten the name array, append numeric names prior
-        num_nms = [n for n in X.columns.values if n not in obj_cols_]
+        self._col_indexer = _ColumnIndexer(X.columns, obj_cols_.tolist())
         trans_nms_ = [item for sublist in tnms for item in sublist]
-        self.trans_nms_ = num_nms + trans_nms_
+        self.trans_nms_ = self._col_indexer.other_names + trans_nms_
 
         # we might get an empty set of object cols
         shape_tup = trans.shape
@@ -207,6 +210,7 @@ class OneHotCategoricalEncoder(BaseSkutil, TransformerMixin):
 
         return self
 
+    @profiled
     def transform(self, X):
         """Transform X, a DataFrame, by stripping
         out the object columns, dummifying them, and
@@ -225,16 +229,17 @@ class OneHotCategoricalEncoder(BaseSkutil, TransformerMixin):
             The encoded dataframe or array
         """
         check_is_fitted(self, 'obj_cols_')
-        # check on state of X, don't care about cols or warning
-        X, _ = validate_is_pd(X, None)
+        # check on state of X, don't care about cols or warning (X is only read)
+        X, _ = validate_is_pd(X, None, copy=False)
 
         # if there is no encoder to speak of, just bail early
         if not self.one_hot_:
-            return X if self.as_df else X.as_matrix()
+            return X.copy() if self.as_df else X.as_matrix()
 
-        # Retain just the numers
-        numers = X[[nm for nm in X.columns.values if nm not in self.obj_cols_]]
-        objs = X[self.obj_cols_]
+        # Retain just the numers, by position if X has the schema of the fit frame
+        indexer = _column_indexer(getattr(self, '_col_indexer', None), X, self.obj_cols_.tolist())
+        numers = X.take(indexer.others, axis=1)
+        objs = X.take(indexer.positions, axis=1)
 
         # If we need to fill in the NAs, take care of it
         if self.fill is not None:
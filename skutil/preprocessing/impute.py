@@ -11,6 +11,7 @@ from abc import ABCMeta
 from skutil.base import SelectiveMixin, BaseSkutil
 from ..utils import is_entirely_numeric, get_numeric, validate_is_pd, is_numeric
 from ..utils.fixes import is_iterable
+from ..utils.profiling import profiled
 
 __all__ = [
     'BaggedImputer',
@@ -180,6 +181,7 @@ class SelectiveImputer(_BaseImputer):
     def __init__(self, cols=None, as_df=True, fill='mean'):
         super(SelectiveImputer, self).__init__(cols, as_df, fill)
 
+    @profiled
     def fit(self, X, y=None):
         """Fit the imputer and return the
         transformed matrix or frame.
@@ -270,6 +272,7 @@ class SelectiveImputer(_BaseImputer):
 
         return self
 
+    @profiled
     def transform(self, X):
         """Transform a dataframe given the fit imputer.
 
@@ -330,6 +333,7 @@ class _BaseBaggedImputer(_BaseImputer):
         self.verbose = verbose
         self.is_classification = is_classification
 
+    @profiled
     def fit(self, X, y=None):
         """Fit the bagged imputer.
 
@@ -353,6 +357,7 @@ class _BaseBaggedImputer(_BaseImputer):
         self.fit_transform(X, y)
         return self
 
+    @profiled
     def fit_transform(self, X, y=None):
         """Fit the bagged imputer and return the
         transformed (imputed) matrix.
@@ -465,6 +470,7 @@ class _BaseBaggedImputer(_BaseImputer):
         self.models_ = models
         return X if self.as_df else X.as_matrix()
 
+    @profiled
     def transform(self, X):
         """Impute the test data after fit.
 
@@ -1,12 +1,14 @@
 from __future__ import print_function
+import warnings
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 from numpy.testing import (assert_array_equal, assert_array_almost_equal)
 from sklearn.datasets import load_iris
 from skutil.preprocessing import *
 from skutil.decomposition import *
 from skutil.utils import validate_is_pd
-from skutil.utils.fixes import dict_values
+from skutil.utils.fixes import dict_values, _csr_to_sparse_frame, _is_sparse_column
 from skutil.testing import assert_fails
 
 # Def data for testing
@@ -91,6 +93,57 @@ def test_function_mapper():
     # Test on non-function
     assert_fails(FunctionMapper(fun='woo-hoo').fit, ValueError, x)
 
+    # warn if fun takes an argument shadowed by the mapper's own parameters
+    def fun_with_copy(x, copy=True):
+        return x
+
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter('always')
+        FunctionMapper(fun=fun_with_copy, copy=False).fit(x)
+        FunctionMapper(fun=fun, copy=False).fit(x)
+    assert len(w) == 1 and 'copy' in str(w[0].message)
+
+
+def _batch_log1p(x):
+    return np.log1p(x)
+
+
+def test_function_mapper_vectorized():
+    original = X.copy()
+    cols = ['sepal length (cm)', 'petal width (cm)']
+    expected = X.copy()
+    expected[cols] = np.log1p(X[cols].values)
+
+    # ufuncs are applied to the block at once, as are decorated functions
+    calls = []
+
+    @vectorized
+    def block_log1p(x):
+        calls.append(x.shape)
+        return np.log1p(x)
+
+    for fun in (np.log1p, block_log1p):
+        transformed = FunctionMapper(cols=cols, fun=fun).fit_transform(X)
+        assert_array_almost_equal(transformed.values, expected.values)
+    assert calls == [(150, 2)]
+    assert_array_almost_equal(X.values, original.values)  # X is not altered
+
+    # forcing (or disabling) the vectorization
+    assert_array_almost_equal(FunctionMapper(cols=cols, fun=_batch_log1p, vectorized=True)
+                              .fit_transform(X).values, expected.values)
+    assert_array_almost_equal(FunctionMapper(cols=cols, fun=np.log1p, vectorized=False)
+                              .fit_transform(X).values, expected.values)
+
+    # column batches in parallel
+    assert_array_almost_equal(FunctionMapper(fun=_batch_log1p, n_jobs=2).fit_transform(X).values,
+                              np.log1p(X.values))
+
+    # in place
+    Z = X.copy()
+    out = FunctionMapper(cols=cols, fun=np.log1p, copy=False).fit_transform(Z)
+    assert out is Z
+    assert_array_almost_equal(Z.values, expected.values)
+
 
 def test_interactions():
     x_dict = {
@@ -151,6 +204,90 @@ def test_interactions():
     assert all([expected_names[i] == actual_names[i] for i in range(len(expected_names))])
 
 
+def test_interactions_vectorized():
+    rs = np.random.RandomState(42)
+    X_pd = pd.DataFrame.from_records(data=rs.rand(20, 6), columns=list('abcdef'))
+    X_pd.index = rs.permutation(20) + 100  # non-default index
+    cols = ['a', 'b', 'c', 'e']
+
+    # the block products match the pairwise product of each pair of columns
+    def cust_mul(a, b):
+        return (a * b).values
+
+    trans = InteractionTermTransformer(cols=cols).fit(X_pd)
+    X_trans = trans.transform(X_pd)
+    expected = InteractionTermTransformer(cols=cols, interaction_function=cust_mul).fit_transform(X_pd)
+    assert X_trans.columns.tolist() == expected.columns.tolist()
+    assert X_trans.index.tolist() == X_pd.index.tolist()
+    assert_array_almost_equal(X_trans.values, expected.values)
+    assert_array_almost_equal(X_trans['b_e_I'].values, (X_pd['b'] * X_pd['e']).values)
+
+    # the interactions are appended in order of name, or by pair if only they are returned
+    X_named = InteractionTermTransformer(cols=['c', 'a', 'b']).fit_transform(X_pd)
+    assert X_named.columns.tolist()[6:] == ['a_b_I', 'c_a_I', 'c_b_I']
+    X_named = InteractionTermTransformer(cols=['c', 'a', 'b'], only_return_interactions=True).fit_transform(X_pd)
+    assert X_named.columns.tolist() == ['c', 'a', 'b', 'c_a_I', 'c_b_I', 'a_b_I']
+    assert_array_almost_equal(X_named['c_a_I'].values, (X_pd['c'] * X_pd['a']).values)
+
+    # the chunks are the interactions, in order
+    chunks = list(trans.iter_interactions(X_pd, chunk_size=4))
+    assert [c.shape[1] for c in chunks] == [4, 2]
+    assert_array_almost_equal(pd.concat(chunks, axis=1).values, X_trans.iloc[:, 6:].values)
+    assert_fails(lambda: list(trans.iter_interactions(X_pd, chunk_size=0)), ValueError)
+
+    # sparse in, sparse out
+    X_dense = X_pd.copy()
+    X_dense[X_dense < 0.5] = 0.
+    dense_trans = trans.transform(X_dense)
+    X_sparse = _csr_to_sparse_frame(sp.csr_matrix(X_dense[cols].values), cols, X_dense.index)
+    for nm in ('d', 'f'):
+        X_sparse[nm] = X_dense[nm].values
+    X_sparse = X_sparse[X_dense.columns.tolist()]
+
+    sparse_trans = trans.transform(X_sparse)
+    assert all(_is_sparse_column(sparse_trans[nm]) for nm in ('a_b_I', 'c_e_I'))
+    assert_array_almost_equal(np.asarray(sparse_trans.values, dtype=float), dense_trans.values)
+
+    arr = InteractionTermTransformer(cols=cols, as_df=False).fit(X_pd).transform(X_sparse)
+    assert sp.issparse(arr)
+    assert_array_almost_equal(arr.toarray(), dense_trans.values)
+
+
+def test_interactions_screening():
+    rs = np.random.RandomState(42)
+    X_pd = pd.DataFrame.from_records(data=rs.rand(200, 8), columns=list('abcdefgh'))
+    y = X_pd['b'] * X_pd['g'] + 0.5 * X_pd['a'] * X_pd['d'] + 0.01 * rs.rand(200)
+
+    # the screening is done in (small) blocks, but keeps the best overall
+    all_terms = InteractionTermTransformer(only_return_interactions=True).fit_transform(X_pd).iloc[:, 8:]
+    corrs = np.abs([np.corrcoef(all_terms[nm], y)[0, 1] for nm in all_terms.columns])
+    best = all_terms.columns[np.argsort(-corrs)[:3]]
+
+    trans = InteractionTermTransformer(screening='correlation', k=3, chunk_size=5).fit(X_pd, y)
+    assert sorted(trans.pairs_) == sorted([tuple(nm.split('_')[:2]) for nm in best])
+    assert ('b', 'g') in trans.pairs_
+    assert_array_almost_equal(sorted(trans.scores_), sorted(corrs[np.argsort(-corrs)[:3]]))
+
+    # only the kept terms are computed
+    X_trans = trans.transform(X_pd)
+    assert X_trans.columns.tolist()[:8] == list('abcdefgh')
+    assert sorted(X_trans.columns.tolist()[8:]) == sorted(best.tolist())
+    assert_array_almost_equal(X_trans['b_g_I'].values, (X_pd['b'] * X_pd['g']).values)
+    assert sum(c.shape[1] for c in trans.iter_interactions(X_pd, chunk_size=2)) == 3
+
+    # thresholds, and other scores
+    trans = InteractionTermTransformer(screening='correlation', threshold=corrs.max() + 1).fit(X_pd, y)
+    assert trans.pairs_ == [] and trans.transform(X_pd).shape == X_pd.shape
+    trans = InteractionTermTransformer(screening='f_regression', k=1).fit(X_pd, y)
+    assert trans.pairs_ == [('b', 'g')]
+    assert InteractionTermTransformer().fit(X_pd).pairs_ is None
+
+    # fails without a target, limit or known screening
+    assert_fails(InteractionTermTransformer(screening='correlation', k=3).fit, ValueError, X_pd)
+    assert_fails(InteractionTermTransformer(screening='correlation').fit, ValueError, X_pd, y)
+    assert_fails(InteractionTermTransformer(screening='bad', k=3).fit, ValueError, X_pd, y)
+
+
 def test_yeo_johnson():
     transformer = YeoJohnsonTransformer().fit(X)  # will fit on all cols
 
@@ -209,6 +346,32 @@ def test_spatial_sign():
     assert isinstance(SpatialSignTransformer(as_df=False).fit_transform(X), np.ndarray)
     assert transformer.cols is None
 
+    # the block norms match the per-column squared norms
+    cols = ['sepal length (cm)', 'petal width (cm)']
+    transformer = SpatialSignTransformer(cols=cols).fit(X)
+    assert_array_almost_equal([transformer.sq_nms_[nm] for nm in cols], [X[nm].dot(X[nm]) for nm in cols])
+    transformed = transformer.transform(X)
+    assert_array_almost_equal(transformed[cols].values, X[cols].values / (X[cols] ** 2).sum().values)
+    assert_array_equal(transformed['sepal width (cm)'].values, X['sepal width (cm)'].values)
+
+    # row-wise spatial sign, in chunks of rows; zero rows stay zero
+    xdf = X.copy()
+    xdf.iloc[3] = 0.
+    transformer = SpatialSignTransformer(axis=1, chunk_size=7).fit(xdf)
+    assert transformer.sq_nms_ is None
+    transformed = transformer.transform(xdf)
+    expected = xdf.values / np.maximum(np.sqrt((xdf.values ** 2).sum(axis=1)), 1e-300)[:, np.newaxis]
+    assert_array_almost_equal(transformed.values, expected)
+    assert_array_almost_equal(np.sqrt((transformed.values ** 2).sum(axis=1))[[0, 1, 2, 4]], np.ones(4))
+
+    # row-wise, on only some columns
+    transformed = SpatialSignTransformer(cols=cols, axis=1).fit_transform(X)
+    assert_array_almost_equal(np.sqrt((transformed[cols].values ** 2).sum(axis=1)), np.ones(X.shape[0]))
+    assert_array_equal(transformed['sepal width (cm)'].values, X['sepal width (cm)'].values)
+
+    assert_fails(SpatialSignTransformer(axis=2).fit, ValueError, X)
+    assert_fails(SpatialSignTransformer(axis=1, chunk_size=0).fit, ValueError, X)
+
 
 def test_strange_input():
     # test numpy array input with numeric cols
@@ -245,3 +408,35 @@ def test_selective_scale():
 
     # test the selective mixin
     assert isinstance(transformer.cols, list)
+
+
+def test_selective_scale_partial_fit():
+    from sklearn.preprocessing import MinMaxScaler, MaxAbsScaler, RobustScaler
+    cols = X.columns[:2].tolist()
+    original = X.copy()
+
+    # the default scaler is no longer a shared instance, and is never fit itself
+    first, second = SelectiveScaler(cols=cols), SelectiveScaler(cols=cols)
+    assert first.scaler is None and second.scaler is None
+    first.fit(X)
+    assert not hasattr(second, 'scaler_')
+
+    for scaler in (None, MinMaxScaler(), MaxAbsScaler()):
+        full = SelectiveScaler(cols=cols, scaler=scaler).fit(X)
+        chunked = SelectiveScaler(cols=cols, scaler=scaler).fit_chunks([X.iloc[i:i + 40] for i in range(0, 150, 40)])
+
+        expected = full.transform(X)
+        transformed = chunked.transform(X)
+        assert_array_almost_equal(transformed.values, expected.values)
+        assert transformed.columns.tolist() == X.columns.tolist()
+        assert_array_equal(transformed[X.columns[2:]].values, X[X.columns[2:]].values)
+
+        # X is not altered, and neither is the scaler param
+        assert_array_equal(X.values, original.values)
+        if scaler is not None:
+            assert not hasattr(chunked.scaler, 'n_samples_seen_')
+
+    # a scaler without partial_fit fails, as does transforming before fitting
+    assert_fails(SelectiveScaler(cols=cols, scaler=RobustScaler()).partial_fit, ValueError, X)
+    assert_fails(SelectiveScaler(cols=cols).fit_chunks, ValueError, [])
+    assert_fails(SelectiveScaler(cols=cols).transform, Exception, X)
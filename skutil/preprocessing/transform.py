@@ -1,18 +1,23 @@
 # -*- coding: utf-8 -*-
 
 from __future__ import print_function, absolute_import, division
+import inspect
+import warnings
 import numpy as np
-import pandas as pd
+import scipy.sparse as sp
 from scipy import optimize
 from scipy.stats import boxcox
-from sklearn.base import BaseEstimator, TransformerMixin
-from sklearn.externals import six
-from sklearn.externals.joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, TransformerMixin, clone
+from sklearn.externals.joblib import Parallel, delayed, cpu_count
 from sklearn.preprocessing import StandardScaler
 from sklearn.utils.validation import check_is_fitted
 from skutil.base import *
 from ..utils import *
-from ..utils.fixes import _cols_if_none
+from ..utils.fixes import (_cols_if_none, _is_sparse_column, _sparse_columns_to_csr,
+                           _csr_to_sparse_frame, _as_numpy)
+from ..utils.util import _assemble_frame, _ColumnIndexer, _column_indexer, _take_columns
+from ..utils._stream import _chunk_source
+from ..utils.profiling import profiled, _phase
 
 __all__ = [
     'BoxCoxTransformer',
@@ -20,7 +25,8 @@ __all__ = [
     'InteractionTermTransformer',
     'SelectiveScaler',
     'SpatialSignTransformer',
-    'YeoJohnsonTransformer'
+    'YeoJohnsonTransformer',
+    'vectorized'
 ]
 
 # A very small number used to measure differences.
@@ -33,6 +39,20 @@ ZERO = 1e-16
 
 
 # Helper funtions:
+def _replace_columns(X, indexer, block, as_df=True):
+    """Assemble a frame from ``X`` with its selected columns (those at
+    the positions of the ``_ColumnIndexer``) replaced, in place, by the
+    columns of ``block``, without copying the remaining columns of ``X``
+    into an intermediate frame."""
+    with _phase('assemble'):
+        arrays = [None] * X.shape[1]
+        for j, position in enumerate(indexer.positions):
+            arrays[position] = block[:, j]
+        for position, col in zip(indexer.others, _take_columns(X, indexer.others)):
+            arrays[position] = col
+        return _assemble_frame([(X.columns.tolist(), arrays)], X.index, as_df)
+
+
 def _eqls(lam, v):
     return np.abs(lam - v) <= EPS
 
@@ -43,6 +63,70 @@ def _validate_rows(X):
         raise ValueError('n_samples should be at least two, but got %i' % m)
 
 
+def vectorized(fun):
+    """A decorator that marks a function as vectorized, i.e., as accepting
+    a 2d ``np.ndarray`` (of all the selected columns at once) and returning
+    one of the same shape. The :class:`FunctionMapper` will apply such
+    functions to the entire block of selected columns in a single call,
+    rather than column by column.
+
+    Parameters
+    ----------
+
+    fun : callable
+        The vectorized function.
+
+
+    Returns
+    -------
+
+    fun : callable
+        The function, marked as vectorized.
+
+
+    Examples
+    --------
+
+        >>> import numpy as np
+        >>> from skutil.preprocessing import FunctionMapper, vectorized
+        >>>
+        >>> @vectorized
+        ... def cube_root(x):
+        ...     return np.power(x, 0.333)
+        >>>
+        >>> trans = FunctionMapper(fun=cube_root)
+    """
+    fun._skutil_vectorized = True
+    return fun
+
+
+def _is_vectorized(fun):
+    """Whether a function can be applied to a 2d block at once: either
+    a unary NumPy ufunc, or a function marked with ``@vectorized``"""
+    if isinstance(fun, np.ufunc):
+        return fun.nin == 1
+    return getattr(fun, '_skutil_vectorized', False)
+
+
+def _shadowed_params(fun):
+    """The parameters of the ``FunctionMapper`` (``vectorized``, ``n_jobs``
+    and ``copy``) that ``fun`` accepts by name, and which therefore
+    cannot be passed through to it via the mapper's ``kwargs``"""
+    getargspec = getattr(inspect, 'getfullargspec', None) or inspect.getargspec
+    try:
+        spec = getargspec(fun)
+    except (TypeError, ValueError):  # builtins and ufuncs
+        return []
+
+    names = set(spec.args) | set(getattr(spec, 'kwonlyargs', None) or ())
+    return [p for p in ('vectorized', 'n_jobs', 'copy') if p in names]
+
+
+def _apply_by_column(X, fun, kwargs):
+    """Apply a function to each column of a frame in turn"""
+    return X.apply(lambda x: fun(x, **kwargs))
+
+
 class FunctionMapper(BaseSkutil, TransformerMixin):
     """Apply a function to a column or set of columns.
 
@@ -60,7 +144,37 @@ class FunctionMapper(BaseSkutil, TransformerMixin):
         The function to apply to the feature(s). This function will be
         applied via lambda expression to each column (independent of
         one another). Therefore, the callable should accept an array-like
-        argument.
+        argument. Any ``kwargs`` are passed to the function, except for
+        ``vectorized``, ``n_jobs`` and ``copy``, which are parameters of the
+        ``FunctionMapper`` itself. To pass arguments of these names to
+        ``fun``, bind them with ``functools.partial`` (a warning is issued
+        in ``fit`` if ``fun`` accepts any of them).
+
+    vectorized : bool or None, optional (default=None)
+        Whether ``fun`` is vectorized, i.e., accepts a 2d ``np.ndarray`` of all
+        the selected columns and returns one of the same shape. If so, it will be
+        applied to the entire block of selected columns in a single call rather
+        than column by column. If None, unary NumPy ufuncs (i.e., ``np.log1p``)
+        and functions marked with the :func:`vectorized` decorator are treated
+        as vectorized. Unary ufuncs are applied to float blocks in place (via
+        their ``out`` argument), without allocating another block.
+
+    n_jobs : int, 1 by default
+       The number of jobs to use for applying a function that is not vectorized.
+       This works by splitting the selected columns into one batch per job, and
+       applying the function to each batch's columns in parallel, which is useful
+       for expensive functions. Note that the function must be picklable (i.e.,
+       not a lambda) to be applied in separate processes.
+
+       If -1 all CPUs are used. If 1 is given, no parallel computing code
+       is used at all, which is useful for debugging. For n_jobs below -1,
+       (n_cpus + 1 + n_jobs) are used. Thus for n_jobs = -2, all CPUs but
+       one are used.
+
+    copy : bool, optional (default=True)
+        Whether to apply the function to a copy of ``X`` in ``transform``.
+        If False, the columns of ``X`` are replaced in place (and ``X`` is
+        returned), avoiding a copy of the entire frame.
 
 
     Attributes
@@ -102,12 +216,16 @@ class FunctionMapper(BaseSkutil, TransformerMixin):
 
     """
 
-    def __init__(self, cols=None, fun=None, **kwargs):
+    def __init__(self, cols=None, fun=None, vectorized=None, n_jobs=1, copy=True, **kwargs):
         super(FunctionMapper, self).__init__(cols=cols)
 
         self.fun = fun
+        self.vectorized = vectorized
+        self.n_jobs = n_jobs
+        self.copy = copy
         self.kwargs = kwargs
 
+    @profiled
     def fit(self, X, y=None):
         """Fit the transformer.
 
@@ -143,6 +261,13 @@ class FunctionMapper(BaseSkutil, TransformerMixin):
             if not hasattr(self.fun, '__call__'):
                 raise ValueError('passed fun arg is not a function')
 
+            # these were once passed to fun via kwargs, but are now our own
+            shadowed = _shadowed_params(self.fun)
+            if shadowed:
+                warnings.warn('fun accepts the argument(s) %s, but these are parameters of the '
+                              'FunctionMapper and will not be passed to fun; bind them with '
+                              'functools.partial instead' % ', '.join(shadowed), UserWarning)
+
         # since we aren't checking is fit, we should set
         # an arbitrary value to show validation has already occurred
         self.is_fit_ = True
@@ -152,6 +277,7 @@ class FunctionMapper(BaseSkutil, TransformerMixin):
 
         return self
 
+    @profiled
     def transform(self, X):
         """Transform a test matrix given the already-fit transformer.
 
@@ -160,25 +286,48 @@ class FunctionMapper(BaseSkutil, TransformerMixin):
 
         X : Pandas ``DataFrame``
             The Pandas frame to transform. The operation will
-            be applied to a copy of the input data, and the result
-            will be returned.
+            be applied to a copy of the input data (unless ``copy``
+            is False), and the result will be returned.
 
 
         Returns
         -------
 
         X : Pandas ``DataFrame``
-            The operation is applied to a copy of ``X``,
-            and the result set is returned.
+            The operation is applied to a copy of ``X`` (or
+            to ``X`` itself if ``copy`` is False), and the result
+            set is returned.
         """
         check_is_fitted(self, 'is_fit_')
-        X, _ = validate_is_pd(X, self.cols)
+        X, _ = validate_is_pd(X, self.cols, copy=self.copy)
         cols = _cols_if_none(X, self.cols)
+        fun, kwargs, n_jobs = self.fun, self.kwargs, self.n_jobs
+
+        vectorize = _is_vectorized(fun) if self.vectorized is None else self.vectorized
+        if vectorize:
+            # apply the function to the entire block at once (in place, if the
+            # block is a writeable float copy, and not a view of the frame)
+            block = X[cols].as_matrix()
+            if isinstance(fun, np.ufunc) and block.dtype.kind == 'f' \
+                    and block.flags.writeable and 'out' not in kwargs:
+                fun(block, out=block, **kwargs)
+            else:
+                block = fun(block, **kwargs)
+            X[cols] = block
+
+        elif n_jobs == 1:
+            X[cols] = _apply_by_column(X[cols], fun, kwargs)
+
+        else:
+            # apply the function to one batch of columns per job
+            n_batches = min(len(cols), n_jobs if n_jobs > 0 else cpu_count() + 1 + n_jobs)
+            batches = [b.tolist() for b in np.array_split(np.asarray(cols, dtype=object), max(n_batches, 1))]
+            results = Parallel(n_jobs=n_jobs)(
+                delayed(_apply_by_column)(X[batch], fun, kwargs) for batch in batches)
+
+            for batch, result in zip(batches, results):
+                X[batch] = result
 
-        # apply the function
-        # TODO: do we want to change the behavior to where the function
-        # should accept an entire frame and not a series?
-        X[cols] = X[cols].apply(lambda x: self.fun(x, **self.kwargs))
         return X
 
 
@@ -206,11 +355,175 @@ def _mul(a, b):
     return (a * b).values
 
 
+def _interaction_products(block, ii, jj):
+    """Compute the products of the pairs of columns (``ii[k]``, ``jj[k]``)
+    of a matrix (no validation since internally used). The pairs are
+    grouped into runs sharing a left-hand column (as are the pairs of the
+    upper triangle, in ``np.triu_indices`` order), and each run is computed
+    as a single broadcasted product, written directly into its position
+    in the output (without any intermediate arrays when, as in the upper
+    triangle, the right-hand columns of the run are contiguous).
+
+    Parameters
+    ----------
+
+    block : np.ndarray or ``scipy.sparse.csc_matrix``, shape=(n_samples, n_features)
+        The matrix. If it is sparse, the products will be, too.
+
+    ii : np.ndarray, shape=(n_pairs,)
+        The left-hand column of each pair
+
+    jj : np.ndarray, shape=(n_pairs,)
+        The right-hand column of each pair
+
+
+    Returns
+    -------
+
+    products : np.ndarray (Fortran-ordered) or ``scipy.sparse.csc_matrix``, shape=(n_samples, n_pairs)
+    """
+    n_pairs = ii.shape[0]
+    if not n_pairs:
+        return (sp.csc_matrix if sp.issparse(block) else np.empty)((block.shape[0], 0), dtype=block.dtype)
+
+    breaks = np.flatnonzero(np.diff(ii)) + 1
+    bounds = list(zip(np.r_[0, breaks], np.r_[breaks, n_pairs]))
+
+    if sp.issparse(block):
+        # scaling the rows of the right-hand columns by the left-hand one preserves sparsity
+        return sp.hstack([sp.diags(block[:, ii[s]].toarray().ravel()).dot(block[:, jj[s:e]])
+                          for s, e in bounds], format='csc')
+
+    out = np.empty((block.shape[0], n_pairs), dtype=block.dtype, order='F')
+    for s, e in bounds:
+        js = jj[s:e]
+        right = block[:, js[0]:js[-1] + 1] if np.all(np.diff(js) == 1) else block[:, js]
+        np.multiply(block[:, ii[s]:ii[s] + 1], right, out=out[:, s:e])
+    return out
+
+
+def _abs_correlation(X, y):
+    """Compute the absolute Pearson correlation of each
+    column of ``X`` with ``y`` (no validation since internally
+    used). Constant columns will have a NaN correlation.
+    """
+    X = X.toarray() if sp.issparse(X) else np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    X = X - X.mean(axis=0)
+    y = y - y.mean()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.abs(y.dot(X)) / (np.sqrt((X * X).sum(axis=0)) * np.sqrt(y.dot(y)))
+
+
+# the sklearn univariate scores that can be used to screen interactions
+_SCREENING_SCORES = ('f_classif', 'f_regression', 'mutual_info_classif', 'mutual_info_regression')
+
+
+def _interaction_scorer(screening):
+    """Get the function that scores a block of interaction terms
+    against the target for a ``screening`` criterion: 'correlation'
+    (absolute), one of the sklearn univariate scores (i.e., 'f_regression'
+    or 'mutual_info_classif'), or a callable that takes ``(X, y)`` and
+    returns either the scores or a tuple of (scores, pvalues).
+    """
+    if screening == 'correlation':
+        return _abs_correlation
+
+    if hasattr(screening, '__call__'):
+        score_func = screening
+    elif screening in _SCREENING_SCORES:
+        from sklearn import feature_selection
+        score_func = getattr(feature_selection, screening, None)
+        if score_func is None:
+            raise ValueError('%s is not available in this version of sklearn' % screening)
+    else:
+        raise ValueError('screening must be a callable or one of %s, but got %r'
+                         % (str(('correlation',) + _SCREENING_SCORES), screening))
+
+    def score(X, y):
+        scores = score_func(X, y)
+        return np.asarray(scores[0] if isinstance(scores, tuple) else scores, dtype=np.float64)
+    return score
+
+
+def _screen_interactions(blocks, score, y, k=None, threshold=None):
+    """Screen blocks of interaction terms against a target, keeping
+    only the (at most) ``k`` best-scoring terms, with a score of at least
+    ``threshold``. Only the scores of the best terms seen so far are held,
+    so the blocks can be generated lazily, and never need to all be held
+    in memory at once. Terms whose score is NaN (i.e., constant
+    terms) are never kept.
+
+    Parameters
+    ----------
+
+    blocks : iterable of tuples, (positions, X)
+        The blocks of interaction terms, ``X``, and their positions
+        in the sequence of all interaction terms.
+
+    score : callable
+        The function that scores each of the terms
+        of a block against ``y`` (see ``_interaction_scorer``)
+
+    y : array_like, shape=(n_samples,)
+        The target
+
+    k : int or None, optional (default=None)
+        The maximum number of terms to keep. Ties are
+        resolved in favor of the earlier term.
+
+    threshold : float or None, optional (default=None)
+        The minimum score of the terms to keep.
+
+
+    Returns
+    -------
+
+    positions : np.ndarray, shape=(n_kept,)
+        The (sorted) positions of the kept terms
+
+    scores : np.ndarray, shape=(n_kept,)
+        The scores of the kept terms
+    """
+    kept, kept_scores = np.empty(0, dtype=np.intp), np.empty(0)
+    for positions, X in blocks:
+        scores = score(X, y)
+
+        keep = ~np.isnan(scores)
+        if threshold is not None:
+            keep &= scores >= threshold
+
+        kept = np.concatenate([kept, np.asarray(positions)[keep]])
+        kept_scores = np.concatenate([kept_scores, scores[keep]])
+
+        if k is not None and kept.shape[0] > k:
+            best = np.argsort(-kept_scores, kind='mergesort')[:k]  # stable: ties favor the earlier
+            kept, kept_scores = kept[best], kept_scores[best]
+
+    order = np.argsort(kept)
+    return kept[order], kept_scores[order]
+
+
 class InteractionTermTransformer(BaseSkutil, TransformerMixin):
     """A class that will generate interaction terms between selected columns.
     An interaction captures some relationship between two independent variables
     in the form of In = (xi * xj).
 
+    With the default (product) interaction, the interactions are computed on
+    the contiguous block of selected columns at once (one broadcasted product per
+    left-hand column of the upper triangle of pairs) directly into the output.
+    If any of the selected columns are sparse, the interactions will be too.
+    To bound the memory required for a large number of columns, the interactions
+    can be generated in blocks of columns via ``iter_interactions``.
+
+    Since the number of interactions grows quadratically with the number of
+    columns, they can also be screened against the target at fit time (see
+    ``screening``): the interactions are generated and scored in blocks of
+    ``chunk_size`` columns, and only the best-scoring pairs are kept (so fit
+    memory is bounded by the block size). Only the kept pairs will be
+    computed by ``transform``.
+
     Parameters
     ----------
 
@@ -241,6 +554,29 @@ class InteractionTermTransformer(BaseSkutil, TransformerMixin):
         If set to True, will only return features in feature_names
         and their respective generated interaction terms.
 
+        Unless screened, the interaction terms are ordered by pair (in the
+        order of ``cols``) if ``only_return_interactions``, and otherwise are
+        appended to ``X`` in order of their names.
+
+    screening : str, callable or None, optional (default=None)
+        How to score the interaction terms against ``y`` in ``fit``, in order to
+        keep only the best (per ``k`` and ``threshold``). One of 'correlation'
+        (absolute Pearson correlation), 'f_regression', 'f_classif',
+        'mutual_info_regression' or 'mutual_info_classif' (the sklearn univariate
+        scores), or a callable that takes ``(X, y)`` and returns either an array
+        of scores or a tuple of (scores, pvalues). If None, all interaction terms
+        are kept.
+
+    k : int or None, optional (default=None)
+        If ``screening``, the maximum number of interaction terms to keep.
+
+    threshold : float or None, optional (default=None)
+        If ``screening``, the minimum score of the interaction terms to keep.
+
+    chunk_size : int, optional (default=256)
+        The number of interaction terms generated (and scored) at once when
+        ``screening``, and by default in ``iter_interactions``.
+
 
     Attributes
     ----------
@@ -248,6 +584,13 @@ class InteractionTermTransformer(BaseSkutil, TransformerMixin):
     fun_ : callable
         The interaction term function
 
+    pairs_ : list of tuples or None
+        If ``screening``, the pairs of column names whose interaction
+        terms were kept (in the order they will be generated). Else None.
+
+    scores_ : np.ndarray or None
+        If ``screening``, the scores of the kept interaction terms. Else None.
+
 
     Examples
     --------
@@ -276,13 +619,19 @@ class InteractionTermTransformer(BaseSkutil, TransformerMixin):
     """
 
     def __init__(self, cols=None, as_df=True, interaction_function=None,
-                 name_suffix='I', only_return_interactions=False):
+                 name_suffix='I', only_return_interactions=False, screening=None,
+                 k=None, threshold=None, chunk_size=256):
 
         super(InteractionTermTransformer, self).__init__(cols=cols, as_df=as_df)
         self.interaction_function = interaction_function
         self.name_suffix = name_suffix
         self.only_return_interactions = only_return_interactions
+        self.screening = screening
+        self.k = k
+        self.threshold = threshold
+        self.chunk_size = chunk_size
 
+    @profiled
     def fit(self, X, y=None):
         """Fit the transformer.
 
@@ -295,16 +644,16 @@ class InteractionTermTransformer(BaseSkutil, TransformerMixin):
             all of them if ``cols`` is None. Furthermore, ``X`` will
             not be altered in the process of the fit.
 
-        y : None
-            Passthrough for ``sklearn.pipeline.Pipeline``. Even
-            if explicitly set, will not change behavior of ``fit``.
+        y : array_like, shape=(n_samples,), optional (default=None)
+            The target, against which the interaction terms are scored
+            if ``screening``. Else, a passthrough for ``sklearn.pipeline.Pipeline``.
 
         Returns
         -------
 
         self
         """
-        X, self.cols = validate_is_pd(X, self.cols)
+        X, self.cols = validate_is_pd(X, self.cols, copy=False)  # X is only read
         cols = _cols_if_none(X, self.cols)
         self.fun_ = self.interaction_function if self.interaction_function is not None else _mul
 
@@ -316,8 +665,29 @@ class InteractionTermTransformer(BaseSkutil, TransformerMixin):
         if len(cols) < 2:
             raise ValueError('need at least two columns')
 
+        self.pairs_ = self.scores_ = None
+        if self.screening is not None:
+            score = _interaction_scorer(self.screening)
+            if y is None:
+                raise ValueError('y is required to screen the interactions')
+            if self.k is None and self.threshold is None:
+                raise ValueError('screening requires k and/or threshold')
+            if self.chunk_size < 1:
+                raise ValueError('chunk_size must be a positive integer')
+
+            # generate (and score) the interactions a block at a time
+            ii, jj = np.triu_indices(len(cols), 1)
+            interaction_function, chunk_size = self._interaction_function(X, cols), self.chunk_size
+            blocks = ((np.arange(start, min(start + chunk_size, ii.shape[0])),
+                       interaction_function(ii[start:start + chunk_size], jj[start:start + chunk_size]))
+                      for start in range(0, ii.shape[0], chunk_size))
+
+            kept, self.scores_ = _screen_interactions(blocks, score, _as_numpy(y), self.k, self.threshold)
+            self.pairs_ = [(cols[ii[p]], cols[jj[p]]) for p in kept]
+
         return self
 
+    @profiled
     def transform(self, X):
         """Transform a test matrix given the already-fit transformer.
 
@@ -338,33 +708,116 @@ class InteractionTermTransformer(BaseSkutil, TransformerMixin):
             and the result set is returned.
         """
         check_is_fitted(self, 'fun_')
-        X, _ = validate_is_pd(X, self.cols)
+        X, _ = validate_is_pd(X, self.cols, copy=False)  # X is only read
         cols = _cols_if_none(X, self.cols)
 
-        n_features = len(cols)
-        suff = self.name_suffix
+        ii, jj = self._pairs(cols)
+        names = self._interaction_names(cols, ii, jj)
+        interactions = self._interaction_function(X, cols)(ii, jj)
 
-        fun = self.fun_
-        append_dict = {}
-        interaction_names = [x for x in cols]
+        # if we only want to keep interaction names, filter now
+        keep = cols if self.only_return_interactions else X.columns.tolist()
 
-        # we can do this in N^2 or we can do it in the uglier N choose 2...
-        for i in range(n_features - 1):
-            for j in range(i + 1, n_features):
-                col_i, col_j = cols[i], cols[j]
-                new_nm = '%s_%s_%s' % (col_i, col_j, suff)
-                append_dict[new_nm] = fun(X[col_i], X[col_j])
-                interaction_names.append(new_nm)
+        # don't densify sparse interactions
+        if sp.issparse(interactions):
+            if not self.as_df:
+                return sp.hstack([_sparse_columns_to_csr(X, keep), interactions], format='csr')
+            interactions = _csr_to_sparse_frame(interactions, names, X.index)
 
-        # create DF 2:
-        df2 = pd.DataFrame.from_dict(append_dict)
-        X = pd.concat([X, df2], axis=1)
+        return _assemble_frame([(keep, X), (names, interactions)], X.index, self.as_df)
 
-        # if we only want to keep interaction names, filter now
-        X = X if not self.only_return_interactions else X[interaction_names]
+    def iter_interactions(self, X, chunk_size=None):
+        """Generate the interaction terms of a test matrix given the
+        already-fit transformer in blocks of (at most) ``chunk_size``
+        columns, so that they needn't all be held in memory at once.
+        Only the interaction terms are generated (not the columns of ``X``).
 
-        # return matrix if needed
-        return X if self.as_df else X.as_matrix()
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame``
+            The Pandas frame to transform. It will not be altered.
+
+        chunk_size : int, optional (default=None)
+            The maximum number of interaction terms in each
+            block. If None, ``self.chunk_size`` is used.
+
+
+        Returns
+        -------
+
+        blocks : generator
+            A generator of the blocks of interaction terms, each a Pandas
+            ``DataFrame`` (if ``as_df``, else a Numpy ``ndarray``, or a
+            ``scipy.sparse`` CSR matrix if the selected columns are sparse).
+        """
+        check_is_fitted(self, 'fun_')
+        chunk_size = self.chunk_size if chunk_size is None else chunk_size
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be a positive integer')
+
+        X, _ = validate_is_pd(X, self.cols, copy=False)
+        cols = _cols_if_none(X, self.cols)
+
+        ii, jj = self._pairs(cols)
+        names = self._interaction_names(cols, ii, jj)
+        interaction_function = self._interaction_function(X, cols)
+
+        for start in range(0, ii.shape[0], chunk_size):
+            stop = start + chunk_size
+            interactions = interaction_function(ii[start:stop], jj[start:stop])
+
+            if not sp.issparse(interactions):
+                yield _assemble_frame([(names[start:stop], interactions)], X.index, self.as_df)
+            elif self.as_df:
+                yield _csr_to_sparse_frame(interactions, names[start:stop], X.index)
+            else:
+                yield interactions.tocsr()
+
+    def _pairs(self, cols):
+        """Get the positions in cols of the pairs to interact: all of
+        them (the upper triangle), unless they were screened in ``fit``."""
+        if getattr(self, 'pairs_', None) is None:
+            ii, jj = np.triu_indices(len(cols), 1)
+            if self.only_return_interactions:
+                return ii, jj
+
+            # the interactions are appended in order of their names (as
+            # DataFrame.from_dict ordered them), rather than of their pairs
+            names = self._interaction_names(cols, ii, jj)
+            order = np.array(sorted(range(len(names)), key=names.__getitem__), dtype=np.intp)
+            return ii[order], jj[order]
+
+        positions = dict((c, i) for i, c in enumerate(cols))
+        missing = [c for pair in self.pairs_ for c in pair if c not in positions]
+        if missing:
+            raise ValueError('screened interaction columns %s are missing' % str(sorted(set(missing))))
+
+        ii = np.array([positions[a] for a, _ in self.pairs_], dtype=np.intp)
+        jj = np.array([positions[b] for _, b in self.pairs_], dtype=np.intp)
+        return ii, jj
+
+    def _interaction_names(self, cols, ii, jj):
+        """Get the names of the interactions of the pairs of (the positions of) cols"""
+        suff = self.name_suffix
+        return ['%s_%s_%s' % (cols[i], cols[j], suff) for i, j in zip(ii, jj)]
+
+    def _interaction_function(self, X, cols):
+        """Get a function that computes the interactions of given pairs of
+        (the positions of) cols as a single matrix."""
+        fun = self.fun_
+
+        # arbitrary functions of two Series must be applied to each pair in turn
+        if fun is not _mul:
+            return lambda ii, jj: np.column_stack([np.asarray(fun(X[cols[i]], X[cols[j]]))
+                                                   for i, j in zip(ii, jj)]) \
+                if ii.shape[0] else np.empty((X.shape[0], 0))
+
+        if any(_is_sparse_column(X[c]) for c in cols):
+            block = _sparse_columns_to_csr(X, cols).tocsc()
+        else:
+            block = np.asfortranarray(X[cols].as_matrix())
+        return lambda ii, jj: _interaction_products(block, ii, jj)
 
 
 class SelectiveScaler(BaseSkutil, TransformerMixin):
@@ -388,9 +841,14 @@ class SelectiveScaler(BaseSkutil, TransformerMixin):
         this transformer can only operate on numeric columns, not explicitly 
         setting the ``cols`` parameter may result in errors for categorical data.
 
-    scaler : instance of a sklearn Scaler, optional (default=StandardScaler)
+    scaler : instance of a sklearn Scaler, optional (default=None)
         The scaler to fit against ``cols``. Must be an instance of
-        ``sklearn.preprocessing.BaseScaler``.
+        ``sklearn.preprocessing.BaseScaler``. The scaler itself is
+        never fit; a clone of it is fit as ``scaler_``. If None,
+        a ``sklearn.preprocessing.StandardScaler`` is used. To use
+        ``partial_fit`` or ``fit_chunks``, the scaler must support
+        ``partial_fit`` (as do ``StandardScaler``, ``MinMaxScaler``
+        and ``MaxAbsScaler``).
 
     as_df : bool, optional (default=True)
         Whether to return a Pandas ``DataFrame`` in the ``transform``
@@ -409,6 +867,8 @@ class SelectiveScaler(BaseSkutil, TransformerMixin):
         the ``fit`` method, which performs some validation, to ensure the
         ``scaler`` parameter has been validated.
 
+    scaler_ : the fit clone of ``scaler``
+
 
     Examples
     --------
@@ -435,10 +895,20 @@ class SelectiveScaler(BaseSkutil, TransformerMixin):
         4          -1.021849          1.263460                1.4               0.2
     """
 
-    def __init__(self, cols=None, scaler=StandardScaler(), as_df=True):
+    def __init__(self, cols=None, scaler=None, as_df=True):
         super(SelectiveScaler, self).__init__(cols=cols, as_df=as_df)
         self.scaler = scaler
 
+    def _new_scaler(self):
+        """Clone the scaler (or create the default one) to fit. Since
+        ``transform`` always scales a private copy of the selected
+        columns, the clone is set to scale in place if it can."""
+        scaler = clone(self.scaler) if self.scaler is not None else StandardScaler()
+        if 'copy' in scaler.get_params():
+            scaler.set_params(copy=False)
+        return scaler
+
+    @profiled
     def fit(self, X, y=None):
         """Fit the transformer.
 
@@ -460,17 +930,93 @@ class SelectiveScaler(BaseSkutil, TransformerMixin):
 
         self
         """
-        # check on state of X and cols
-        X, self.cols = validate_is_pd(X, self.cols)
-        cols = _cols_if_none(X, self.cols)
+        # check on state of X and cols (X is only read)
+        X, self.cols = validate_is_pd(X, self.cols, copy=False)
 
         # throws exception if the cols don't exist
-        self.scaler.fit(X[cols])
+        self._col_indexer = _ColumnIndexer(X.columns, self.cols)
+        self.scaler_ = self._new_scaler().fit(X.take(self._col_indexer.positions, axis=1).as_matrix())
 
         # this is our fit param
         self.is_fit_ = True
         return self
 
+    @profiled
+    def partial_fit(self, X, y=None):
+        """Incrementally fit the transformer on a batch of rows, so
+        that only the batch (and not all of the data) must be held in
+        memory. Successive calls update the fit scaler; a call to ``fit``
+        will discard it. The ``scaler`` must support ``partial_fit``.
+
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame``
+            A batch of rows of the Pandas frame to fit. The batch will
+            only be fit on the prescribed ``cols`` (see ``__init__``) or
+            all of them if ``cols`` is None. ``X`` will not be altered
+            in the process of the fit.
+
+        y : None
+            Passthrough for ``sklearn.pipeline.Pipeline``. Even
+            if explicitly set, will not change behavior of ``partial_fit``.
+
+        Returns
+        -------
+
+        self
+        """
+        # check on state of X and cols (X is only read)
+        X, self.cols = validate_is_pd(X, self.cols, copy=False)
+
+        # throws exception if the cols don't exist
+        self._col_indexer = _column_indexer(getattr(self, '_col_indexer', None), X, self.cols)
+        if not hasattr(self, 'scaler_'):
+            scaler = self._new_scaler()
+            if not hasattr(scaler, 'partial_fit'):
+                raise ValueError('%s does not support partial_fit' % type(scaler).__name__)
+            self.scaler_ = scaler
+
+        self.scaler_.partial_fit(X.take(self._col_indexer.positions, axis=1).as_matrix())
+        self.is_fit_ = True
+        return self
+
+    @profiled
+    def fit_chunks(self, chunks, y=None):
+        """Fit the transformer on data too large to hold in memory, by
+        calling ``partial_fit`` on each of an iterable of row-chunks of the
+        frame in turn. Any previously fit scaler is discarded.
+
+        Parameters
+        ----------
+
+        chunks : iterable or callable
+            An iterable of row-chunks of the frame (each a Pandas ``DataFrame``
+            with the same columns), such as the ``TextFileReader`` returned by
+            ``pd.read_csv(path, chunksize=n)``, or a callable that returns a new
+            such iterator when called. Chunks with no rows are skipped.
+
+        y : None
+            Passthrough for ``sklearn.pipeline.Pipeline``. Even
+            if explicitly set, will not change behavior of ``fit_chunks``.
+
+        Returns
+        -------
+
+        self
+        """
+        if hasattr(self, 'scaler_'):
+            del self.scaler_
+
+        for chunk in _chunk_source(chunks)():
+            if chunk.shape[0]:
+                self.partial_fit(chunk)
+
+        if not hasattr(self, 'scaler_'):
+            raise ValueError('no rows in the data')
+        return self
+
+    @profiled
     def transform(self, X):
         """Transform a test matrix given the already-fit transformer.
 
@@ -478,25 +1024,26 @@ class SelectiveScaler(BaseSkutil, TransformerMixin):
         ----------
 
         X : Pandas ``DataFrame``
-            The Pandas frame to transform. The operation will
-            be applied to a copy of the input data, and the result
-            will be returned.
+            The Pandas frame to transform. ``X`` will not be
+            altered; only the selected columns are copied (and
+            scaled in place), and the result will be returned.
 
 
         Returns
         -------
 
         X : Pandas ``DataFrame``
-            The operation is applied to a copy of ``X``,
-            and the result set is returned.
+            The frame with the selected columns scaled.
         """
-        # check on state of X and cols
-        X, _ = validate_is_pd(X, self.cols)
-        cols = _cols_if_none(X, self.cols)
+        check_is_fitted(self, 'scaler_')
+        # check on state of X and cols (X is only read)
+        X, _ = validate_is_pd(X, self.cols, copy=False)
+        indexer = _column_indexer(getattr(self, '_col_indexer', None), X, self.cols)
 
-        # Fails through if cols don't exist or if the scaler isn't fit yet
-        X[cols] = self.scaler.transform(X[cols])
-        return X if self.as_df else X.as_matrix()
+        # a (writeable) float copy of the block, which the scaler scales in place
+        block = np.array(X.take(indexer.positions, axis=1).as_matrix(), dtype=np.float64)
+        block = self.scaler_.transform(block)
+        return _replace_columns(X, indexer, block, self.as_df)
 
 
 class BoxCoxTransformer(BaseSkutil, TransformerMixin):
@@ -555,6 +1102,7 @@ class BoxCoxTransformer(BaseSkutil, TransformerMixin):
         self.n_jobs = n_jobs
         self.shift_amt = shift_amt
 
+    @profiled
     def fit(self, X, y=None):
         """Fit the transformer.
 
@@ -599,6 +1147,7 @@ class BoxCoxTransformer(BaseSkutil, TransformerMixin):
 
         return self
 
+    @profiled
     def transform(self, X):
         """Transform a test matrix given the already-fit transformer.
 
@@ -727,6 +1276,7 @@ class YeoJohnsonTransformer(BaseSkutil, TransformerMixin):
         super(YeoJohnsonTransformer, self).__init__(cols=cols, as_df=as_df)
         self.n_jobs = n_jobs
 
+    @profiled
     def fit(self, X, y=None):
         """Fit the transformer.
 
@@ -763,6 +1313,7 @@ class YeoJohnsonTransformer(BaseSkutil, TransformerMixin):
 
         return self
 
+    @profiled
     def transform(self, X):
         """Transform a test matrix given the already-fit transformer.
 
@@ -921,7 +1472,14 @@ def _yj_llf(data, lmb):
 
 class SpatialSignTransformer(BaseSkutil, TransformerMixin):
     """Project the feature space of a matrix into a multi-dimensional sphere
-    by dividing each feature by its squared norm.
+    by dividing each feature by its squared norm (``axis=0``), or, as in the
+    usual definition of the spatial sign [1], by dividing each row by its norm
+    across the selected features (``axis=1``).
+
+    The norms are computed for all of the selected features at once
+    (``np.einsum``, a single pass over the block), and the block is divided
+    in place. For ``axis=1``, the rows are processed in chunks of ``chunk_size``,
+    so no temporary larger than a chunk is allocated.
        
     Parameters
     ----------
@@ -936,13 +1494,9 @@ class SpatialSignTransformer(BaseSkutil, TransformerMixin):
         setting the ``cols`` parameter may result in errors for categorical data.
 
     n_jobs : int, 1 by default
-       The number of jobs to use for the computation. This works by
-       estimating each of the feature lambdas in parallel.
-       
-       If -1 all CPUs are used. If 1 is given, no parallel computing code
-       is used at all, which is useful for debugging. For n_jobs below -1,
-       (n_cpus + 1 + n_jobs) are used. Thus for n_jobs = -2, all CPUs but
-       one are used.
+       Ignored. Retained for backwards compatibility: the norms
+       are now computed for all of the features at once, which is
+       much cheaper than dispatching a job per feature.
 
     as_df : bool, optional (default=True)
         Whether to return a Pandas ``DataFrame`` in the ``transform``
@@ -950,18 +1504,38 @@ class SpatialSignTransformer(BaseSkutil, TransformerMixin):
         Since most skutil transformers depend on explicitly-named
         ``DataFrame`` features, the ``as_df`` parameter is True by default.
 
+    axis : int, optional (default=0)
+        If 0, each feature is divided by its squared norm (as learned
+        in ``fit``). If 1, each row is divided by its (Euclidean) norm
+        across the selected features, which requires no fit; rows whose
+        norm is zero are left as zeros.
+
+    chunk_size : int, optional (default=4096)
+        The number of rows that are normalized at once when ``axis=1``.
+
 
     Attributes
     ----------
 
     sq_nms_ : dict
-       The squared norms for each feature
+       The squared norms for each feature (None if ``axis=1``)
+
+
+    References
+    ----------
+
+    .. [1] Serneels, S., De Nolf, E. & Van Espen, P. J. "Spatial Sign Preprocessing:
+           A Simple Way To Impart Moderate Robustness to Multivariate Estimators" (2006).
+           Journal of Chemical Information and Modeling, 46(3), 1402-1409.
     """
 
-    def __init__(self, cols=None, n_jobs=1, as_df=True):
+    def __init__(self, cols=None, n_jobs=1, as_df=True, axis=0, chunk_size=4096):
         super(SpatialSignTransformer, self).__init__(cols=cols, as_df=as_df)
         self.n_jobs = n_jobs
+        self.axis = axis
+        self.chunk_size = chunk_size
 
+    @profiled
     def fit(self, X, y=None):
         """Fit the transformer.
 
@@ -983,18 +1557,28 @@ class SpatialSignTransformer(BaseSkutil, TransformerMixin):
 
         self
         """
-        # check on state of X and cols
-        X, self.cols = validate_is_pd(X, self.cols)
+        # check on state of X and cols (X is only read)
+        X, self.cols = validate_is_pd(X, self.cols, copy=False)
         cols = _cols_if_none(X, self.cols)
 
-        # Now get sqnms in parallel
-        self.sq_nms_ = dict(zip(cols,
-                                Parallel(n_jobs=self.n_jobs)(
-                                    delayed(_sq_norm_single)
-                                    (X[nm]) for nm in cols)))
-
+        if self.axis not in (0, 1):
+            raise ValueError('axis must be 0 or 1, but got %r' % self.axis)
+        if self.axis == 1:
+            if self.chunk_size < 1:
+                raise ValueError('chunk_size must be a positive integer')
+            self._col_indexer = _ColumnIndexer(X.columns, self.cols)
+            self.sq_nms_ = None
+            return self
+
+        # get all the sq norms at once
+        block = np.asarray(X[cols].as_matrix(), dtype=np.float64)
+        self.sq_nms_ = dict(zip(cols, _sq_norms(block).tolist()))
+
+        # index the columns in the order of the norms
+        self._col_indexer = _ColumnIndexer(X.columns, list(self.sq_nms_.keys()))
         return self
 
+    @profiled
     def transform(self, X):
         """Transform a test matrix given the already-fit transformer.
 
@@ -1016,21 +1600,42 @@ class SpatialSignTransformer(BaseSkutil, TransformerMixin):
         """
         check_is_fitted(self, 'sq_nms_')
 
-        # check on state of X and cols
-        X, _ = validate_is_pd(X, self.cols)
+        # check on state of X and cols (X is only read)
+        X, _ = validate_is_pd(X, self.cols, copy=False)
         sq_nms_ = self.sq_nms_
+        cols = self.cols if sq_nms_ is None else list(sq_nms_.keys())
+        indexer = _column_indexer(getattr(self, '_col_indexer', None), X, cols)
 
-        # scale by norms
-        for nm, the_norm in six.iteritems(sq_nms_):
-            X[nm] /= the_norm
+        # a (writeable) float copy of the block, which is scaled in place
+        block = np.array(X.take(indexer.positions, axis=1).as_matrix(), dtype=np.float64)
 
-        return X if self.as_df else X.as_matrix()
+        if sq_nms_ is None:
+            _row_spatial_sign(block, self.chunk_size)
+        else:
+            # scale by norms
+            block /= np.array([sq_nms_[nm] for nm in cols])
+
+        # put the scaled columns in place of the originals
+        return _replace_columns(X, indexer, block, self.as_df)
 
 
-def _sq_norm_single(x, zero_action=np.inf):
-    x = np.asarray(x)
-    nrm = np.dot(x, x)
+def _sq_norms(X, zero_action=np.inf):
+    """Compute the squared norm of each column of a matrix at once.
+    What if a squared norm is zero? We want to avoid a divide-by-zero
+    situation, so those will be ``zero_action``.
+    """
+    nrms = np.einsum('ij,ij->j', X, X)
+    nrms[nrms == 0] = zero_action
+    return nrms
+
 
-    # What if a squared norm is zero? We want to
-    # avoid a divide-by-zero situation...
-    return nrm if not nrm == 0 else zero_action
+def _row_spatial_sign(X, chunk_size=4096):
+    """Divide each row of a (float) matrix by its norm in place,
+    a chunk of rows at a time. Zero rows are left as zeros.
+    """
+    for start in range(0, X.shape[0], chunk_size):
+        chunk = X[start:start + chunk_size]
+        nrms = np.sqrt(np.einsum('ij,ij->i', chunk, chunk))
+        nrms[nrms == 0] = 1.
+        chunk /= nrms[:, np.newaxis]
+    return X
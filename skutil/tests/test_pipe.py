@@ -1,15 +1,20 @@
 import warnings
 
+import numpy as np
 import pandas as pd
+from numpy.testing import assert_array_almost_equal, assert_array_equal
 from scipy.stats import randint, uniform
 from sklearn.datasets import load_iris
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler, RobustScaler
 
 from skutil.decomposition import *
 from skutil.feature_selection import *
 from skutil.grid_search import RandomizedSearchCV, GridSearchCV
+from skutil.pipeline import compile_pipeline
+from skutil.preprocessing.transform import _yj_transform_y
 from skutil.preprocessing import *
 from skutil.utils import report_grid_score_detail
 from skutil.testing import assert_fails
@@ -168,3 +173,76 @@ def test_regular_grid():
 
     # test with short y
     assert_fails(search.fit, ValueError, X_train, [0, 1, 2])
+
+
+def test_compiled_pipeline():
+    x = X.copy()
+    x.iloc[::7, 1] = np.nan
+    cols, before = x.columns.tolist(), x.copy()
+
+    pipe = Pipeline([
+        ('dropper',      FeatureDropper(cols=[])),
+        ('imputer',      SelectiveImputer(fill='median')),
+        ('scaler',       SelectiveScaler(cols=cols[:2], scaler=RobustScaler())),
+        ('boxcox',       BoxCoxTransformer(cols=cols[2:])),
+        ('spatial',      SpatialSignTransformer(cols=cols[1:3])),
+        ('interactions', InteractionTermTransformer(cols=cols[:3])),
+        ('pca',          SelectivePCA(n_components=3, whiten=True, weight=True)),
+        ('model',        LogisticRegression())
+    ]).fit(x, iris.target)
+
+    plan = compile_pipeline(pipe, cols)
+    expected = Pipeline(pipe.steps[:-1]).transform(x)
+    assert plan.feature_names == expected.columns.tolist()
+    assert_array_almost_equal(plan.transform(x), expected.values)
+
+    with warnings.catch_warnings():  # fit with names, predicting on a matrix
+        warnings.simplefilter('ignore')
+        assert_array_equal(plan.predict(x), pipe.predict(x))
+        assert_array_almost_equal(plan.predict_proba(x.values), pipe.predict_proba(x))
+
+        # a single row, and columns in another order
+        assert_array_equal(plan.predict(x.values[3]), pipe.predict(x.iloc[3:4]))
+        assert_array_almost_equal(plan.transform(x[cols[::-1]]), expected.values)
+
+    # the input is not altered
+    assert_array_equal(x.values, before.values)
+    assert_fails(plan.transform, ValueError, x.values[:, :2])
+
+
+def test_compiled_encoder():
+    # categorical levels, with missing and unseen values
+    x = pd.DataFrame({'a': ['x', 'y', np.nan, 'x'], 'b': ['p', 'q', 'q', 'p'],
+                      'n': [1., 2., 3., 4.]}).astype({'a': object, 'b': object})
+    encoder = OneHotCategoricalEncoder().fit(x)
+    plan = compile_pipeline(encoder, x.columns)
+    test = pd.DataFrame({'a': ['y', 'z', np.nan], 'b': ['q', 'p', 'r'],
+                         'n': [5., 6., 7.]}).astype({'a': object, 'b': object})
+    assert plan.feature_names == encoder.trans_nms_
+    assert_array_almost_equal(plan.transform(test), encoder.transform(test).values)
+
+
+def test_compiled_pipeline_steps():
+    # retention, vectorized functions, row-wise spatial signs and SVD
+    pipe = Pipeline([
+        ('retainer', FeatureRetainer(cols=X.columns[:3].tolist())),
+        ('mapper',   FunctionMapper(fun=np.log1p)),
+        ('spatial',  SpatialSignTransformer(axis=1)),
+        ('svd',      SelectiveTruncatedSVD(cols=X.columns[:2].tolist(), n_components=1))
+    ]).fit(X)
+    plan = compile_pipeline(pipe, X.columns)
+    assert plan.feature_names == pipe.transform(X).columns.tolist()
+    assert_array_almost_equal(plan.transform(X), pipe.transform(X).values)
+    assert_fails(plan.predict, ValueError, X)
+
+    # the Yeo-Johnson op, against the transformer's own function
+    from skutil.pipeline import _YeoJohnson
+    y = np.linspace(-3, 3, 13)
+    for lam in (0., 0.5, 2., 2.5):
+        assert_array_almost_equal(_YeoJohnson(np.array([0]), [lam])(y.reshape(-1, 1).copy())[:, 0],
+                                  _yj_transform_y(y, lam))
+
+    # functions that are not vectorized cannot be compiled
+    mapper = FunctionMapper(fun=lambda s: s * 2).fit(X)
+    assert_fails(compile_pipeline, ValueError, mapper, X.columns)
+    assert_fails(compile_pipeline, ValueError, Pipeline([('scaler', StandardScaler())]).fit(X), X.columns)
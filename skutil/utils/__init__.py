@@ -2,6 +2,7 @@
 skutil.utils provides common utilitarian functionality for the skutil library.
 skutil.utils.fixes adds adaptations for bridging the scikit-learn 0.17 to 0.18 behavior.
 skutil.utils.metaestimators adapts scikit-learns metaestimator for more specific use of skutil.
+skutil.utils.profiling provides opt-in instrumentation of the time and memory spent in skutil estimators.
 """
 
 from .fixes import *
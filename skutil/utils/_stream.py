@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+"""
+Internal accumulators for computing statistics over row-chunks of
+data that may be too large to hold in memory all at once.
+"""
+
+from __future__ import print_function, division, absolute_import
+import numpy as np
+from sklearn.externals.joblib import Parallel, delayed
+
+__all__ = [
+    '_AverageRanker',
+    '_CorrelationAccumulator',
+    '_blocked_crossprod',
+    '_chunk_source',
+    '_chunked_correlation'
+]
+
+# The number of columns in each block of the blocked
+# cross-product. Small enough that a pair of blocks sits
+# comfortably in cache for typical chunk sizes, large enough
+# that each product is a meaningful level-3 BLAS call.
+BLOCK_SIZE = 256
+
+
+def _chunk_source(chunks, n_passes=1):
+    """Get a callable that will produce a fresh iterator over
+    the chunks each time it is called.
+
+    Parameters
+    ----------
+
+    chunks : iterable or callable
+        Either a (re-)iterable of chunks, or a callable that
+        returns a new iterator of chunks each time it is called
+        (i.e., ``lambda: pd.read_csv(path, chunksize=100000)``).
+
+    n_passes : int, optional (default=1)
+        The number of times the chunks will be traversed. If greater
+        than one and ``chunks`` is a one-shot iterator (like a generator),
+        a ``ValueError`` will be raised.
+    """
+    if hasattr(chunks, '__call__'):
+        return chunks
+
+    if not hasattr(chunks, '__iter__'):
+        raise TypeError('chunks must be an iterable or a callable, '
+                        'but got %s' % type(chunks))
+
+    if n_passes > 1 and iter(chunks) is chunks:
+        raise ValueError('chunks will be traversed %i times, and must be '
+                         're-iterable (or a callable that returns a new '
+                         'iterator), but got a one-shot iterator' % n_passes)
+
+    return lambda: iter(chunks)
+
+
+def _blocked_crossprod(X, block_size=BLOCK_SIZE, n_jobs=1):
+    """Compute the cross-product matrix, X'X, in square column blocks.
+    Only the upper-triangular blocks are computed; the lower triangle
+    is mirrored. Each block is a single ``np.dot`` (BLAS ``dgemm``) call,
+    which releases the GIL, so the blocks are dispatched to a thread pool
+    when ``n_jobs`` is not 1.
+
+    Parameters
+    ----------
+
+    X : np.ndarray, shape=(n_samples, n_features)
+        The matrix.
+
+    block_size : int, optional (default=256)
+        The number of columns in each block.
+
+    n_jobs : int, optional (default=1)
+        The number of threads to use for the block products.
+
+
+    Returns
+    -------
+
+    xtx : np.ndarray, shape=(n_features, n_features)
+        The cross-product matrix
+    """
+    p = X.shape[1]
+    if p <= block_size:
+        return X.T.dot(X)
+
+    bounds = [(s, min(s + block_size, p)) for s in range(0, p, block_size)]
+    pairs = [(bi, bj) for i, bi in enumerate(bounds) for bj in bounds[i:]]
+
+    if n_jobs == 1:
+        blocks = [np.dot(X[:, bi[0]:bi[1]].T, X[:, bj[0]:bj[1]]) for bi, bj in pairs]
+    else:
+        blocks = Parallel(n_jobs=n_jobs, backend='threading')(
+            delayed(np.dot)(X[:, bi[0]:bi[1]].T, X[:, bj[0]:bj[1]]) for bi, bj in pairs)
+
+    xtx = np.empty((p, p), dtype=np.float64)
+    for (bi, bj), block in zip(pairs, blocks):
+        xtx[bi[0]:bi[1], bj[0]:bj[1]] = block
+        xtx[bj[0]:bj[1], bi[0]:bi[1]] = block.T
+
+    return xtx
+
+
+class _CorrelationAccumulator(object):
+    """Accumulates the sufficient statistics for a Pearson correlation
+    matrix over row-chunks. Rather than raw sums and cross-products (which
+    suffer from catastrophic cancellation), each chunk's mean-centered
+    cross-product matrix is merged into the running co-moment matrix using
+    the pairwise update of Chan, Golub & LeVeque [1]. Memory is O(n_features^2)
+    regardless of the number of rows.
+
+    Parameters
+    ----------
+
+    block_size : int, optional (default=256)
+        The number of columns per block in the cross-product computation.
+
+    n_jobs : int, optional (default=1)
+        The number of threads to use for the block products.
+
+
+    Attributes
+    ----------
+
+    n_samples_ : int
+        The number of rows seen so far.
+
+    mean_ : np.ndarray, shape=(n_features,)
+        The column means of the rows seen so far.
+
+    comoment_ : np.ndarray, shape=(n_features, n_features)
+        The sum of cross-products of the deviations from the mean.
+
+
+    References
+    ----------
+
+    .. [1] Chan, T., Golub, G. & LeVeque, R. "Updating Formulae and a Pairwise
+           Algorithm for Computing Sample Variances" (1979). Stanford CS Tech
+           Report STAN-CS-79-773.
+    """
+
+    def __init__(self, block_size=BLOCK_SIZE, n_jobs=1):
+        self.block_size = block_size
+        self.n_jobs = n_jobs
+        self.n_samples_ = 0
+        self.mean_ = None
+        self.comoment_ = None
+
+    def update(self, X):
+        """Merge the statistics of a new chunk of rows.
+
+        Parameters
+        ----------
+
+        X : array_like, shape=(n_samples, n_features)
+            The chunk of rows. Must be entirely numeric and finite.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        n_b = X.shape[0]
+
+        if self.mean_ is not None and X.shape[1] != self.mean_.shape[0]:
+            raise ValueError('expected %i features, but got %i'
+                             % (self.mean_.shape[0], X.shape[1]))
+        if n_b == 0:
+            return self
+
+        mean_b = X.mean(axis=0)
+        comoment_b = _blocked_crossprod(X - mean_b, self.block_size, self.n_jobs)
+
+        if self.mean_ is None:
+            self.n_samples_, self.mean_, self.comoment_ = n_b, mean_b, comoment_b
+        else:
+            n_a = self.n_samples_
+            n = n_a + n_b
+            delta = mean_b - self.mean_
+
+            comoment_b += np.outer(delta, delta) * (n_a * n_b / n)
+            self.comoment_ += comoment_b
+            self.mean_ += delta * (n_b / n)
+            self.n_samples_ = n
+
+        return self
+
+    def variance(self, ddof=1):
+        """Get the column variances of the rows seen so far."""
+        return np.diag(self.comoment_) / (self.n_samples_ - ddof)
+
+    def correlation(self):
+        """Get the correlation matrix of the rows seen so far. The
+        correlation with any constant feature is NaN.
+
+        Returns
+        -------
+
+        corr : np.ndarray, shape=(n_features, n_features)
+            The Pearson correlation matrix
+        """
+        if self.comoment_ is None:
+            raise ValueError('no rows have been accumulated')
+
+        sd = np.sqrt(np.diag(self.comoment_))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.comoment_ / np.outer(sd, sd)
+
+        constant = sd == 0
+        corr[constant, :] = np.nan
+        corr[:, constant] = np.nan
+        return corr
+
+
+def _same_value(a, b):
+    """Elementwise equality, where NaNs are equal to one another"""
+    return (a == b) | (np.isnan(a) & np.isnan(b))
+
+
+class _AverageRanker(object):
+    """Collects the distinct values (and their counts) of each
+    column over row-chunks, so that a later pass can map each value
+    to its average rank over the entire dataset (as ``method='average'``
+    in ``pandas.Series.rank``). Memory is proportional to the number of
+    distinct values per column, not the number of rows, but all of the
+    distinct values are held in memory at once: for continuous features,
+    that is as many as there are rows. Each chunk is merged into the
+    running distinct values with a binary search, in time linear in
+    their number (plus the time to sort the chunk).
+
+
+    Attributes
+    ----------
+
+    values_ : list of np.ndarray
+        The sorted distinct values in each column.
+
+    starts_ : list of np.ndarray
+        For each distinct value, the number of values strictly less than it.
+
+    counts_ : list of np.ndarray
+        The number of occurrences of each distinct value.
+    """
+
+    def __init__(self):
+        self.values_ = None
+        self.counts_ = None
+        self.starts_ = None
+
+    def update(self, X):
+        """Merge the distinct values of a new chunk of rows.
+
+        Parameters
+        ----------
+
+        X : array_like, shape=(n_samples, n_features)
+            The chunk of rows.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if self.values_ is None:
+            self.values_ = [np.empty(0, dtype=np.float64) for _ in range(X.shape[1])]
+            self.counts_ = [np.empty(0, dtype=np.int64) for _ in range(X.shape[1])]
+        elif X.shape[1] != len(self.values_):
+            raise ValueError('expected %i features, but got %i'
+                             % (len(self.values_), X.shape[1]))
+
+        for j in range(X.shape[1]):
+            vals, cts = np.unique(X[:, j], return_counts=True)
+            values, counts = self.values_[j], self.counts_[j]
+
+            # merge into the running (sorted) distinct values, rather than
+            # re-sorting everything gathered so far
+            idcs = np.searchsorted(values, vals)
+            found = idcs < values.shape[0]
+            found[found] = _same_value(values[idcs[found]], vals[found])
+            counts[idcs[found]] += cts[found]
+
+            new = ~found
+            if new.any():
+                self.values_[j] = np.insert(values, idcs[new], vals[new])
+                self.counts_[j] = np.insert(counts, idcs[new], cts[new])
+
+        self.starts_ = None  # stale
+        return self
+
+    def transform(self, X):
+        """Map each value in ``X`` to its average rank.
+
+        Parameters
+        ----------
+
+        X : array_like, shape=(n_samples, n_features)
+            The chunk of rows. Each value must have been
+            seen in a prior call to ``update``.
+        """
+        if self.values_ is None:
+            raise ValueError('no rows have been accumulated')
+        if self.starts_ is None:
+            self.starts_ = [np.cumsum(c) - c for c in self.counts_]
+
+        X = np.asarray(X, dtype=np.float64)
+        ranks = np.empty(X.shape, dtype=np.float64)
+        for j in range(X.shape[1]):
+            idcs = np.searchsorted(self.values_[j], X[:, j])
+            ranks[:, j] = self.starts_[j][idcs] + (self.counts_[j][idcs] + 1) / 2.
+
+        return ranks
+
+
+def _chunked_correlation(chunk_source, method='pearson', block_size=BLOCK_SIZE, n_jobs=1):
+    """Compute a correlation matrix over row-chunks of numeric matrices.
+    For ``method='spearman'``, the chunks are traversed twice: once to
+    collect the per-column value counts from which the ranks are derived,
+    and once to accumulate the Pearson correlation of the ranks.
+
+    Parameters
+    ----------
+
+    chunk_source : callable
+        A callable that returns a new iterator over the chunks
+        (np.ndarrays of shape=(n_samples, n_features)) each time
+        it is called. See ``_chunk_source``.
+
+    method : str, optional (default='pearson')
+        One of ('pearson', 'spearman'). Kendall's tau cannot be
+        decomposed into per-chunk sufficient statistics.
+
+    block_size : int, optional (default=256)
+        The number of columns per block in the cross-product computation.
+
+    n_jobs : int, optional (default=1)
+        The number of threads to use for the block products.
+
+
+    Returns
+    -------
+
+    corr : np.ndarray, shape=(n_features, n_features)
+        The correlation matrix
+    """
+    if method not in ('pearson', 'spearman'):
+        raise ValueError('cannot compute a chunked correlation for method=%s' % method)
+
+    ranker = None
+    if method == 'spearman':
+        ranker = _AverageRanker()
+        for chunk in chunk_source():
+            ranker.update(chunk)
+
+    acc = _CorrelationAccumulator(block_size=block_size, n_jobs=n_jobs)
+    for chunk in chunk_source():
+        acc.update(chunk if ranker is None else ranker.transform(chunk))
+
+    return acc.correlation()
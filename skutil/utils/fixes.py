@@ -9,9 +9,11 @@ Author: Taylor G Smith
 """
 
 from __future__ import division, absolute_import, print_function
+import hashlib
 import numbers
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 import sklearn
 import sys
 from abc import ABCMeta, abstractmethod
@@ -173,6 +175,169 @@ def _cols_if_none(X, self_cols):
     return X.columns.tolist() if not self_cols else self_cols
 
 
+# pandas 0.20 added vectorized hashing of arrays (in pandas.util)
+try:
+    from pandas.util import hash_array as _hash_array
+except ImportError:
+    _hash_array = None
+
+
+def _schema_hash(columns):
+    """Compute a cheap (vectorized, where the version of Pandas
+    allows) digest of the names of the columns of a frame, in order.
+    Unlike the builtin ``hash`` (which is salted per process for strings
+    in Python 3), the digest is the same in every process, so it still
+    matches once a fitted transformer is pickled and loaded elsewhere.
+
+    Parameters
+    ----------
+
+    columns : array_like, shape=(n_features,)
+        The column names (i.e., ``X.columns``).
+    """
+    columns = np.asarray(columns)
+    if _hash_array is None:
+        data = repr(tuple(columns.tolist())).encode('utf-8')
+    else:  # hash_array uses a fixed key, so is deterministic
+        data = _hash_array(columns).tobytes()
+    return hashlib.sha1(data).hexdigest()
+
+
+# pandas 0.24 moved the SparseArray to pandas.arrays
+try:
+    from pandas.arrays import SparseArray as _SparseArray
+except ImportError:
+    from pandas import SparseArray as _SparseArray
+
+# pandas 0.20 moved the (cython) sparse indices to pandas._libs, and
+# only from then can a SparseDataFrame be built from a scipy.sparse matrix
+try:
+    from pandas._libs.sparse import IntIndex as _IntIndex
+    _SPARSE_FRAME_FROM_SPMATRIX = True
+except ImportError:
+    from pandas._sparse import IntIndex as _IntIndex
+    _SPARSE_FRAME_FROM_SPMATRIX = False
+
+
+def _is_sparse_column(x):
+    """Determine whether a column (``pd.Series``) of a
+    ``DataFrame`` is sparse (i.e., a ``SparseSeries`` in older
+    versions of Pandas, or of a ``SparseDtype`` in newer ones).
+
+    Parameters
+    ----------
+
+    x : Pandas ``Series``
+        The column
+
+
+    Returns
+    -------
+
+    bool
+        True if ``x`` is sparse
+    """
+    return isinstance(x.values, _SparseArray)
+
+
+def _sparse_columns_to_csr(X, cols, dtype=np.float64):
+    """Get the given columns of a ``DataFrame`` as a ``scipy.sparse``
+    CSR matrix, without densifying any sparse columns (with a fill value
+    of zero). Dense columns (or sparse ones with a nonzero fill value)
+    are densified one at a time, keeping only their nonzero values.
+
+    Parameters
+    ----------
+
+    X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+        The frame
+
+    cols : list, shape=(n_cols,)
+        The names of the columns to extract
+
+    dtype : numpy dtype, optional (default=np.float64)
+        The dtype of the matrix
+
+
+    Returns
+    -------
+
+    M : ``scipy.sparse.csr_matrix``, shape=(n_samples, n_cols)
+    """
+    shape = (X.shape[0], len(cols))
+    if not cols:
+        return sp.csr_matrix(shape, dtype=dtype)
+
+    data, indices, indptr = [], [], [0]
+    for col in cols:
+        x = X[col].values
+        if isinstance(x, _SparseArray) and x.fill_value == 0:
+            idcs = x.sp_index.to_int_index().indices
+            vals = np.asarray(x.sp_values, dtype=dtype)
+        else:
+            vals = np.asarray(x, dtype=dtype)
+            idcs = np.flatnonzero(vals)
+            vals = vals[idcs]
+
+        data.append(vals)
+        indices.append(idcs)
+        indptr.append(indptr[-1] + idcs.shape[0])
+
+    return sp.csc_matrix((np.concatenate(data), np.concatenate(indices), indptr), shape=shape).tocsr()
+
+
+def _csr_to_sparse_frame(M, columns, index=None):
+    """Create a ``DataFrame`` of sparse columns (with a fill
+    value of zero) from a ``scipy.sparse`` matrix, without
+    densifying it.
+
+    Parameters
+    ----------
+
+    M : ``scipy.sparse`` matrix, shape=(n_samples, n_features)
+        The matrix
+
+    columns : list, shape=(n_features,)
+        The column names
+
+    index : array_like, shape=(n_samples,), optional (default=None)
+        The index of the frame
+
+
+    Returns
+    -------
+
+    X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+    """
+    if not _SPARSE_FRAME_FROM_SPMATRIX:  # pandas < 0.20
+        # build the SparseSeries a column at a time, from the CSC column slices
+        M = M.tocsc()
+        n_samples = M.shape[0]
+        index = pd.RangeIndex(n_samples) if index is None else index
+        series = [pd.SparseSeries(_SparseArray(M.data[M.indptr[j]:M.indptr[j + 1]],
+                                               sparse_index=_IntIndex(n_samples, M.indices[M.indptr[j]:M.indptr[j + 1]]
+                                                                      .astype(np.int32)),
+                                               fill_value=0), index=index)
+                  for j in range(M.shape[1])]
+        X = pd.SparseDataFrame(dict(enumerate(series)), index=index, columns=range(M.shape[1]),
+                               default_fill_value=0)
+        X.columns = columns
+        return X
+
+    if not hasattr(_SparseArray, 'from_spmatrix'):  # pandas < 0.25
+        return pd.SparseDataFrame(M, index=index, columns=columns, default_fill_value=0)
+
+    # build a column at a time, since some versions of DataFrame.sparse.from_spmatrix
+    # give the columns a fill value of NaN rather than zero
+    M = M.tocsc()
+    X = pd.DataFrame(dict((j, _SparseArray.from_spmatrix(M[:, j:j + 1]))
+                          for j in range(M.shape[1])), columns=range(M.shape[1]))
+    X.columns = columns
+    if index is not None:
+        X.index = index
+    return X
+
+
 def _is_integer(x):
     """Determine whether some object ``x`` is an
     integer type (int, long, etc). This is part of the 
@@ -0,0 +1,342 @@
+"""Opt-in instrumentation of skutil estimators. Within a ``profile`` block,
+each call to the ``fit``, ``transform`` (etc.) method of a skutil estimator
+records its wall time, the memory it allocated and the number of times it
+copied its input, broken down into internal phases:
+
+  * ``validate``: validating (and copying) the input, in ``validate_is_pd``
+  * ``assemble``: assembling the output frame
+  * ``compute``: everything else (i.e., computing statistics)
+
+Outside of a ``profile`` block, the instrumentation amounts to a
+global lookup per call.
+"""
+from __future__ import print_function, division, absolute_import
+import threading
+from collections import namedtuple
+from functools import wraps
+from timeit import default_timer
+
+import pandas as pd
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+__all__ = [
+    'profile',
+    'profiled',
+    'ProfileRecord',
+    'ProfileReport'
+]
+
+PHASES = ('validate', 'compute', 'assemble')
+
+# the active _Profiler, or None (the only state consulted when profiling is off)
+_PROFILER = None
+
+
+class ProfileRecord(namedtuple('ProfileRecord', ('estimator', 'method', 'wall_time', 'phases',
+                                                 'bytes_allocated', 'copies', 'depth'))):
+    """The profile of a single call to an estimator's method.
+
+    Parameters
+    ----------
+
+    estimator : str
+        The name of the estimator's class.
+
+    method : str
+        The name of the method (i.e., 'fit').
+
+    wall_time : float
+        The wall time of the call, in seconds.
+
+    phases : dict
+        The wall time (in seconds) spent in each of the phases ('validate',
+        'compute' and 'assemble'). Time spent in calls to other (nested)
+        skutil estimators is recorded in their own records, and is not included
+        in any phase, so the phases may not sum to ``wall_time``.
+
+    bytes_allocated : int or None
+        The peak memory allocated during the call, in bytes, over that
+        allocated at its start. None if memory was not traced.
+
+    copies : int
+        The number of times the input frame was copied.
+
+    depth : int
+        The number of skutil estimator calls this call is nested within
+        (i.e., 0 for a call made directly by the user).
+    """
+    __slots__ = ()
+
+
+class ProfileReport(object):
+    """The records collected within a ``profile`` block.
+
+    Attributes
+    ----------
+
+    records : list
+        The ``ProfileRecord`` of each call, in the order the calls completed.
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def summary(self):
+        """Summarize the records, per estimator and method.
+
+        Returns
+        -------
+
+        summary : pd.DataFrame
+            A frame indexed by (estimator, method), with the number of ``calls``,
+            the total ``wall_time`` and time spent in each phase, the total number
+            of ``copies`` and the maximum ``bytes_allocated`` by any single call.
+        """
+        columns = ['estimator', 'method', 'calls', 'wall_time'] + list(PHASES) + ['copies', 'bytes_allocated']
+        rows = [[r.estimator, r.method, 1, r.wall_time] + [r.phases[p] for p in PHASES] +
+                [r.copies, r.bytes_allocated] for r in self.records]
+
+        frame = pd.DataFrame(rows, columns=columns)
+        frame['bytes_allocated'] = frame['bytes_allocated'].astype(float)
+        return frame.groupby(['estimator', 'method'], sort=False).agg(
+            dict([(c, 'sum') for c in columns[2:-1]] + [('bytes_allocated', 'max')]))
+
+    def __repr__(self):
+        return 'ProfileReport(n_records=%i)' % len(self.records)
+
+
+class _Frame(object):
+    """The running state of a single profiled call"""
+    __slots__ = ('estimator', 'method', 'start', 'phases', 'phase', 'phase_start',
+                 'children', 'copies', 'mem_start', 'mem_peak')
+
+    def __init__(self, estimator, method):
+        self.estimator = estimator
+        self.method = method
+        self.phases = dict((p, 0.) for p in PHASES)
+        self.phase = None
+        self.children = 0.
+        self.copies = 0
+
+
+class _Profiler(object):
+    def __init__(self, report, callback, trace_memory):
+        self.report = report
+        self.callback = callback
+        self.trace_memory = trace_memory
+        self._local = threading.local()
+        self._last_peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+
+    @property
+    def stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _peak(self):
+        # the peak since the last sample, which is then reset for the next frame
+        current, peak = tracemalloc.get_traced_memory()
+        if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+
+            tracemalloc.reset_peak()
+            return peak
+
+        # otherwise, the peak is that since tracing started, and so can only be
+        # attributed to the current frame if it rose since the last sample (if
+        # not, the current memory is a lower bound of the peak since then)
+        last, self._last_peak = self._last_peak, peak
+        return peak if peak > last else current
+
+    def enter(self, estimator, method):
+        stack = self.stack
+        frame = _Frame(estimator, method)
+
+        if self.trace_memory:
+            peak = self._peak()
+            if stack:
+                stack[-1].mem_peak = max(stack[-1].mem_peak, peak)
+            frame.mem_start = frame.mem_peak = tracemalloc.get_traced_memory()[0]
+
+        stack.append(frame)
+        frame.start = default_timer()
+        return frame
+
+    def exit(self, frame):
+        wall_time = default_timer() - frame.start
+        stack = self.stack
+        stack.pop()
+
+        bytes_allocated = None
+        if self.trace_memory:
+            frame.mem_peak = max(frame.mem_peak, self._peak())
+            bytes_allocated = frame.mem_peak - frame.mem_start
+            if stack:
+                stack[-1].mem_peak = max(stack[-1].mem_peak, frame.mem_peak)
+
+        if stack:
+            stack[-1].children += wall_time
+
+        phases = frame.phases
+        phases['compute'] = max(0., wall_time - frame.children - phases['validate'] - phases['assemble'])
+        record = ProfileRecord(estimator=frame.estimator, method=frame.method, wall_time=wall_time,
+                               phases=phases, bytes_allocated=bytes_allocated,
+                               copies=frame.copies, depth=len(stack))
+
+        self.report.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+
+class _Phase(object):
+    """Times a phase of the innermost profiled call. Phases do not nest:
+    a phase entered within another is attributed to the outer one."""
+    __slots__ = ('name', 'frame')
+
+    def __init__(self, name, frame):
+        self.name = name
+        self.frame = frame
+
+    def __enter__(self):
+        frame = self.frame
+        if frame is not None and frame.phase is None:
+            frame.phase = self
+            frame.phase_start = default_timer()
+        return self
+
+    def __exit__(self, *exc):
+        frame = self.frame
+        if frame is not None and frame.phase is self:
+            frame.phases[self.name] += default_timer() - frame.phase_start
+            frame.phase = None
+
+
+class _NullPhase(object):
+    """The phase returned when profiling is off"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def _current_frame():
+    profiler = _PROFILER
+    if profiler is None:
+        return None
+    stack = profiler.stack
+    return stack[-1] if stack else None
+
+
+def _phase(name):
+    """Return a context manager that times the block it wraps as
+    the ``name`` phase of the innermost profiled call, if any."""
+    if _PROFILER is None:
+        return _NULL_PHASE
+    return _Phase(name, _current_frame())
+
+
+def _record_copy(n=1):
+    """Record that the innermost profiled call copied its input"""
+    if _PROFILER is None:
+        return
+
+    frame = _current_frame()
+    if frame is not None:
+        frame.copies += n
+
+
+def profiled(method):
+    """Decorator for the methods of skutil estimators (i.e., ``fit`` and
+    ``transform``) whose calls should be recorded within a ``profile`` block.
+
+    Parameters
+    ----------
+
+    method : callable
+        The method to profile.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profiler = _PROFILER
+        if profiler is None:
+            return method(self, *args, **kwargs)
+
+        frame = profiler.enter(self.__class__.__name__, method.__name__)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            profiler.exit(frame)
+
+    return wrapper
+
+
+class profile(object):
+    """A context manager within which the calls to skutil estimators
+    are profiled. Profiles cannot be nested.
+
+    Parameters
+    ----------
+
+    callback : callable, optional (default=None)
+        A function to call with each ``ProfileRecord`` as its call completes
+        (i.e., to log it), in addition to adding it to the report.
+
+    trace_memory : bool, optional (default=False)
+        Whether to record the memory allocated by each call, with ``tracemalloc``
+        (which must be available, i.e., on Python 3.4+). Before Python 3.9, the
+        peak cannot be reset between calls, so a call's peak is only exact if
+        it exceeds that of every call before it; otherwise, it is the largest
+        memory in use at the start or end of any of the call's nested calls
+        (a lower bound). Tracing memory slows down allocation considerably,
+        and so inflates the wall times.
+
+
+    Examples
+    --------
+
+        >>> from skutil.utils.profiling import profile
+        >>> from skutil.preprocessing import SelectiveScaler
+        >>> from skutil.utils import load_iris_df
+        >>>
+        >>> X = load_iris_df(include_tgt=False)
+        >>> with profile() as report:
+        ...     _ = SelectiveScaler().fit_transform(X)
+        >>> [(r.estimator, r.method) for r in report.records]
+        [('SelectiveScaler', 'fit'), ('SelectiveScaler', 'transform')]
+    """
+
+    def __init__(self, callback=None, trace_memory=False):
+        self.callback = callback
+        self.trace_memory = trace_memory
+
+    def __enter__(self):
+        global _PROFILER
+        if _PROFILER is not None:
+            raise ValueError('profiles cannot be nested')
+        if self.trace_memory and tracemalloc is None:
+            raise ValueError('trace_memory requires tracemalloc (Python 3.4+)')
+
+        self._started = False
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+
+        self.report = ProfileReport()
+        _PROFILER = _Profiler(self.report, self.callback, self.trace_memory)
+        return self.report
+
+    def __exit__(self, *exc):
+        global _PROFILER
+        _PROFILER = None
+        if self._started:
+            tracemalloc.stop()
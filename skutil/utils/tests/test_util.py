@@ -1,6 +1,8 @@
 from __future__ import print_function, absolute_import, division
 import warnings
+import os
 import sys
+from unittest import SkipTest
 import numpy as np
 import pandas as pd
 from numpy.testing import (assert_almost_equal, assert_array_almost_equal)
@@ -12,7 +14,8 @@ from skutil.utils.fixes import _SK17GridSearchCV, _SK17RandomizedSearchCV
 from skutil.decomposition import SelectivePCA
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.pipeline import Pipeline
-from skutil.utils.util import __min_log__, __max_exp__
+from skutil.utils.util import (__min_log__, __max_exp__, _assemble_frame, _ColumnIndexer,
+                               _column_indexer, _take_columns)
 from skutil.utils.fixes import _validate_y, _check_param_grid
 from skutil.utils.metaestimators import if_delegate_has_method, if_delegate_isinstance
 
@@ -370,3 +373,122 @@ def test_conf_matrix():
 
 def test_load_iris_df():
     assert 'target' in load_iris_df(True, 'target').columns.values
+
+
+def test_assemble_frame():
+    X = pd.DataFrame.from_records(data=[[1, 'a', 2.], [3, 'b', 4.]], columns=['x', 'y', 'z'])
+    X.index = ['r1', 'r2']
+    block = np.array([[0.5, 1.5], [2.5, 3.5]])
+
+    # blocks are placed by position, and the index is preserved (not aligned)
+    out = _assemble_frame([(['A', 'B'], block), (['z', 'y'], X)], X.index)
+    assert out.columns.tolist() == ['A', 'B', 'z', 'y']
+    assert out.index.tolist() == ['r1', 'r2']
+    assert_array_almost_equal(out[['A', 'B', 'z']].values, [[0.5, 1.5, 2.], [2.5, 3.5, 4.]])
+    assert out['y'].tolist() == ['a', 'b']
+    assert X.columns.tolist() == ['x', 'y', 'z']  # untouched
+
+    # duplicate names survive, empty blocks are skipped
+    out = _assemble_frame([(['x'], block[:, :1]), (['x'], X), ([], None)], X.index)
+    assert out.shape == (2, 2)
+    assert_array_almost_equal(out.values.astype(float), [[0.5, 1.], [2.5, 3.]])
+
+    # as an array
+    arr = _assemble_frame([(['A', 'B'], block), (['z'], X)], X.index, as_df=False)
+    assert_array_almost_equal(arr, [[0.5, 1.5, 2.], [2.5, 3.5, 4.]])
+
+
+def test_column_indexer():
+    X = pd.DataFrame.from_records(data=[[1, 'a', 2.], [3, 'b', 4.]], columns=['x', 'y', 'z'])
+    indexer = _ColumnIndexer(X.columns, ['z', 'x'])
+    assert indexer.positions.tolist() == [2, 0]
+    assert indexer.others.tolist() == [1]
+    assert indexer.other_names == ['y']
+
+    # the cached indexer is used only for frames of the same schema
+    assert _column_indexer(indexer, X.copy(), ['z', 'x']) is indexer
+    reordered = _column_indexer(indexer, X[['z', 'y', 'x']], ['z', 'x'])
+    assert reordered is not indexer
+    assert reordered.positions.tolist() == [0, 2]
+    assert not indexer.matches(pd.Index(['x', 'y', 'w']))
+
+    # the Index last matched is not rehashed (Index objects are immutable), nor pickled
+    other = pd.Index(['x', 'y', 'z'])
+    assert indexer.matches(other) and indexer._last_match is other
+    assert not indexer.matches(pd.Index(['x', 'y', 'w'])) and indexer._last_match is other
+    assert '_last_match' not in indexer.__getstate__()
+
+    # None selects everything; missing names fail
+    assert _ColumnIndexer(X.columns).positions.tolist() == [0, 1, 2]
+    assert_fails(_ColumnIndexer, KeyError, X.columns, ['x', 'w'])
+
+    # integer cols that are not labels are positions (i.e., for an ndarray's default names)
+    assert _ColumnIndexer(X.columns, [0, 2]).positions.tolist() == [0, 2]
+    assert _ColumnIndexer(X.columns, [-1]).other_names == ['x', 'y']
+    assert_fails(_ColumnIndexer, KeyError, X.columns, [0, 3])
+    assert_fails(_ColumnIndexer, KeyError, pd.Index([2, 0, 1]), [3])
+    assert _ColumnIndexer(pd.Index([2, 0, 1]), [0]).positions.tolist() == [1]
+
+    # mixed and homogeneous frames alike
+    cols = _take_columns(X, [2, 1])
+    assert_array_almost_equal(cols[0], [2., 4.])
+    assert cols[1].tolist() == ['a', 'b']
+    assert_array_almost_equal(_take_columns(X[['x', 'z']], [1])[0], [2., 4.])
+    assert _take_columns(X, []) == []
+
+    # the schema digest does not depend on the (salted) builtin hash, so
+    # an indexer still matches once pickled and loaded in another process
+    import subprocess
+    code = 'from skutil.utils.fixes import _schema_hash; print(_schema_hash([\'x\', \'y\', \'z\']))'
+    digests = set(subprocess.check_output([sys.executable, '-c', code],
+                                          env=dict(os.environ, PYTHONHASHSEED=seed)).decode().strip()
+                  for seed in ('1', '2'))
+    assert digests == {indexer.schema}
+
+
+def test_profile():
+    from skutil.utils.profiling import profile
+    from skutil.preprocessing import BoxCoxTransformer
+
+    records = []
+    with profile(callback=records.append) as report:
+        SelectivePCA(n_components=2).fit(X_no_targ).transform(X_no_targ)
+        BoxCoxTransformer().fit(X_no_targ)
+
+    assert [(r.estimator, r.method) for r in report.records] == [
+        ('SelectivePCA', 'fit'), ('SelectivePCA', 'transform'), ('BoxCoxTransformer', 'fit')]
+    assert records == report.records
+
+    # the transform assembles its output; only the Box-Cox fit copies its input
+    pca_fit, pca_transform, bc_fit = report.records
+    assert pca_transform.phases['assemble'] > 0
+    assert pca_fit.phases['assemble'] == 0
+    assert pca_fit.copies == pca_transform.copies == 0
+    assert bc_fit.copies > 0
+    assert all(r.bytes_allocated is None and r.depth == 0 for r in report.records)
+    assert report.summary().shape == (3, 7)
+
+    # nothing is recorded once the block exits, and profiles do not nest
+    SelectivePCA(n_components=2).fit(X_no_targ)
+    assert len(report.records) == 3
+    with profile():
+        assert_fails(profile().__enter__, ValueError)
+
+
+def test_profile_memory():
+    from skutil.utils import profiling
+    from skutil.preprocessing import SelectiveScaler
+
+    if profiling.tracemalloc is None:  # Python 2
+        assert_fails(profiling.profile(trace_memory=True).__enter__, ValueError)
+        raise SkipTest('tracemalloc is not available')
+
+    with profiling.profile(trace_memory=True) as report:
+        SelectiveScaler().fit(X_no_targ).transform(X_no_targ)
+    assert not profiling.tracemalloc.is_tracing()
+
+    # the transform at least allocates its output (150 x 4 floats)
+    fit, transform = report.records
+    assert fit.bytes_allocated >= 0
+    assert transform.bytes_allocated >= X_no_targ.shape[0] * X_no_targ.shape[1] * 8
+    assert report.summary()['bytes_allocated'].notnull().all()
@@ -12,8 +12,9 @@ from sklearn.datasets import load_iris, load_breast_cancer, load_boston
 from sklearn.externals import six
 from sklearn.metrics import confusion_matrix as cm
 from ..base import suppress_warnings
+from .profiling import _phase, _record_copy
 from .fixes import (_grid_detail, _is_integer, is_iterable, 
-                    _cols_if_none, dict_keys, dict_values)
+                    _cols_if_none, dict_keys, dict_values, _schema_hash, _SparseArray)
 
 try:
     # this causes a UserWarning to be thrown by matplotlib... should we squelch this?
@@ -205,6 +206,236 @@ def _def_headers(X):
     return ['V%i' % (i + 1) for i in range(m)]
 
 
+def _assemble_frame(blocks, index, as_df=True):
+    """Assemble the output of a transformer from blocks of columns
+    placed side by side (i.e., a block of new features followed by the
+    untouched, "passthrough" columns of the input frame). Unlike building
+    a frame for each block and concatenating them along the columns, each
+    run of adjacent columns that share a dtype is allocated once, as a single
+    array, and each column is copied into its position directly from its
+    source, without first copying the passthrough columns into an intermediate
+    frame. Columns are placed by position, and the output takes the given
+    index, so no alignment is performed (and the index of the input is
+    preserved, whatever it is).
+
+    Parameters
+    ----------
+
+    blocks : iterable of tuples, (names, data)
+        The blocks of columns, in order. ``data`` is either a 2d ``np.ndarray``,
+        whose columns are named ``names`` by position, a list of 1d columns
+        (as from ``_take_columns``), also named by position, or a Pandas
+        ``DataFrame``, from which the columns ``names`` are taken.
+
+    index : array_like, shape=(n_samples,)
+        The index of the output (typically, that of the input frame).
+
+    as_df : bool, optional (default=True)
+        Whether to return a Pandas ``DataFrame``. If False, a
+        Numpy ``ndarray`` will be returned instead.
+
+
+    Returns
+    -------
+
+    X : Pandas ``DataFrame`` or ``np.ndarray``, shape=(n_samples, n_features)
+        The assembled output
+    """
+    with _phase('assemble'):
+        return _assemble(blocks, index, as_df)
+
+
+def _assemble(blocks, index, as_df):
+    names, arrays = [], []
+    for block_names, data in blocks:
+        if not len(block_names):
+            continue
+        if isinstance(data, pd.DataFrame):
+            arrays.extend(data[nm].values for nm in block_names)
+        elif isinstance(data, list):
+            arrays.extend(data)
+        else:
+            arrays.extend(data[:, j] for j in range(data.shape[1]))
+        names.extend(block_names)
+
+    if not as_df:
+        arrays = [a.to_dense() if isinstance(a, _SparseArray) else a for a in arrays]
+        return np.column_stack(arrays) if arrays else np.empty((len(index), 0))
+
+    # Pandas builds a frame from separate columns one (costly) column at a time,
+    # so each run of columns that share a (numpy) dtype is stacked into a single
+    # block. Columns are keyed by position, so duplicate names are not lost
+    def is_dense(array):
+        # (before pandas 0.24, a SparseArray is an ndarray of only its non-fill values)
+        return isinstance(array.dtype, np.dtype) and not isinstance(array, _SparseArray)
+
+    frames, start = [], 0
+    for stop in range(1, len(arrays) + 1):
+        if stop < len(arrays) and is_dense(arrays[start]) and is_dense(arrays[stop]) \
+                and arrays[stop].dtype == arrays[start].dtype:
+            continue
+
+        run = arrays[start:stop]
+        if is_dense(run[0]):
+            frames.append(pd.DataFrame(np.column_stack(run), columns=range(start, stop)))
+        else:  # an extension (i.e., sparse) column
+            frames.append(pd.DataFrame({start: run[0]}, columns=[start]))
+        start = stop
+
+    if not frames:
+        return pd.DataFrame(index=index)
+
+    X = pd.concat(frames, axis=1) if len(frames) > 1 else frames[0]
+    X.index = index
+    X.columns = names
+    return X
+
+
+def _is_positional(columns, cols):
+    """Whether the selected ``cols`` are integer positions within
+    ``columns`` (whose labels are not themselves integers)"""
+    n_features = len(columns)
+    return columns.inferred_type != 'integer' and \
+        all(_is_integer(c) and -n_features <= c < n_features for c in cols)
+
+
+class _ColumnIndexer(object):
+    """The positions of the selected columns of a frame (and of the
+    remaining, "passthrough" columns), along with a hash of the frame's
+    schema (the names of its columns, in order). Transformers record one at
+    ``fit`` so that ``transform`` can select columns by position, rather
+    than resolving each name on each call (which, for the passthrough columns,
+    was quadratic in the number of columns), so long as the frame to transform
+    has the same schema. See ``_column_indexer``.
+
+    Parameters
+    ----------
+
+    columns : array_like, shape=(n_features,)
+        The column names of the frame (i.e., ``X.columns``).
+
+    cols : array_like, shape=(n_selected,), optional (default=None)
+        The names of the selected columns. If None, all columns
+        are selected. If any are not in ``columns``, a ``KeyError``
+        is raised, unless they are all integers (and the names are not),
+        in which case they are the positions of the selected columns.
+    """
+
+    def __init__(self, columns, cols=None):
+        # the last Index matched (they're immutable, so the same object needn't be rehashed)
+        self._last_match = columns if isinstance(columns, pd.Index) else None
+        columns = pd.Index(columns)
+        self.n_features = len(columns)
+        self.schema = _schema_hash(columns)
+
+        if cols is None:
+            positions = np.arange(self.n_features)
+        else:
+            # get_indexer_for also resolves duplicate names (to each of their positions)
+            positions = columns.get_indexer_for(cols)
+            if (positions < 0).any():
+                if not _is_positional(columns, cols):
+                    raise KeyError('%s not in index' % str([c for c in cols if c not in columns]))
+
+                # integer cols that are not labels select by position (as ``X[cols]``
+                # once did), i.e., for an ndarray given the default names 'V1', 'V2', ...
+                positions = np.asarray(cols, dtype=np.intp) % self.n_features
+
+        others = np.ones(self.n_features, dtype=bool)
+        others[positions] = False
+
+        self.positions = positions
+        self.names = np.asarray(columns[positions])
+        self.others = np.flatnonzero(others)
+        self.other_names = columns[self.others].tolist()
+
+    def matches(self, columns):
+        """Whether the given column names are those of the
+        frame the indexer was built from (in the same order).
+
+        Parameters
+        ----------
+
+        columns : array_like, shape=(n_features,)
+            The column names of a frame (i.e., ``X.columns``).
+        """
+        if columns is getattr(self, '_last_match', None):
+            return True
+        if len(columns) != self.n_features or _schema_hash(columns) != self.schema:
+            return False
+
+        # guard against a collision selecting the wrong columns
+        if not np.array_equal(np.asarray(columns)[self.positions], self.names):
+            return False
+        if isinstance(columns, pd.Index):
+            self._last_match = columns
+        return True
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_last_match', None)  # not worth pickling
+        return state
+
+
+def _column_indexer(indexer, X, cols=None):
+    """Get the ``_ColumnIndexer`` for the selected columns of ``X``:
+    the cached ``indexer`` (i.e., that recorded at ``fit``) if ``X`` has
+    the schema it was built from, otherwise a new one, built from the names.
+
+    Parameters
+    ----------
+
+    indexer : ``_ColumnIndexer`` or None
+        The cached indexer, if any.
+
+    X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+        The frame whose columns are selected.
+
+    cols : array_like, shape=(n_selected,), optional (default=None)
+        The names of the selected columns (used only if
+        the cached indexer cannot be). If None, all are selected.
+    """
+    if indexer is not None and indexer.matches(X.columns):
+        return indexer
+    return _ColumnIndexer(X.columns, cols)
+
+
+def _take_columns(X, positions):
+    """Get the columns of ``X`` at the given positions as a list of
+    1d arrays, for ``_assemble_frame``. Selecting each column by name (or
+    by ``iloc``) costs tens of microseconds, which adds up on wide frames,
+    so if the columns share a dtype, they are sliced from a single matrix
+    of their values instead (a view, if they are a single block).
+
+    Parameters
+    ----------
+
+    X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+        The frame from which to take the columns.
+
+    positions : array_like (int), shape=(n_selected,)
+        The positions of the columns to take.
+    """
+    if not len(positions):
+        return []
+
+    def shares_numpy_dtype(frame):
+        # (extension dtypes, like sparse columns, must not be densified)
+        dtypes = set(frame.dtypes)
+        return len(dtypes) == 1 and isinstance(dtypes.pop(), np.dtype)
+
+    # if all of X shares a dtype, nothing need be copied
+    if shares_numpy_dtype(X):
+        values = X.values
+        return [values[:, j] for j in positions]
+
+    X = X.take(positions, axis=1)
+    if shares_numpy_dtype(X):
+        values = X.values
+        return [values[:, j] for j in range(values.shape[1])]
+    return [X.iloc[:, j].values for j in range(X.shape[1])]
+
+
 def corr_plot(X, plot_type='cor', cmap='Blues_d', n_levels=5, corr=None,
               method='pearson', figsize=(11, 9), cmap_a=220, cmap_b=10, vmax=0.3,
               xticklabels=5, yticklabels=5, linewidths=0.5, cbar_kws=None):
@@ -399,7 +630,7 @@ def shuffle_dataframe(X):
     return X.iloc[np.random.permutation(np.arange(X.shape[0]))]
 
 
-def validate_is_pd(X, cols, assert_all_finite=False):
+def validate_is_pd(X, cols, assert_all_finite=False, copy=True):
     """Used within each SelectiveMixin fit method to determine whether
     the passed ``X`` is a dataframe, and whether the cols is appropriate.
     There are four scenarios (in the order in which they're checked):
@@ -439,12 +670,17 @@ def validate_is_pd(X, cols, assert_all_finite=False):
         If True, will raise an AssertionError if any np.nan or np.inf
         values reside in ``X``.
 
+    copy : bool, optional (default=True)
+        Whether to copy ``X`` if it is already a DataFrame. If False,
+        the caller must take care not to alter the returned frame.
+
 
     Returns
     -------
 
     X : pd.DataFrame, shape=(n_samples, n_features)
-        A copy of the original input ``X``
+        A copy of the original input ``X`` (or ``X`` itself if it
+        is a DataFrame and ``copy`` is False)
 
     cols : list or None, shape=(n_features,)
         If ``cols`` was not None and did not raise a TypeError,
@@ -483,11 +719,11 @@ def validate_is_pd(X, cols, assert_all_finite=False):
 
         # case 2, we have a DF but no cols, def behavior: use all
         elif is_df and cols is None:
-            return X.copy(), None
+            return (X.copy() if copy else X), None
 
         # case 3, we have a DF AND cols
         elif is_df and cols is not None:
-            return X.copy(), cols
+            return (X.copy() if copy else X), cols
 
         # case 4, we have neither a frame nor cols (maybe JUST a np.array?)
         else:
@@ -498,18 +734,22 @@ def validate_is_pd(X, cols, assert_all_finite=False):
             # bail out:
             raise ValueError('cannot handle data of type %s' % type(X))
 
-    # do initial check
-    X, cols = _check(X, cols)
-
-    # we need to ensure all are finite
-    if assert_all_finite:
-        # if cols, we only need to ensure the specified columns are finite
-        cols_tmp = _cols_if_none(X, cols)
-        X_prime = X[get_numeric(X[cols_tmp])]  # subset the subset... only numerics
-
-        # also apply only to the non-object columns
-        if X_prime.apply(lambda x: (~np.isfinite(x)).sum()).sum() > 0:
-            raise ValueError('Expected all entries to be finite')
+    with _phase('validate'):
+        # do initial check
+        X_valid, cols = _check(X, cols)
+        if X_valid is not X:
+            _record_copy()
+        X = X_valid
+
+        # we need to ensure all are finite
+        if assert_all_finite:
+            # if cols, we only need to ensure the specified columns are finite
+            cols_tmp = _cols_if_none(X, cols)
+            X_prime = X[get_numeric(X[cols_tmp])]  # subset the subset... only numerics
+
+            # also apply only to the non-object columns
+            if X_prime.apply(lambda x: (~np.isfinite(x)).sum()).sum() > 0:
+                raise ValueError('Expected all entries to be finite')
 
     return X, cols
 